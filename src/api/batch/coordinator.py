@@ -0,0 +1,291 @@
+"""
+Distributed execution of batch jobs, fanned out to workers by byte range.
+
+The input is split in work units, contiguous byte ranges of whole lines, which
+are processed by independent workers: processes of this container, or
+invocations of the batch Lambda itself. Workers read their range from S3 and
+write their output next to the input, in "shards/", and the coordinator
+records the units done in "manifest.json", like the sharded mode. If the
+coordinator is interrupted, the next attempt only dispatches the units not
+recorded yet. Once all the units are done, their outputs are merged in input
+order into "output.csv", or "output.parquet" as chosen by the input tags.
+
+Records of the input are expected on a single line each, as byte ranges are
+split at line breaks.
+"""
+
+import json
+from concurrent.futures import Executor, as_completed
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from aws_lambda_powertools import Logger
+from awscommon.clients import AWS_CLIENT_CONFIG, ClientFactory
+from awscommon.s3 import iter_text_lines
+from botocore.config import Config
+from common.event_parser import get_file_metadata
+from frame import get_output_format
+from geocoder.ratelimit import GEOCODE_QPS
+from sharding import (
+    MANIFEST_VERSION,
+    load_manifest,
+    merge_shards,
+    save_manifest,
+    shard_key,
+    summarize,
+)
+
+logger = Logger()
+
+# Bytes read at once when looking for the line breaks splitting the units
+LINE_BREAK_WINDOW = 64 * 1024
+
+# Rows processed at once by a worker, bounding its memory
+UNIT_CHUNK_ROWS = 10_000
+
+# Timeout of the worker invocations, in seconds: the longest a Lambda can run
+WORKER_READ_TIMEOUT = 900
+
+# Processes a work unit, returning the number of rows and the output columns
+UnitRunner = Callable[[Dict], Dict]
+
+
+class WorkerError(Exception):
+    pass
+
+
+# Clients invoking the workers: synchronous invocations last as long as the
+# workers, and are not retried, as failed units are dispatched again on resume
+worker_clients = ClientFactory(
+    AWS_CLIENT_CONFIG.merge(
+        Config(
+            read_timeout=WORKER_READ_TIMEOUT,
+            retries={"mode": "standard", "max_attempts": 1},
+        )
+    )
+)
+
+
+class LambdaUnitRunner:
+    def __init__(self, function_name: str) -> None:
+        """
+        Runs work units by invoking a Lambda function, e.g. the batch one.
+
+        The function is invoked synchronously with {"unit": unit}.
+
+        Args:
+            function_name (str): Name or ARN of the function.
+        """
+        self.function_name = function_name
+
+    def __call__(self, unit: Dict) -> Dict:
+        response = worker_clients.client("lambda").invoke(
+            FunctionName=self.function_name,
+            InvocationType="RequestResponse",
+            Payload=json.dumps({"unit": unit}).encode("utf-8"),
+        )
+        payload = json.loads(response["Payload"].read())
+        if "FunctionError" in response:
+            raise WorkerError(f"Unit {unit['index']} failed: {payload}")
+        return payload
+
+
+def find_line_start(
+    s3_client: object, bucket: str, key: str, offset: int, size: int
+) -> int:
+    """
+    Find the start of the first line at or after an offset of an S3 object.
+
+    Args:
+        s3_client (object): S3 client.
+        bucket (str): Name of the bucket.
+        key (str): Key of the object.
+        offset (int): Offset in bytes.
+        size (int): Size of the object in bytes.
+
+    Returns:
+        int: Offset of the line start, the size if there is none.
+    """
+    # The previous byte tells if the offset starts a line itself
+    position = offset - 1
+    while position < size:
+        end = min(position + LINE_BREAK_WINDOW, size)
+        window = s3_client.get_object(
+            Bucket=bucket, Key=key, Range=f"bytes={position}-{end - 1}"
+        )["Body"].read()
+        line_break = window.find(b"\n")
+        if line_break >= 0:
+            return position + line_break + 1
+        position = end
+    return size
+
+
+def plan_units(
+    s3_client: object, bucket: str, key: str, units: int
+) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    Split an input CSV file in byte ranges of whole lines, after the header.
+
+    Ranges are of about the same size; there are fewer than requested if the
+    file has fewer lines.
+
+    Args:
+        s3_client (object): S3 client.
+        bucket (str): Name of the bucket.
+        key (str): Key of the input.
+        units (int): Number of ranges.
+
+    Returns:
+        Tuple[str, List[Tuple[int, int]]]: Header line of the file, and the
+            start and end offsets of the ranges, end excluded.
+    """
+    size = s3_client.head_object(Bucket=bucket, Key=key)["ContentLength"]
+    header_end = find_line_start(s3_client, bucket, key, 1, size)
+    header = b""
+    if header_end > 0:
+        header = s3_client.get_object(
+            Bucket=bucket, Key=key, Range=f"bytes=0-{header_end - 1}"
+        )["Body"].read()
+
+    starts = [header_end]
+    for unit in range(1, units):
+        offset = header_end + unit * (size - header_end) // units
+        start = find_line_start(s3_client, bucket, key, max(offset, starts[-1]), size)
+        if start > starts[-1]:
+            starts.append(start)
+    ranges = zip(starts, starts[1:] + [size], strict=True)
+    return header.decode("utf-8"), [
+        (start, end) for start, end in ranges if start < end
+    ]
+
+
+def read_unit_lines(s3_client: object, unit: Dict) -> Iterator[str]:
+    """
+    Read the lines of a work unit, preceded by the header of the input.
+
+    Args:
+        s3_client (object): S3 client.
+        unit (Dict): The work unit.
+
+    Returns:
+        Iterator[str]: Lines of the unit, with their line breaks.
+    """
+    body = s3_client.get_object(
+        Bucket=unit["bucket"],
+        Key=unit["key"],
+        Range=f"bytes={unit['start']}-{unit['end'] - 1}",
+    )["Body"]
+    yield unit["header"]
+    yield from iter_text_lines(body)
+
+
+def run_coordinated(
+    s3_client: object,
+    bucket: str,
+    key: str,
+    units: int,
+    run_unit: UnitRunner,
+    executor: Executor,
+    chunk_rows: int = UNIT_CHUNK_ROWS,
+    geocode_qps: float = GEOCODE_QPS,
+    max_workers: int = None,
+) -> Dict:
+    """
+    Process an input in work units dispatched to workers, resuming from its manifest.
+
+    A manifest is resumed only if it was written for the same version of the
+    input and output format, split in the same number of units. Units failing are not recorded,
+    and the first error is raised once the other units are done.
+
+    The rate of geocoding calls is split evenly among the units running at
+    the same time: the units dispatched, at most max_workers.
+
+    Args:
+        s3_client (object): S3 client.
+        bucket (str): Name of the bucket.
+        key (str): Key of the input.
+        units (int): Number of work units.
+        run_unit (UnitRunner): Runs a unit, e.g. in a process or a Lambda.
+        executor (Executor): Pool running the units concurrently.
+        chunk_rows (int, optional): Rows processed at once by the workers.
+        geocode_qps (float, optional): Maximum rate of geocoding calls of all
+            the workers together, in calls per second.
+        max_workers (int, optional): Units run at the same time by the
+            executor. Defaults to all of them.
+
+    Returns:
+        Dict: Number of rows and names of the columns written to S3.
+    """
+    folder = key[: key.rfind("/")]
+    input_etag = s3_client.head_object(Bucket=bucket, Key=key)["ETag"]
+    file_metadata = get_file_metadata(s3_client, bucket, key)
+    output_format = get_output_format(file_metadata)
+    manifest = load_manifest(s3_client, bucket, folder)
+    if (
+        manifest is None
+        or manifest["version"] != MANIFEST_VERSION
+        or manifest["input_etag"] != input_etag
+        or manifest["output_format"] != output_format
+        or manifest.get("unit_count") != units
+    ):
+        header, ranges = plan_units(s3_client, bucket, key, units)
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "input": key,
+            "input_etag": input_etag,
+            "output_format": output_format,
+            "unit_count": units,
+            "header": header,
+            "units": ranges,
+            "columns": None,
+            "shards": {},
+            "complete": False,
+        }
+        save_manifest(s3_client, bucket, folder, manifest)
+    elif manifest["complete"]:
+        logger.info(f"Batch already complete: {len(manifest['shards'])} units")
+        return summarize(manifest)
+    else:
+        logger.info(f"Resuming batch: {len(manifest['shards'])} units done")
+
+    todo = [
+        (index, start, end)
+        for index, (start, end) in enumerate(manifest["units"])
+        if str(index) not in manifest["shards"]
+    ]
+    running = min(len(todo), max_workers or len(todo))
+    pending = {}
+    for index, start, end in todo:
+        unit = {
+            "index": index,
+            "bucket": bucket,
+            "key": key,
+            "start": start,
+            "end": end,
+            "header": manifest["header"],
+            "file_metadata": file_metadata,
+            "output_key": shard_key(folder, index, output_format),
+            "chunk_rows": chunk_rows,
+            "geocode_qps": geocode_qps / running,
+        }
+        pending[executor.submit(run_unit, unit)] = index
+    logger.info(f"Dispatched {len(pending)} of {len(manifest['units'])} units")
+
+    errors = []
+    for future in as_completed(pending):
+        index = pending[future]
+        try:
+            summary = future.result()
+        except Exception as error:
+            logger.error(f"Unit {index} failed: {error}")
+            errors.append(error)
+            continue
+        manifest["columns"] = summary["columns"] or manifest["columns"]
+        manifest["shards"][str(index)] = {"rows": summary["rows"]}
+        save_manifest(s3_client, bucket, folder, manifest)
+    if errors:
+        raise errors[0]
+
+    merge_shards(s3_client, bucket, folder, manifest, len(manifest["units"]))
+    manifest["complete"] = True
+    save_manifest(s3_client, bucket, folder, manifest)
+    return summarize(manifest)
@@ -0,0 +1,297 @@
+"""
+Columnar frame of the rows of a batch, from the input to the output file.
+
+Each column is a NumPy array with a value per input row, in the order of the
+input: coordinates and messages are filled in place by index, and sampled
+values scattered to the rows they were sampled for. Missing values are masked,
+and written as empty cells in CSV, nulls in Parquet.
+"""
+
+import csv
+from io import StringIO
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# Tag of the input choosing the format of the output, one of OUTPUT_FORMATS
+OUTPUT_FORMAT_TAG = "output-format"
+
+# Formats of the output, the first one by default
+OUTPUT_FORMATS = ("csv", "parquet")
+
+# Compression of the Parquet outputs, and its level
+PARQUET_COMPRESSION = "zstd"
+PARQUET_COMPRESSION_LEVEL = 3
+
+# Rows of the row groups of the Parquet outputs, at most
+PARQUET_ROW_GROUP_ROWS = 100_000
+
+
+def get_output_format(file_metadata: Dict) -> str:
+    """
+    Get the format of the output, from the tags of the input.
+
+    Args:
+        file_metadata (Dict): Tags of the input file.
+
+    Returns:
+        str: One of OUTPUT_FORMATS.
+    """
+    output_format = file_metadata.get(OUTPUT_FORMAT_TAG) or OUTPUT_FORMATS[0]
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Unknown output format '{output_format}', expected one of {OUTPUT_FORMATS}"
+        )
+    return output_format
+
+
+def output_name(output_format: str) -> str:
+    return f"output.{output_format}"
+
+
+def _float_column(values: Iterable[float | str | None], size: int) -> np.ma.MaskedArray:
+    values = list(values)
+    mask = np.fromiter((value is None for value in values), dtype=bool, count=size)
+    data = np.fromiter(
+        (np.nan if value is None else value for value in values),
+        dtype=np.float64,
+        count=size,
+    )
+    return np.ma.MaskedArray(data, mask=mask)
+
+
+class BatchFrame:
+    def __init__(self, rows: List[Tuple[float, float, str]]) -> None:
+        """
+        Frame of the rows of a batch, a NumPy array per column.
+
+        Args:
+            rows (List[Tuple[float, float, str]]): Latitude, longitude, and address of the rows.
+        """
+        self.size = len(rows)
+        latitudes, longitudes, addresses = (
+            zip(*rows, strict=True) if rows else ((), (), ())
+        )
+        self.latitude = _float_column(latitudes, self.size)
+        self.longitude = _float_column(longitudes, self.size)
+        self.address = np.array(addresses, dtype=object)
+        self.recognized_latitude = np.ma.masked_all(self.size, dtype=np.float64)
+        self.recognized_longitude = np.ma.masked_all(self.size, dtype=np.float64)
+        self.recognized_address = np.full(self.size, None, dtype=object)
+        self.message = np.full(self.size, None, dtype=object)
+        self.values: Dict[str, np.ma.MaskedArray] = {}
+
+        # Rows with both coordinates are not geocoded, and written as they are
+        self.has_coordinates = ~(
+            np.ma.getmaskarray(self.latitude) | np.ma.getmaskarray(self.longitude)
+        )
+        self.latitude[~self.has_coordinates] = np.ma.masked
+        self.longitude[~self.has_coordinates] = np.ma.masked
+
+    def to_geocode(self) -> np.ndarray:
+        """Get the indexes of the rows to geocode, missing a coordinate."""
+        return np.flatnonzero(~self.has_coordinates)
+
+    def set_recognized(
+        self,
+        indexes: List[int],
+        latitudes: List[float],
+        longitudes: List[float],
+        addresses: List[str],
+    ) -> None:
+        """
+        Set the coordinates and addresses geocoded for rows.
+
+        Args:
+            indexes (List[int]): Indexes of the rows.
+            latitudes (List[float]): Geocoded latitudes.
+            longitudes (List[float]): Geocoded longitudes.
+            addresses (List[str]): Addresses as recognized by the geocoder.
+        """
+        self.recognized_latitude[indexes] = latitudes
+        self.recognized_longitude[indexes] = longitudes
+        self.recognized_address[indexes] = addresses
+
+    def set_messages(self, indexes: List[int], messages: List[str]) -> None:
+        """
+        Set the messages of rows, e.g. why they could not be geocoded.
+
+        Args:
+            indexes (List[int]): Indexes of the rows.
+            messages (List[str]): Messages of the rows.
+        """
+        self.message[indexes] = messages
+
+    def valid(self) -> np.ndarray:
+        """Get the mask of the rows with coordinates, given or geocoded."""
+        return self.has_coordinates | ~np.ma.getmaskarray(self.recognized_latitude)
+
+    def valid_points(self) -> List[Tuple[float, float, str]]:
+        """
+        Get the coordinates and addresses of the valid rows, in their order.
+
+        Returns:
+            List[Tuple[float, float, str]]: Latitude, longitude, and address of the rows.
+        """
+        valid = self.valid()
+        latitudes = np.where(
+            self.has_coordinates, self.latitude.data, self.recognized_latitude.data
+        )
+        longitudes = np.where(
+            self.has_coordinates, self.longitude.data, self.recognized_longitude.data
+        )
+        missing_address = np.equal(self.address, None)
+        addresses = np.where(missing_address, self.recognized_address, self.address)
+        return list(
+            zip(
+                latitudes[valid].tolist(),
+                longitudes[valid].tolist(),
+                addresses[valid].tolist(),
+                strict=True,
+            )
+        )
+
+    def set_valid_values(self, values: Dict[str, np.ndarray]) -> None:
+        """
+        Set columns of values of the valid rows, masked for the other rows.
+
+        Args:
+            values (Dict[str, np.ndarray]): Columns of values, a value per valid
+                row, e.g. sampled from a raster.
+        """
+        valid = self.valid()
+        for name, column in values.items():
+            full_column = np.ma.masked_all(self.size, dtype=np.asarray(column).dtype)
+            full_column[valid] = column
+            self.values[name] = full_column
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Get the columns of the output, the values before the rows.
+
+        Returns:
+            Dict[str, np.ndarray]: Columns by name, in the order of the output.
+        """
+        return {
+            **self.values,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "recognized_latitude": self.recognized_latitude,
+            "recognized_longitude": self.recognized_longitude,
+            "address": self.address,
+            "recognized_address": self.recognized_address,
+            "message": self.message,
+        }
+
+    def to_csv(self, header: bool = True) -> str:
+        """
+        Write the frame as CSV, a column at a time.
+
+        Each column is converted to Python values at once, masked values to
+        None, written as empty cells.
+
+        Args:
+            header (bool, optional): Whether to write the column names. Defaults to True.
+
+        Returns:
+            str: CSV formatted string.
+        """
+        columns = self.columns()
+        csv_buffer = StringIO()
+        csv_writer = csv.writer(csv_buffer)
+        if header:
+            csv_writer.writerow(columns.keys())
+        csv_writer.writerows(
+            zip(*(column.tolist() for column in columns.values()), strict=True)
+        )
+        return csv_buffer.getvalue()
+
+    def to_arrow(self) -> "pa.Table":
+        """
+        Convert the frame to an Apache Arrow table, masked values as nulls.
+
+        Numeric columns keep their NumPy type, and the other ones are strings.
+
+        Returns:
+            pa.Table: The table, a column per column of the frame.
+        """
+        import pyarrow as pa
+
+        return pa.table(
+            {
+                name: (
+                    pa.array(column.tolist(), type=pa.string())
+                    if column.dtype == object
+                    else pa.array(
+                        np.ma.getdata(column), mask=np.ma.getmaskarray(column)
+                    )
+                )
+                for name, column in self.columns().items()
+            }
+        )
+
+
+class FrameWriter:
+    def __init__(self, sink: object, output_format: str, header: bool = True) -> None:
+        """
+        Writer of frames to a binary file, one after the other.
+
+        CSV frames are appended, the column names first if header is set.
+        Parquet frames are written as row groups of a single file, compressed,
+        with the statistics of the columns; the file is complete once closed,
+        e.g. on exit when used as a context manager. If no rows were written,
+        closing writes an empty frame, so that the output has its columns.
+
+        Args:
+            sink (object): Binary file-like object, e.g. an S3MultipartWriter.
+            output_format (str): One of OUTPUT_FORMATS.
+            header (bool, optional): Whether to write the column names of CSV. Defaults to True.
+        """
+        self.sink = sink
+        self.output_format = output_format
+        self.header = header
+        self._written = False
+        self._parquet_writer = None
+
+    def write(self, frame: BatchFrame) -> None:
+        """Write the rows of a frame."""
+        if self.output_format == "parquet":
+            self.write_table(frame.to_arrow())
+        else:
+            self.sink.write(frame.to_csv(header=self.header).encode("utf-8"))
+            self.header = False
+            self._written = True
+
+    def write_table(self, table: "pa.Table") -> None:
+        """Write the rows of an Arrow table, to Parquet only."""
+        import pyarrow.parquet as pq
+
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(
+                self.sink,
+                table.schema,
+                compression=PARQUET_COMPRESSION,
+                compression_level=PARQUET_COMPRESSION_LEVEL,
+                write_statistics=True,
+            )
+        # Columns of values fully masked in a frame can differ in type
+        table = table.cast(self._parquet_writer.schema)
+        self._parquet_writer.write_table(table, row_group_size=PARQUET_ROW_GROUP_ROWS)
+        self._written = True
+
+    def close(self) -> None:
+        """Complete the output, leaving the sink open."""
+        if not self._written:
+            self.write(BatchFrame([]))
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+    def __enter__(self) -> "FrameWriter":
+        return self
+
+    def __exit__(self, exc_type: type, exc_value: Exception, traceback: object) -> None:
+        if exc_type is None:
+            self.close()
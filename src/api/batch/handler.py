@@ -1,5 +1,5 @@
-from io import StringIO
-from typing import Any, List, NamedTuple, Tuple, Dict
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Tuple, Dict
 
 from aws_lambda_powertools import Logger, Tracer
 from land_use.util_CLC_conversion import CLC_MAPPING, DamageCurveEnum
@@ -8,33 +8,65 @@ from geocoder.geocoder import (
     FailedGeocodeError,
     MultipleMatchesForAddressError,
     OutOfBoundsError,
+    OverQueryLimitError,
 )
+from geocoder.ratelimit import GEOCODE_QPS, TokenBucket, geocode_many
 from common.event_parser import (
     get_bucket_and_key,
     parse_s3_file_upload_event,
+    stream_s3_file_upload_event,
 )
-from geocoder.gmaps_geocoder import GMapsGeocoder
-from readgeodata.rasterioreader import RasterIOReader
+from geocoder.factory import geocoder_from_env
+from readgeodata.factory import geodatareader_from_env
 import csv
-import boto3
+from awscommon.clients import aws_client, clients as aws_clients
+from awscommon.s3 import S3MultipartWriter
+from frame import BatchFrame, FrameWriter, get_output_format, output_name
+from sharding import run_sharded, shard_executor
+from coordinator import LambdaUnitRunner, read_unit_lines, run_coordinated
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import io
+import os
 import numpy as np
 
 # Initialize Logger, Tracer, Geocoder, and GeoReader
 logger = Logger()
 tracer = Tracer()
-gmapsgeocoder = GMapsGeocoder()
-riogeoreader = RasterIOReader()
+# Rate of the Google Maps calls of the container, in calls per second
+geocode_qps = float(os.environ.get("GEOCODE_QPS", GEOCODE_QPS))
+# Shared by the invocations of the container, so that it keeps its slowed down
+# rate; only the calls to Google Maps take tokens, not the cache hits
+geocode_limiter = TokenBucket(rate=geocode_qps)
+gmapsgeocoder = geocoder_from_env(
+    os.environ, retry_over_query_limit=False, limiter=geocode_limiter
+)
+riogeoreader = geodatareader_from_env(os.environ)
+
+# Env var with the number of rows processed at once, streaming the input and
+# output files; if not set, files are processed whole
+BATCH_CHUNK_ROWS = "BATCH_CHUNK_ROWS"
+
+# Env var with the number of rows of the shards processed in parallel and
+# checkpointed, see sharding.py; takes precedence over BATCH_CHUNK_ROWS
+BATCH_SHARD_ROWS = "BATCH_SHARD_ROWS"
+
+# Env var with the number of work units the file is split in, processed by
+# independent workers, see coordinator.py; takes precedence over the above
+BATCH_WORK_UNITS = "BATCH_WORK_UNITS"
+
+# Env var with the name of the Lambda function the work units are dispatched
+# to, e.g. this one; if not set, units are processed by local processes
+BATCH_WORKER_FUNCTION = "BATCH_WORKER_FUNCTION"
 
 
-class GeocodedPoint(NamedTuple):
-    lat: float
-    lon: float
-    recognized_lat: float
-    recognized_lon: float
-    address: str
-    recognized_address: str
-    message: str
+# Messages of the rows whose address cannot be geocoded, by error
+GEOCODE_ERROR_MESSAGES = {
+    FailedGeocodeError: "Failed Geocoding",
+    MultipleMatchesForAddressError: "Multiple Matches For Address",
+    OutOfBoundsError: "Out Of Bounds",
+    OverQueryLimitError: "Over Query Limit",
+}
+GEOCODE_ERRORS = tuple(GEOCODE_ERROR_MESSAGES)
 
 
 class TiffTagsKeys:
@@ -49,119 +81,50 @@ class TiffTagsKeys:
     NONE_AAL = "Average_None_AAL"
 
 
-def separate_valid_points(
-    coordinates: List[Tuple[str, str, str]], geocoder
-) -> Tuple[List[GeocodedPoint], List[GeocodedPoint]]:
-    """
-    Separate valid and invalid points based on provided coordinates or addresses.
+def unwrap(result: tuple | Exception) -> tuple:
+    """Return a result of geocode_many, raising it if it is an error."""
+    if isinstance(result, Exception):
+        raise result
+    return result
 
-    Uses a geocoder to convert addresses into coordinates where necessary,
-    and separates valid points from invalid points.
 
-    Args:
-        coordinates (List[Tuple[str, str, str]]): List of coordinates or addresses to process.
-            Each tuple is (lon, lat, address).
-        geocoder: Object for geocoding addresses to coordinates.
+def geocode_rows(frame: BatchFrame, geocoder) -> None:
+    """
+    Geocode the addresses of the rows missing a coordinate, in place.
 
-    Returns:
-        Tuple[List[GeocodedPoint], List[GeocodedPoint]]: Two lists of GeocodedPoint objects,
-        the first containing valid points and the second containing invalid points.
-    """
-    valid_points = []
-    not_valid_points = []
-
-    for lat, lon, address in coordinates:
-        if lat is not None and lon is not None:
-            valid_points.append(
-                GeocodedPoint(
-                    lon=lon,
-                    lat=lat,
-                    recognized_lon=None,
-                    recognized_lat=None,
-                    address=address,
-                    recognized_address=None,
-                    message=None,
-                )
-            )
-        else:
-            try:
-                calculated_coords, calculated_address = geocoder.geocode(address)
-                calculated_lon, calculated_lat = calculated_coords
-                valid_points.append(
-                    GeocodedPoint(
-                        lon=None,
-                        lat=None,
-                        recognized_lon=calculated_lon,
-                        recognized_lat=calculated_lat,
-                        address=address,
-                        recognized_address=calculated_address,
-                        message=None,
-                    )
-                )
-            except FailedGeocodeError as failed_geocode:
-                logger.error(failed_geocode.__traceback__)
-                not_valid_points.append(
-                    GeocodedPoint(
-                        lon=None,
-                        lat=None,
-                        recognized_lon=None,
-                        recognized_lat=None,
-                        address=address,
-                        recognized_address=None,
-                        message="Failed Geocoding",
-                    )
-                )
-            except MultipleMatchesForAddressError as multiple_match_geocode:
-                logger.error(multiple_match_geocode.__traceback__)
-                not_valid_points.append(
-                    GeocodedPoint(
-                        lon=None,
-                        lat=None,
-                        recognized_lon=None,
-                        recognized_lat=None,
-                        address=address,
-                        recognized_address=None,
-                        message="Multiple Matches For Address",
-                    )
-                )
-            except OutOfBoundsError as out_of_bounds_error:
-                logger.error(out_of_bounds_error.__traceback__)
-                not_valid_points.append(
-                    GeocodedPoint(
-                        lon=None,
-                        lat=None,
-                        recognized_lon=None,
-                        recognized_lat=None,
-                        address=address,
-                        recognized_address=None,
-                        message="Out Of Bounds",
-                    )
-                )
-
-    return valid_points, not_valid_points
-
-
-def extend_lists_in_dict(
-    input_dict, desired_length, fill_value=None, exclude_keys=["metadata"]
-):
-    """
-    Extend the lists in a dictionary to the desired length, filling with a specified value.
+    Addresses are geocoded concurrently, within the rate of the limiter of
+    the geocoder. Rows that cannot be geocoded get a message with the reason.
 
     Args:
-        input_dict (dict): Dictionary with lists to extend.
-        desired_length (int): Desired length for the lists.
-        fill_value (Any, optional): Value to fill the lists with. Defaults to None.
-        exclude_keys (list, optional): Keys to exclude from extending. Defaults to ["metadata"].
-
-    Returns:
-        dict: Dictionary with extended lists.
+        frame (BatchFrame): Rows of the batch.
+        geocoder: Object for geocoding addresses to coordinates.
     """
-    return {
-        k: (
-            v + [fill_value] * (desired_length - len(v)) if k not in exclude_keys else v
-        )
-        for k, v in input_dict.items()
-    }
+    indexes = frame.to_geocode().tolist()
+    results = geocode_many(geocoder, frame.address[indexes].tolist())
+
+    recognized = ([], [], [], [])
+    failed = ([], [])
+    for index, result in zip(indexes, results, strict=True):
+        try:
+            (lon, lat), address = unwrap(result)
+        except GEOCODE_ERRORS as error:
+            logger.error(error.__traceback__)
+            failed[0].append(index)
+            failed[1].append(geocode_error_message(error))
+            continue
+        for column, value in zip(recognized, (index, lat, lon, address), strict=True):
+            column.append(value)
+
+    frame.set_recognized(*recognized)
+    frame.set_messages(*failed)
+
+
+def geocode_error_message(error: Exception) -> str:
+    """Get the message of a row whose address could not be geocoded."""
+    for error_type, message in GEOCODE_ERROR_MESSAGES.items():
+        if isinstance(error, error_type):
+            return message
+    raise error
 
 
 def read_file(file_content: str) -> List[Tuple[float, float, str]]:
@@ -174,70 +137,68 @@ def read_file(file_content: str) -> List[Tuple[float, float, str]]:
     Returns:
         List[Tuple[float, float, str]]: List of tuples containing latitude, longitude, and address.
     """
-    csv_data = []
-    try:
-        file_like = io.StringIO(file_content)
-        reader = csv.DictReader(file_like, delimiter="|")
-
-        for row in reader:
-            try:
-                lat = float(row["lat"]) if row["lat"] else None
-                lon = float(row["lon"]) if row["lon"] else None
-                address = row["address"] if row["address"] else None
-                csv_data.append((lat, lon, address))
-            except KeyError as e:
-                logger.error(f"Missing column in the CSV: {e}")
-            except ValueError as e:
-                logger.error(f"Invalid data format in the CSV: {e}")
-            except Exception as e:
-                logger.error(f"Unexpected error: {e}")
-    except Exception as e:
-        logger.error(f"Error reading file: {e}")
-
-    return csv_data
+    return list(read_rows(io.StringIO(file_content)))
 
 
-def dict_to_csv(data_dict: Dict) -> str:
+def read_rows(lines: Iterable[str]) -> Iterator[Tuple[float, float, str]]:
     """
-    Convert dictionary to CSV string.
+    Read CSV lines and extract latitude, longitude, and address, row by row.
 
     Args:
-        data_dict (Dict): Dictionary with data to be converted to CSV.
+        lines (Iterable[str]): Lines of the CSV file, with their line breaks.
 
-    Returns:
-        str: CSV formatted string.
+    Invalid rows are skipped, while errors reading the lines are raised, so
+    that a file is never processed partially.
+
+    Yields:
+        Tuple[float, float, str]: Latitude, longitude, and address of a row.
     """
-    csv_buffer = StringIO()
-    fieldnames = list(data_dict.keys())
-    csv_writer = csv.DictWriter(csv_buffer, fieldnames=fieldnames)
-    csv_writer.writeheader()
+    reader = csv.DictReader(lines, delimiter="|")
+
+    for row in reader:
+        try:
+            lat = float(row["lat"]) if row["lat"] else None
+            lon = float(row["lon"]) if row["lon"] else None
+            address = row["address"] if row["address"] else None
+        except KeyError as e:
+            logger.error(f"Missing column in the CSV: {e}")
+        except ValueError as e:
+            logger.error(f"Invalid data format in the CSV: {e}")
+        else:
+            yield lat, lon, address
 
-    for row in zip(*data_dict.values()):
-        row_dict = dict(zip(fieldnames, row))
-        csv_writer.writerow(row_dict)
 
-    csv_data = csv_buffer.getvalue()
-    csv_buffer.close()
-    return csv_data
+def iter_chunks(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Split rows in lists of a given size, the last one possibly shorter.
 
+    Args:
+        rows (Iterable[Any]): Rows to split, consumed lazily.
+        size (int): Number of rows of the chunks.
 
-def write_dict_to_s3_as_csv(csv_data: str, bucket_name: str, file_key: str):
+    Yields:
+        List[Any]: The chunks of rows.
     """
-    Write CSV data to S3.
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def write_output_file_to_s3(data: bytes, bucket_name: str, file_key: str):
+    """
+    Write an output file to S3.
 
     Args:
-        csv_data (str): CSV data as a string.
+        data (bytes): Content of the file, CSV or Parquet.
         bucket_name (str): Name of the S3 bucket.
         file_key (str): S3 object key.
     """
-    s3_client = boto3.client("s3")
+    s3_client = aws_client("s3")
     try:
-        s3_client.put_object(
-            Body=csv_data.encode("utf-8"), Bucket=bucket_name, Key=file_key
-        )
-        logger.info(f"CSV file uploaded successfully to s3://{bucket_name}/{file_key}")
+        s3_client.put_object(Body=data, Bucket=bucket_name, Key=file_key)
+        logger.info(f"File uploaded successfully to s3://{bucket_name}/{file_key}")
     except Exception as e:
-        logger.error(f"Error uploading CSV file to S3: {e}")
+        logger.error(f"Error uploading file to S3: {e}")
 
 
 def get_s3_parent_folder(s3_path: str) -> str:
@@ -255,208 +216,362 @@ def get_s3_parent_folder(s3_path: str) -> str:
 
 
 def get_national_average_aal_col(
-    land_use_rows: List[str], metadata: dict
-) -> List[float]:
+    land_use_rows: np.ndarray, metadata: dict
+) -> np.ndarray:
     """
     Get national average AAL column from tiff metadata.
 
+    Each distinct land use is looked up once, then the values are
+    broadcast to the rows.
+
     Args:
-        land_use_rows (List[str]): List of land use row identifiers.
+        land_use_rows (np.ndarray): Land use identifiers of the rows.
         metadata (dict): Metadata containing AAL information.
 
     Returns:
-        List[float]: National AAL column rows.
+        np.ndarray: National AAL column rows, masked where the land use is.
     """
-    land_use_rows_names = [
-        CLC_MAPPING.get(int(land_use_id), DamageCurveEnum.OTHERS)
-        for land_use_id in land_use_rows
-    ]
+    land_use_ids = np.trunc(np.asarray(land_use_rows, dtype=np.float64))
+    unique_ids, inverse = np.unique(land_use_ids, return_inverse=True)
+
+    unique_aal = np.array(
+        [
+            metadata[
+                f"Average_{CLC_MAPPING.get(int(land_use_id), DamageCurveEnum.OTHERS)}_AAL"
+            ]
+            for land_use_id in unique_ids
+        ],
+        dtype=np.float64,
+    )
 
-    return [
-        metadata[f"Average_{land_use_name}_AAL"]
-        for land_use_name in land_use_rows_names
-    ]
+    national_average_aal = unique_aal[inverse.reshape(-1)]
+    if np.ma.is_masked(land_use_rows):
+        # No national average for points without land use
+        return np.ma.MaskedArray(
+            national_average_aal, mask=np.ma.getmaskarray(land_use_rows)
+        )
+    return national_average_aal
 
 
-def get_geocoded_points_attributes(points: List[GeocodedPoint]) -> Dict[str, List[Any]]:
+def add_national_average_aal(values: Dict) -> Dict:
     """
-    Get attributes of geocoded points.
+    Add national AAL to the sampled values.
 
     Args:
-        points (List[GeocodedPoint]): List of geocoded points.
+        values (Dict): Sampled values, with the metadata of the file.
 
     Returns:
-        Dict[str, List[Any]]: Dictionary with attributes of geocoded points.
+        Dict: Sampled values, without metadata, with national AAL.
     """
-    attributes = {
-        "latitude": [],
-        "longitude": [],
-        "recognized_latitude": [],
-        "recognized_longitude": [],
-        "address": [],
-        "recognized_address": [],
-        "message": [],
-    }
+    metadata = values.pop("metadata")
+    national_average_aal_col = get_national_average_aal_col(
+        values["land_use"], metadata
+    )
+    values.update({"national_average_aal": national_average_aal_col})
+    return values
+
+
+def sample_valid_points(file_metadata: Dict, frame: BatchFrame) -> Dict:
+    return sample(
+        filename=file_metadata["filename"],
+        tiff_tags=file_metadata.get(
+            "tiff_tags",
+            [
+                TiffTagsKeys.AGRICULTURE_AAL,
+                TiffTagsKeys.COMMERCIAL_AAL,
+                TiffTagsKeys.INDUSTRIAL_AAL,
+                TiffTagsKeys.INFRASTRUCTURE_AAL,
+                TiffTagsKeys.RESIDENTIAL_AAL,
+                TiffTagsKeys.NONE_AAL,
+            ],
+        ),
+        coordinates=frame.valid_points(),
+        geodatareader=riogeoreader,
+        # Keep the sampled bands as NumPy arrays until they are written
+        output="numpy",
+        # Points out of the rasters are written as empty cells, not nodata
+        masked=True,
+    )
 
-    for point in points:
-        attributes["latitude"].append(point.lat)
-        attributes["longitude"].append(point.lon)
-        attributes["recognized_latitude"].append(point.recognized_lat)
-        attributes["recognized_longitude"].append(point.recognized_lon)
-        attributes["address"].append(point.address)
-        attributes["recognized_address"].append(point.recognized_address)
-        attributes["message"].append(point.message)
 
-    return attributes
+def write_output_to_s3(data: bytes, event: Dict, output_format: str) -> None:
+    """
+    Write the final response to S3, next to the input.
 
+    Args:
+        data (bytes): Final response, CSV or Parquet.
+        event (Dict): Event dictionary containing S3 information.
+        output_format (str): Format of the response, one of OUTPUT_FORMATS.
+    """
+    bucket, key = get_bucket_and_key(event)
+    file_folder = get_s3_parent_folder(key)
+    write_output_file_to_s3(data, bucket, f"{file_folder}/{output_name(output_format)}")
 
-def split_coordinates(
-    coordinates: List[Tuple[float, float, str]]
-) -> Tuple[List[float], List[float], List[str]]:
+
+def process_rows(
+    csv_data: List[Tuple[float, float, str]], file_metadata: Dict
+) -> BatchFrame:
     """
-    Split list of coordinates into separate lists for latitudes, longitudes, and addresses.
+    Geocode and sample rows, in their order.
 
     Args:
-        coordinates (List[Tuple[float, float, str]]): List of tuples containing latitude, longitude, and address.
+        csv_data (List[Tuple[float, float, str]]): Latitude, longitude, and address of the rows.
+        file_metadata (Dict): Tags of the input file.
 
     Returns:
-        Tuple[List[float], List[float], List[str]]: Separate lists for latitudes, longitudes, and addresses.
+        BatchFrame: Columns of the output, a value per row.
     """
-    points_array = np.array(coordinates)
-    latitudes = points_array[:, 0].tolist()
-    longitudes = points_array[:, 1].tolist()
-    addresses = points_array[:, 2].tolist()
-    return latitudes, longitudes, addresses
+    frame = BatchFrame(csv_data)
+    geocode_rows(frame, gmapsgeocoder)
 
+    values = sample_valid_points(file_metadata, frame)
 
-def add_national_average_aal(response: Dict) -> Dict:
+    # Get National AAL from tiff metadata
+    values = add_national_average_aal(values)
+
+    # Not valid points have no values
+    frame.set_valid_values(values)
+    return frame
+
+
+def process_file(event: Dict) -> Dict:
     """
-    Add national AAL to the response.
+    Process the uploaded file whole, and write the output with a single upload.
 
     Args:
-        response (Dict): Response dictionary.
+        event (Dict): Event data passed to the Lambda function.
 
     Returns:
-        Dict: Updated response dictionary with national AAL.
+        Dict: Number of rows and names of the columns written to S3.
     """
-    metadata = response.pop("metadata")
-    national_average_aal_col = get_national_average_aal_col(
-        response["land_use"], metadata
-    )
-    response.update({"national_average_aal": national_average_aal_col})
-    return response
+    file_content, file_metadata = parse_s3_file_upload_event(event=event)
+    csv_data = read_file(file_content)
+    frame = process_rows(csv_data, file_metadata)
+
+    # Write output values
+    output_format = get_output_format(file_metadata)
+    output = io.BytesIO()
+    with FrameWriter(output, output_format) as writer:
+        writer.write(frame)
+
+    # Write on S3
+    write_output_to_s3(output.getvalue(), event, output_format)
 
+    # The columns are NumPy arrays, only return a JSON-serializable summary
+    return {"rows": frame.size, "columns": list(frame.columns())}
 
-def add_not_valid_points(
-    response: Dict, valid_points: List, not_valid_points: List
-) -> Dict:
+
+def stream_file(event: Dict, chunk_rows: int) -> Dict:
     """
-    Add not valid points to the response and update the points attributes.
+    Process the uploaded file in chunks of rows, streaming input and output.
+
+    The input is read from S3 while processed, and the output uploaded in
+    parts while written, so that memory does not depend on the number of rows.
 
     Args:
-        response (Dict): Response dictionary.
-        valid_points (List): List of valid points.
-        not_valid_points (List): List of not valid points.
+        event (Dict): Event data passed to the Lambda function.
+        chunk_rows (int): Number of rows processed at once.
 
     Returns:
-        Dict: Updated response dictionary.
+        Dict: Number of rows and names of the columns written to S3.
+    """
+    lines, file_metadata = stream_s3_file_upload_event(event=event)
+    bucket, key = get_bucket_and_key(event)
+    output_format = get_output_format(file_metadata)
+    output_key = f"{get_s3_parent_folder(key)}/{output_name(output_format)}"
+
+    rows = 0
+    columns = []
+    with S3MultipartWriter(aws_client("s3"), bucket, output_key) as output, FrameWriter(
+        output, output_format
+    ) as writer:
+        for csv_data in iter_chunks(read_rows(lines), chunk_rows):
+            frame = process_rows(csv_data, file_metadata)
+            writer.write(frame)
+            rows += frame.size
+            columns = list(frame.columns())
+            logger.info(f"Processed {rows} rows")
+    logger.info(f"File uploaded successfully to s3://{bucket}/{output_key}")
+
+    return {"rows": rows, "columns": columns}
+
+
+def process_shard(
+    csv_data: List[Tuple[float, float, str]], file_metadata: Dict
+) -> Tuple[bytes, List[str]]:
     """
-    valid_points.extend(not_valid_points)
-    points_attributes = get_geocoded_points_attributes(valid_points)
-    logger.debug(f"Points attributes: {points_attributes}")
-    response.update(points_attributes)
-    logger.debug(f"Output values: {response}")
-    final_response = extend_lists_in_dict(
-        response, len(valid_points)
-    )  # add None value to each band for every not valid points
-    return final_response
+    Process a shard of rows, in a worker process of the sharded mode.
 
+    Args:
+        csv_data (List[Tuple[float, float, str]]): Latitude, longitude, and address of the rows.
+        file_metadata (Dict): Tags of the input file.
 
-def sample_valid_points(file_metadata: Dict, valid_points: List) -> Dict:
-    return sample(
-        filename=file_metadata["filename"],
-        tiff_tags=file_metadata.get(
-            "tiff_tags",
-            [
-                TiffTagsKeys.AGRICULTURE_AAL,
-                TiffTagsKeys.COMMERCIAL_AAL,
-                TiffTagsKeys.INDUSTRIAL_AAL,
-                TiffTagsKeys.INFRASTRUCTURE_AAL,
-                TiffTagsKeys.RESIDENTIAL_AAL,
-                TiffTagsKeys.NONE_AAL,
-            ],
-        ),
-        coordinates=[
-            (
-                (
-                    geocoded_point.lat
-                    if geocoded_point.lat is not None
-                    else geocoded_point.recognized_lat
-                ),
-                (
-                    geocoded_point.lon
-                    if geocoded_point.lon is not None
-                    else geocoded_point.recognized_lon
-                ),
-                (
-                    geocoded_point.address
-                    if geocoded_point.address is not None
-                    else geocoded_point.recognized_address
-                ),
-            )
-            for geocoded_point in valid_points
-        ],
-        geodatareader=riogeoreader,
-    )
+    Returns:
+        Tuple[bytes, List[str]]: Output of the shard, CSV rows without header
+            or a Parquet file, and its columns.
+    """
+    frame = process_rows(csv_data, file_metadata)
+    output = io.BytesIO()
+    with FrameWriter(output, get_output_format(file_metadata), header=False) as writer:
+        writer.write(frame)
+    return output.getvalue(), list(frame.columns())
 
 
-def write_output_to_s3(csv_data_str: str, event: Dict) -> None:
+def share_geocode_rate(workers: int) -> None:
     """
-    Write the final response to S3 as a CSV file.
+    Limit the geocoding calls of this process to its share of the rate.
+
+    Run at the start of the processes of a pool, which would each geocode at
+    the full rate otherwise.
 
     Args:
-        csv_data_str (str): Final response csv string.
-        event (Dict): Event dictionary containing S3 information.
+        workers (int): Number of processes geocoding at the same time.
     """
-    bucket, key = get_bucket_and_key(event)
-    file_folder = get_s3_parent_folder(key)
-    write_dict_to_s3_as_csv(csv_data_str, bucket, f"{file_folder}/output.csv")
+    geocode_limiter.set_rate(geocode_qps / workers)
 
 
-@logger.inject_lambda_context
-@tracer.capture_lambda_handler
-def handler(event: Dict, context: Dict = None) -> Dict:
+def shard_file(event: Dict, shard_rows: int) -> Dict:
     """
-    AWS Lambda handler function to process S3 file upload event.
+    Process the uploaded file in shards, in parallel, resuming a previous attempt.
+
+    The processes of the pool split the rate of geocoding calls evenly.
 
     Args:
         event (Dict): Event data passed to the Lambda function.
-        context (Dict): Context object (optional).
+        shard_rows (int): Number of rows of the shards.
 
     Returns:
-        Dict: Processed response.
+        Dict: Number of rows and names of the columns written to S3.
     """
-    file_content, file_metadata = parse_s3_file_upload_event(event=event)
-    csv_data = read_file(file_content)
-    valid_points, not_valid_points = separate_valid_points(csv_data, gmapsgeocoder)
+    lines, file_metadata = stream_s3_file_upload_event(event=event)
+    bucket, key = get_bucket_and_key(event)
+    workers = len(os.sched_getaffinity(0))
+    with shard_executor(
+        workers, initializer=share_geocode_rate, initargs=(workers,)
+    ) as executor:
+        return run_sharded(
+            aws_client("s3"),
+            bucket,
+            key,
+            read_rows(lines),
+            file_metadata,
+            process_shard,
+            shard_rows,
+            executor,
+        )
 
-    logger.debug(f"Valid points: {valid_points}")
-    logger.debug(f"Not valid points: {not_valid_points}")
 
-    response = sample_valid_points(file_metadata, valid_points)
+def process_unit(unit: Dict) -> Dict:
+    """
+    Process a work unit of the coordinated mode, in a worker.
 
-    # Get National AAL from tiff metadata
-    response = add_national_average_aal(response)
+    The rows of the unit are read from S3 and processed in chunks, and the
+    output uploaded to the key of the unit: CSV rows without header, or a
+    Parquet file. Addresses are geocoded within the rate of the unit, its
+    share of the rate of all the workers.
 
-    # Add not valid points to final result
-    response = add_not_valid_points(response, valid_points, not_valid_points)
+    Args:
+        unit (Dict): The work unit, see coordinator.run_coordinated.
 
-    # Write output values
-    logger.info(f"Writing: \n {response}")
-    csv_data_str = dict_to_csv(response)
+    Returns:
+        Dict: Number of rows and names of the columns written to S3.
+    """
+    s3_client = aws_client("s3")
+    rows = 0
+    columns = []
+    file_metadata = unit["file_metadata"]
+    output_format = get_output_format(file_metadata)
+    geocode_limiter.set_rate(unit["geocode_qps"])
+    try:
+        with S3MultipartWriter(
+            s3_client, unit["bucket"], unit["output_key"]
+        ) as output, FrameWriter(output, output_format, header=False) as writer:
+            lines = read_unit_lines(s3_client, unit)
+            for csv_data in iter_chunks(read_rows(lines), unit["chunk_rows"]):
+                frame = process_rows(csv_data, file_metadata)
+                writer.write(frame)
+                rows += frame.size
+                columns = list(frame.columns())
+    finally:
+        # The container may run other units, or coordinate a file
+        geocode_limiter.set_rate(geocode_qps)
+    logger.info(f"Unit {unit['index']} processed: {rows} rows")
+    return {"rows": rows, "columns": columns}
+
+
+def coordinate_file(event: Dict, units: int) -> Dict:
+    """
+    Process the uploaded file in work units, dispatched to workers.
 
-    # Write on S3
-    write_output_to_s3(csv_data_str, event)
+    Units are dispatched to invocations of BATCH_WORKER_FUNCTION if set, else
+    to a pool of local processes.
+
+    Args:
+        event (Dict): Event data passed to the Lambda function.
+        units (int): Number of work units.
+
+    Returns:
+        Dict: Number of rows and names of the columns written to S3.
+    """
+    bucket, key = get_bucket_and_key(event)
+    function_name = os.environ.get(BATCH_WORKER_FUNCTION)
+    if function_name:
+        run_unit = LambdaUnitRunner(function_name)
+        workers = units
+        executor = ThreadPoolExecutor(max_workers=workers)
+    else:
+        run_unit = process_unit
+        workers = len(os.sched_getaffinity(0))
+        executor = shard_executor(workers)
+        if not isinstance(executor, ProcessPoolExecutor):
+            # Without processes, units run one at a time
+            workers = 1
+    with executor:
+        return run_coordinated(
+            aws_client("s3"),
+            bucket,
+            key,
+            units,
+            run_unit,
+            executor,
+            geocode_qps=geocode_qps,
+            max_workers=workers,
+        )
 
-    logger.info(f"Returning response: {response}")
-    return response
+
+@logger.inject_lambda_context
+@tracer.capture_lambda_handler
+def handler(event: Dict, context: Dict = None) -> Dict:
+    """
+    AWS Lambda handler function to process S3 file upload event.
+
+    If BATCH_WORK_UNITS is set, the file is split in as many work units,
+    dispatched to workers; events with a "unit" are such units, processed by
+    a worker. Else, if BATCH_SHARD_ROWS is set, the file is processed in shards
+    of as many rows, in parallel and resumable. Else, if BATCH_CHUNK_ROWS is set, the file
+    is processed in chunks of as many rows, with a bounded memory.
+
+    Args:
+        event (Dict): Event data passed to the Lambda function.
+        context (Dict): Context object (optional).
+
+    Returns:
+        Dict: Number of rows and names of the columns written to S3.
+    """
+    work_units = int(os.environ.get(BATCH_WORK_UNITS) or 0)
+    shard_rows = int(os.environ.get(BATCH_SHARD_ROWS) or 0)
+    chunk_rows = int(os.environ.get(BATCH_CHUNK_ROWS) or 0)
+    if "unit" in event:
+        summary = process_unit(event["unit"])
+    elif work_units > 0:
+        summary = coordinate_file(event, work_units)
+    elif shard_rows > 0:
+        summary = shard_file(event, shard_rows)
+    elif chunk_rows > 0:
+        summary = stream_file(event, chunk_rows)
+    else:
+        summary = process_file(event)
+    logger.info(f"AWS client stats: {aws_clients.stats()}")
+
+    logger.info(f"Returning response: {summary}")
+    return summary
@@ -0,0 +1,347 @@
+"""
+Sharded, resumable execution of batch jobs.
+
+The rows of the input are split in shards of a fixed number of rows,
+processed in parallel by a pool of processes. The output of each shard is
+written next to the input, in "shards/", and recorded in "manifest.json":
+if the job is interrupted, e.g. by a timeout, the next attempt only processes
+the shards not recorded yet. Once all the shards are done, they are merged in
+order into "output.csv", or "output.parquet" as chosen by the input tags.
+
+The job can be run locally, against S3 or a local stand-in such as moto_server
+or MinIO (set AWS_ENDPOINT_URL), from this folder:
+
+    PYTHONPATH=.. python sharding.py --bucket <bucket> --key <folder>/input.csv
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+from concurrent.futures import (
+    ALL_COMPLETED,
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from io import StringIO
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from aws_lambda_powertools import Logger
+from awscommon.clients import aws_client
+from awscommon.s3 import S3_READ_CHUNK_SIZE, S3MultipartWriter, iter_text_lines
+from botocore.exceptions import ClientError
+from common.event_parser import get_file_metadata, get_file_stream
+from frame import BatchFrame, FrameWriter, get_output_format, output_name
+
+logger = Logger()
+
+# Version of the manifest, to be bumped when its content changes
+MANIFEST_VERSION = 2
+
+# Name of the manifest, next to the input
+MANIFEST_NAME = "manifest.json"
+
+# Folder of the shard outputs, next to the input
+SHARDS_FOLDER = "shards"
+
+# Shards submitted to the pool per core, bounding the rows held in memory
+SHARDS_IN_FLIGHT_PER_CORE = 2
+
+# Processes a shard: rows and tags of the input, to output and columns
+ShardProcessor = Callable[
+    [List[Tuple[float, float, str]], Dict], Tuple[bytes, List[str]]
+]
+
+
+def shard_executor(
+    max_workers: int = None,
+    initializer: Callable[..., None] = None,
+    initargs: Tuple = (),
+) -> Executor:
+    """
+    Get a pool of processes, one per available core by default.
+
+    Processes are spawned rather than forked, so that they do not share the
+    connections of the parent. Where processes cannot be pooled, e.g. in Lambda
+    which has no /dev/shm, shards are processed one at a time in a thread.
+
+    Args:
+        max_workers (int, optional): Number of processes. Defaults to the
+            number of cores available to this process.
+        initializer (Callable[..., None], optional): Called with initargs at
+            the start of each process, not in the fallback thread which shares
+            the state of this process.
+        initargs (Tuple, optional): Arguments of the initializer.
+
+    Returns:
+        Executor: The pool.
+    """
+    if max_workers is None:
+        max_workers = len(os.sched_getaffinity(0))
+    try:
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=initializer,
+            initargs=initargs,
+        )
+    except OSError as error:
+        logger.warning(f"Cannot start a process pool, using a thread: {error}")
+        return ThreadPoolExecutor(max_workers=1)
+
+
+def shard_key(folder: str, index: int, output_format: str = "csv") -> str:
+    return f"{folder}/{SHARDS_FOLDER}/{index:06d}.{output_format}"
+
+
+def load_manifest(s3_client: object, bucket: str, folder: str) -> Dict | None:
+    """
+    Load the manifest of a job, None if there is none.
+
+    Args:
+        s3_client (object): S3 client.
+        bucket (str): Name of the bucket.
+        folder (str): Folder of the input.
+
+    Returns:
+        Dict | None: The manifest.
+    """
+    try:
+        body = s3_client.get_object(Bucket=bucket, Key=f"{folder}/{MANIFEST_NAME}")
+    except ClientError as error:
+        if error.response["Error"]["Code"] == "NoSuchKey":
+            return None
+        raise
+    return json.loads(body["Body"].read())
+
+
+def save_manifest(s3_client: object, bucket: str, folder: str, manifest: Dict) -> None:
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=f"{folder}/{MANIFEST_NAME}",
+        Body=json.dumps(manifest).encode("utf-8"),
+    )
+
+
+def new_manifest(
+    input_key: str, input_etag: str, output_format: str, shard_rows: int
+) -> Dict:
+    return {
+        "version": MANIFEST_VERSION,
+        "input": input_key,
+        "input_etag": input_etag,
+        "output_format": output_format,
+        "shard_rows": shard_rows,
+        "columns": None,
+        "shards": {},
+        "complete": False,
+    }
+
+
+def run_sharded(
+    s3_client: object,
+    bucket: str,
+    key: str,
+    rows: Iterable[Tuple[float, float, str]],
+    file_metadata: Dict,
+    process: ShardProcessor,
+    shard_rows: int,
+    executor: Executor = None,
+) -> Dict:
+    """
+    Process the rows of an input in shards, resuming from its manifest.
+
+    A manifest is resumed only if it was written for the same version of the
+    input and output format, with the same shard size. Shards failing are not
+    recorded, and the first error is raised once the other shards are done.
+
+    Args:
+        s3_client (object): S3 client.
+        bucket (str): Name of the bucket.
+        key (str): Key of the input.
+        rows (Iterable[Tuple[float, float, str]]): Rows of the input, consumed lazily.
+        file_metadata (Dict): Tags of the input.
+        process (ShardProcessor): Processes a shard, picklable to run in a process.
+        shard_rows (int): Number of rows of the shards.
+        executor (Executor, optional): Pool processing the shards. Defaults to
+            shard_executor(), shut down on return.
+
+    Returns:
+        Dict: Number of rows and names of the columns written to S3.
+    """
+    folder = key[: key.rfind("/")]
+    input_etag = s3_client.head_object(Bucket=bucket, Key=key)["ETag"]
+    output_format = get_output_format(file_metadata)
+    manifest = load_manifest(s3_client, bucket, folder)
+    if (
+        manifest is None
+        or manifest["version"] != MANIFEST_VERSION
+        or manifest["input_etag"] != input_etag
+        or manifest["output_format"] != output_format
+        or manifest.get("shard_rows") != shard_rows
+    ):
+        manifest = new_manifest(key, input_etag, output_format, shard_rows)
+    elif manifest["complete"]:
+        logger.info(f"Batch already complete: {len(manifest['shards'])} shards")
+        return summarize(manifest)
+    else:
+        logger.info(f"Resuming batch: {len(manifest['shards'])} shards done")
+
+    own_executor = executor is None
+    executor = executor or shard_executor()
+    max_in_flight = SHARDS_IN_FLIGHT_PER_CORE * len(os.sched_getaffinity(0))
+    pending: Dict[Future, Tuple[int, int]] = {}
+    errors = []
+
+    def collect(return_when: str) -> None:
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            index, row_count = pending.pop(future)
+            try:
+                output, columns = future.result()
+            except Exception as error:
+                logger.error(f"Shard {index} failed: {error}")
+                errors.append(error)
+                continue
+            s3_client.put_object(
+                Bucket=bucket,
+                Key=shard_key(folder, index, output_format),
+                Body=output,
+            )
+            manifest["columns"] = columns
+            manifest["shards"][str(index)] = {"rows": row_count}
+            save_manifest(s3_client, bucket, folder, manifest)
+
+    try:
+        shard_count = 0
+        for index, shard in enumerate(iter_shards(rows, shard_rows)):
+            shard_count += 1
+            if str(index) in manifest["shards"]:
+                continue
+            if len(pending) >= max_in_flight:
+                collect(FIRST_COMPLETED)
+            future = executor.submit(process, shard, file_metadata)
+            pending[future] = (index, len(shard))
+        if pending:
+            collect(ALL_COMPLETED)
+    finally:
+        if own_executor:
+            executor.shutdown()
+    if errors:
+        raise errors[0]
+
+    merge_shards(s3_client, bucket, folder, manifest, shard_count)
+    manifest["complete"] = True
+    save_manifest(s3_client, bucket, folder, manifest)
+    return summarize(manifest)
+
+
+def iter_shards(rows: Iterable[Any], shard_rows: int) -> Iterable[List[Any]]:
+    shard = []
+    for row in rows:
+        shard.append(row)
+        if len(shard) == shard_rows:
+            yield shard
+            shard = []
+    if shard:
+        yield shard
+
+
+def merge_shards(
+    s3_client: object, bucket: str, folder: str, manifest: Dict, shard_count: int
+) -> None:
+    """
+    Merge the outputs of the shards in order into the output file.
+
+    CSV outputs are streamed after the header, and the row groups of Parquet
+    outputs copied to a single file, one shard at a time.
+
+    Args:
+        s3_client (object): S3 client.
+        bucket (str): Name of the bucket.
+        folder (str): Folder of the input.
+        manifest (Dict): Manifest of the job, with all the shards done.
+        shard_count (int): Number of shards.
+    """
+    output_format = manifest["output_format"]
+    output_key = f"{folder}/{output_name(output_format)}"
+    with S3MultipartWriter(s3_client, bucket, output_key) as output:
+        if output_format == "parquet":
+            merge_parquet_shards(s3_client, bucket, folder, shard_count, output)
+        else:
+            header = StringIO()
+            # Without rows, the columns are the ones of an empty frame
+            columns = manifest["columns"] or list(BatchFrame([]).columns())
+            csv.writer(header).writerow(columns)
+            output.write(header.getvalue())
+            for index in range(shard_count):
+                body = s3_client.get_object(Bucket=bucket, Key=shard_key(folder, index))
+                while chunk := body["Body"].read(S3_READ_CHUNK_SIZE):
+                    output.write(chunk)
+    logger.info(f"File uploaded successfully to s3://{bucket}/{output_key}")
+
+
+def merge_parquet_shards(
+    s3_client: object,
+    bucket: str,
+    folder: str,
+    shard_count: int,
+    output: S3MultipartWriter,
+) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    with FrameWriter(output, "parquet") as writer:
+        for index in range(shard_count):
+            body = s3_client.get_object(
+                Bucket=bucket, Key=shard_key(folder, index, "parquet")
+            )
+            writer.write_table(pq.read_table(pa.BufferReader(body["Body"].read())))
+
+
+def summarize(manifest: Dict) -> Dict:
+    return {
+        "rows": sum(shard["rows"] for shard in manifest["shards"].values()),
+        "columns": manifest["columns"] or [],
+    }
+
+
+def main(argv: List[str] = None) -> None:
+    # Imported here, since the handler imports this module
+    import handler
+
+    parser = argparse.ArgumentParser(description="Run a batch job in shards")
+    parser.add_argument("--bucket", required=True, help="Bucket of the input")
+    parser.add_argument("--key", required=True, help="Key of the input CSV file")
+    parser.add_argument(
+        "--shard-rows", type=int, default=10_000, help="Number of rows per shard"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes")
+    args = parser.parse_args(argv)
+
+    workers = args.workers or len(os.sched_getaffinity(0))
+    s3_client = aws_client("s3")
+    file_metadata = get_file_metadata(s3_client, args.bucket, args.key)
+    lines = iter_text_lines(get_file_stream(s3_client, args.bucket, args.key))
+    summary = run_sharded(
+        s3_client,
+        args.bucket,
+        args.key,
+        handler.read_rows(lines),
+        file_metadata,
+        handler.process_shard,
+        args.shard_rows,
+        executor=shard_executor(
+            workers, initializer=handler.share_geocode_rate, initargs=(workers,)
+        ),
+    )
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
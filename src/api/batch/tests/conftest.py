@@ -2,6 +2,10 @@ import pytest
 from moto import mock_aws
 import boto3
 
+# Input of the uploads, rows with just coordinates, and raster they sample
+INPUT_FIXTURE = "src/api/batch/tests/fixtures/mock_input_with_just_coords.csv"
+RASTER_FIXTURE = "src/api/batch/tests/fixtures/small_portion_of_anzio.tif"
+
 
 @pytest.fixture(scope="function")
 def event_new_file_uploaded():
@@ -31,6 +35,40 @@ def event_new_file_uploaded():
     }
 
 
+@pytest.fixture(scope="function")
+def uploaded_input(event_new_file_uploaded):
+    """
+    Upload the input of event_new_file_uploaded with its tags, by default the
+    raster to sample; to be called in a mock_aws test, again to replace it.
+    """
+    bucket = event_new_file_uploaded["detail"]["bucket"]["name"]
+    key = event_new_file_uploaded["detail"]["object"]["key"]
+
+    def upload(tags=None, content=None):
+        if tags is None:
+            tags = {"filename": RASTER_FIXTURE}
+        if content is None:
+            with open(INPUT_FIXTURE) as f:
+                content = f.read()
+        conn = boto3.client("s3")
+        try:
+            conn.create_bucket(
+                Bucket=bucket,
+                CreateBucketConfiguration={"LocationConstraint": "eu-central-1"},
+            )
+        except conn.exceptions.BucketAlreadyOwnedByYou:
+            pass
+        conn.put_object(Bucket=bucket, Key=key, Body=content)
+        conn.put_object_tagging(
+            Bucket=bucket,
+            Key=key,
+            Tagging={"TagSet": [{"Key": k, "Value": v} for k, v in tags.items()]},
+        )
+        return conn
+
+    yield upload
+
+
 class ContextMock:
     def __init__(self) -> None:
         self.function_name = "lambda_handler"
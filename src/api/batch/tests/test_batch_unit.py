@@ -1,38 +1,27 @@
 import pytest
 import boto3
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
 from handler import read_file
 from common.event_parser import get_bucket_and_key, parse_s3_file_upload_event
 from moto import mock_aws
+import coordinator
 import handler as handler_module
+from frame import BatchFrame
+import sharding
 
 
 @mock_aws
 @pytest.mark.unit
 def test_parse_s3_file_upload_event_and_process(
-    event_new_file_uploaded, lambda_powertools_ctx, monkeypatch
+    event_new_file_uploaded, lambda_powertools_ctx, uploaded_input, monkeypatch
 ):
     # Set up the mock S3 environment
-    conn = boto3.client("s3")
     monkeypatch.setenv("GMAPS_SECRET_NAME", "apinine/gmaps_apikey")
     monkeypatch.setenv("GMAPS_SECRET_REGION", "eu-central-1")
 
     # Create a bucket and put a file in it
-    bucket = "test-bucket-setup"
-    key = "mock_file.csv"
-    conn.create_bucket(
-        Bucket=bucket, CreateBucketConfiguration={"LocationConstraint": "eu-central-1"}
-    )
-    local_file_path = "src/api/batch/tests/fixtures/mock_input_with_just_coords.csv"
-    with open(local_file_path, "r") as f:
-        local_file_content = f.read()
-    conn.put_object(Bucket=bucket, Key=key, Body=local_file_content)
-    tags = {"filename": "src/api/batch/tests/fixtures/small_portion_of_anzio.tif"}
-    conn.put_object_tagging(
-        Bucket=bucket,
-        Key=key,
-        Tagging={"TagSet": [{"Key": k, "Value": v} for k, v in tags.items()]},
-    )
+    uploaded_input()
 
     response = handler_module.handler(
         event=event_new_file_uploaded, context=lambda_powertools_ctx
@@ -40,3 +29,451 @@ def test_parse_s3_file_upload_event_and_process(
 
     # Checking only format and types, not the values
     assert isinstance(response, dict)
+
+
+@pytest.mark.unit
+def test_frame_merges_not_valid_rows_in_order():
+    import numpy as np
+
+    frame = BatchFrame(
+        [(41.5, 12.5, None), (None, None, "nowhere"), (None, 12.0, "via 1")]
+    )
+    assert frame.to_geocode().tolist() == [1, 2]
+    frame.set_recognized([2], [41.25], [12.75], ["Via 1"])
+    frame.set_messages([1], ["Failed Geocoding"])
+    assert frame.valid_points() == [(41.5, 12.5, None), (41.25, 12.75, "via 1")]
+
+    frame.set_valid_values(
+        {"aal": np.ma.MaskedArray([0.5, 0.25], mask=[False, True], dtype="float32")}
+    )
+
+    assert frame.to_csv().splitlines() == [
+        "aal,latitude,longitude,recognized_latitude,recognized_longitude,"
+        "address,recognized_address,message",
+        "0.5,41.5,12.5,,,,,",
+        ",,,,,nowhere,,Failed Geocoding",
+        ",,,41.25,12.75,via 1,Via 1,",
+    ]
+    assert frame.to_csv(header=False) == "\r\n".join(
+        frame.to_csv().splitlines()[1:] + [""]
+    )
+
+
+@pytest.mark.unit
+def test_get_national_average_aal_col():
+    import numpy as np
+
+    metadata = {
+        "Average_Residential_AAL": 0.1,
+        "Average_Agriculture_AAL": 0.2,
+        "Average_None_AAL": 0.3,
+    }
+
+    got = handler_module.get_national_average_aal_col(
+        np.array([112.0, 211.125, 112.0], dtype="float32"), metadata
+    )
+
+    want = [
+        metadata[
+            f"Average_{handler_module.CLC_MAPPING.get(land_use_id, handler_module.DamageCurveEnum.OTHERS)}_AAL"
+        ]
+        for land_use_id in (112, 211, 112)
+    ]
+    assert got.tolist() == want
+
+
+@pytest.mark.unit
+def test_geocode_rows_concurrently_in_order():
+    import threading
+    import time
+
+    from geocoder.geocoder import FailedGeocodeError, OutOfBoundsError
+
+    class SlowGeocoder:
+        """Fake geocoder with a latency, resolving 'via <n>' to (n, 45)"""
+
+        def __init__(self):
+            self.concurrent = 0
+            self.max_concurrent = 0
+            self.lock = threading.Lock()
+
+        def geocode(self, address):
+            with self.lock:
+                self.concurrent += 1
+                self.max_concurrent = max(self.max_concurrent, self.concurrent)
+            time.sleep(0.02)
+            with self.lock:
+                self.concurrent -= 1
+            if address == "nowhere":
+                raise FailedGeocodeError(address)
+            if address == "lima":
+                raise OutOfBoundsError
+            return (float(address.split()[-1]), 45.0), address.title()
+
+    geocoder = SlowGeocoder()
+    coordinates = [
+        (None, None, f"via {i}") if i % 3 else ("41.5", "12.5", None) for i in range(30)
+    ] + [(None, None, "nowhere"), (None, None, "lima")]
+
+    frame = BatchFrame(coordinates)
+    handler_module.geocode_rows(frame, geocoder)
+
+    assert geocoder.max_concurrent > 1
+    assert frame.recognized_longitude.tolist() == [
+        float(i) if i % 3 else None for i in range(30)
+    ] + [None, None]
+    assert frame.recognized_address[:3].tolist() == [None, "Via 1", "Via 2"]
+    assert frame.message[-3:].tolist() == [None, "Failed Geocoding", "Out Of Bounds"]
+    assert frame.valid().tolist() == [True] * 30 + [False, False]
+
+
+@mock_aws
+@pytest.mark.unit
+def test_streaming_writes_same_output_as_whole_file(
+    event_new_file_uploaded, lambda_powertools_ctx, uploaded_input, monkeypatch
+):
+    conn = uploaded_input()
+    bucket = "test-bucket-setup"
+
+    def output():
+        return conn.get_object(Bucket=bucket, Key="mock_file.cs/output.csv")["Body"]
+
+    whole = handler_module.handler(event_new_file_uploaded, lambda_powertools_ctx)
+    want = output().read()
+
+    # Chunks not dividing the 20 rows, the last one shorter
+    monkeypatch.setenv(handler_module.BATCH_CHUNK_ROWS, "7")
+    streamed = handler_module.handler(event_new_file_uploaded, lambda_powertools_ctx)
+
+    assert streamed == whole == {"rows": 20, "columns": streamed["columns"]}
+    assert output().read() == want
+
+
+@mock_aws
+@pytest.mark.unit
+def test_sharding_writes_same_output_as_whole_file(
+    event_new_file_uploaded, lambda_powertools_ctx, uploaded_input, monkeypatch
+):
+    conn = uploaded_input()
+    bucket = "test-bucket-setup"
+
+    def output():
+        return conn.get_object(Bucket=bucket, Key="mock_file.cs/output.csv")["Body"]
+
+    whole = handler_module.handler(event_new_file_uploaded, lambda_powertools_ctx)
+    want = output().read()
+
+    # Shards processed by a pool of processes, the last one shorter
+    monkeypatch.setenv(handler_module.BATCH_SHARD_ROWS, "7")
+    sharded = handler_module.handler(event_new_file_uploaded, lambda_powertools_ctx)
+
+    assert sharded == whole
+    assert output().read() == want
+    manifest = sharding.load_manifest(conn, bucket, "mock_file.cs")
+    assert manifest["complete"]
+    assert manifest["shards"] == {"0": {"rows": 7}, "1": {"rows": 7}, "2": {"rows": 6}}
+
+
+@mock_aws
+@pytest.mark.unit
+def test_stream_errors_leave_no_output(
+    event_new_file_uploaded, lambda_powertools_ctx, uploaded_input, monkeypatch
+):
+    import common.event_parser
+    from awscommon.s3 import iter_text_lines
+
+    conn = uploaded_input()
+    bucket = "test-bucket-setup"
+    content = conn.get_object(Bucket=bucket, Key="mock_file.csv")["Body"].read()
+
+    class BrokenStream:
+        """Body returning the first rows of the input, then failing"""
+
+        def __init__(self):
+            self.chunks = [content[: content.index(b"\n", len(content) // 2) + 1]]
+
+        def read(self, size=-1):
+            if not self.chunks:
+                raise ConnectionError("connection reset")
+            return self.chunks.pop()
+
+    def get_file_stream(s3_client, bucket, key):
+        return BrokenStream()
+
+    monkeypatch.setattr(common.event_parser, "get_file_stream", get_file_stream)
+
+    with pytest.raises(ConnectionError):
+        list(
+            handler_module.read_rows(
+                common.event_parser.iter_text_lines(BrokenStream())
+            )
+        )
+
+    def outputs():
+        listing = conn.list_objects_v2(Bucket=bucket, Prefix="mock_file.cs/")
+        return [item["Key"] for item in listing.get("Contents", [])]
+
+    monkeypatch.setenv(handler_module.BATCH_CHUNK_ROWS, "7")
+    with pytest.raises(ConnectionError):
+        handler_module.handler(event_new_file_uploaded, lambda_powertools_ctx)
+    assert outputs() == []
+
+    # The shards read whole are kept, the one cut short is not recorded
+    monkeypatch.setenv(handler_module.BATCH_SHARD_ROWS, "7")
+    with pytest.raises(ConnectionError):
+        handler_module.handler(event_new_file_uploaded, lambda_powertools_ctx)
+    assert "mock_file.cs/output.csv" not in outputs()
+    manifest = sharding.load_manifest(conn, bucket, "mock_file.cs")
+    assert manifest is None or (
+        not manifest["complete"] and set(manifest["shards"]) <= {"0"}
+    )
+
+
+@pytest.mark.unit
+def test_shard_processes_share_the_geocoding_rate(monkeypatch):
+    from geocoder.ratelimit import TokenBucket
+
+    monkeypatch.setattr(handler_module, "geocode_qps", 40)
+    monkeypatch.setattr(handler_module, "geocode_limiter", TokenBucket(rate=40))
+
+    handler_module.share_geocode_rate(4)
+
+    assert handler_module.geocode_limiter.max_rate == 10
+
+
+def process_numbers(csv_data, file_metadata):
+    if any(address == "fail" for _, _, address in csv_data):
+        raise ValueError("failed shard")
+    return "".join(f"{address}\n" for _, _, address in csv_data).encode(), ["n"]
+
+
+@mock_aws
+@pytest.mark.unit
+def test_sharding_resumes_unfinished_shards(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "eu-central-1")
+    conn = boto3.client("s3")
+    bucket = "bucket"
+    conn.create_bucket(
+        Bucket=bucket, CreateBucketConfiguration={"LocationConstraint": "eu-central-1"}
+    )
+    conn.put_object(Bucket=bucket, Key="job/input.csv", Body=b"input")
+    rows = [(0.0, 0.0, str(n)) for n in range(10)]
+    calls = []
+
+    def process(csv_data, file_metadata):
+        calls.append(csv_data[0][2])
+        return process_numbers(csv_data, file_metadata)
+
+    def run(rows):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return sharding.run_sharded(
+                conn, bucket, "job/input.csv", rows, {}, process, 4, executor
+            )
+
+    with pytest.raises(ValueError, match="failed shard"):
+        run(rows[:4] + [(0.0, 0.0, "fail")] + rows[5:])
+    manifest = sharding.load_manifest(conn, bucket, "job")
+    assert not manifest["complete"]
+    assert sorted(manifest["shards"]) == ["0", "2"]
+
+    calls.clear()
+    assert run(rows) == {"rows": 10, "columns": ["n"]}
+    assert calls == ["4"]
+    output = conn.get_object(Bucket=bucket, Key="job/output.csv")["Body"].read()
+    assert output.decode().split() == ["n"] + [str(n) for n in range(10)]
+
+    # Complete jobs are not processed again, unless the input changes
+    calls.clear()
+    run(rows)
+    assert calls == []
+    conn.put_object(Bucket=bucket, Key="job/input.csv", Body=b"new input")
+    run(rows)
+    assert calls == ["0", "4", "8"]
+
+
+@mock_aws
+@pytest.mark.unit
+def test_plan_units_splits_whole_lines(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "eu-central-1")
+    monkeypatch.setattr(coordinator, "LINE_BREAK_WINDOW", 3)
+    conn = boto3.client("s3")
+    conn.create_bucket(
+        Bucket="bucket",
+        CreateBucketConfiguration={"LocationConstraint": "eu-central-1"},
+    )
+    lines = ["lat|lon|address\n"] + [f"|||via {n * 'x'}\n" for n in range(12)]
+    content = "".join(lines).encode("utf-8")
+    conn.put_object(Bucket="bucket", Key="job/input.csv", Body=content)
+
+    header, ranges = coordinator.plan_units(conn, "bucket", "job/input.csv", 4)
+
+    assert header == lines[0]
+    assert len(ranges) == 4
+    assert ranges[0][0] == len(lines[0]) and ranges[-1][1] == len(content)
+    units = [content[start:end].decode() for start, end in ranges]
+    assert "".join(units) == "".join(lines[1:])
+    assert all(unit.endswith("\n") for unit in units)
+
+    # Fewer units than lines
+    _, ranges = coordinator.plan_units(conn, "bucket", "job/input.csv", 100)
+    assert len(ranges) == 12
+
+
+@mock_aws
+@pytest.mark.unit
+def test_coordinated_writes_same_output_as_whole_file(
+    event_new_file_uploaded, lambda_powertools_ctx, uploaded_input
+):
+    conn = uploaded_input()
+    bucket = "test-bucket-setup"
+
+    def output():
+        return conn.get_object(Bucket=bucket, Key="mock_file.cs/output.csv")["Body"]
+
+    whole = handler_module.handler(event_new_file_uploaded, lambda_powertools_ctx)
+    want = output().read()
+
+    rates = []
+
+    def process_unit(unit):
+        rates.append(unit["geocode_qps"])
+        return handler_module.process_unit(unit)
+
+    # Workers in threads, as the S3 mock is not shared with processes
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        coordinated = coordinator.run_coordinated(
+            conn,
+            bucket,
+            "mock_file.csv",
+            3,
+            process_unit,
+            executor,
+            chunk_rows=4,
+            geocode_qps=30,
+            max_workers=2,
+        )
+
+    assert coordinated == whole
+    # The workers running at the same time together geocode within the rate
+    assert rates == [15, 15, 15]
+    assert output().read() == want
+    manifest = sharding.load_manifest(conn, bucket, "mock_file.cs")
+    assert manifest["complete"]
+    assert len(manifest["units"]) == 3
+
+
+@mock_aws
+@pytest.mark.unit
+def test_parquet_output_in_every_mode(
+    event_new_file_uploaded, lambda_powertools_ctx, uploaded_input, monkeypatch
+):
+    import csv
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    bucket = "test-bucket-setup"
+    with open("src/api/batch/tests/fixtures/mock_input_with_just_coords.csv") as f:
+        content = f.read()
+    tags = {"filename": "src/api/batch/tests/fixtures/small_portion_of_anzio.tif"}
+
+    def set_output_format(output_format):
+        tags["output-format"] = output_format
+        return uploaded_input(tags, content)
+
+    def output(name):
+        return conn.get_object(Bucket=bucket, Key=f"mock_file.cs/{name}")["Body"].read()
+
+    def parquet_output():
+        return pq.ParquetFile(pa.BufferReader(output("output.parquet")))
+
+    conn = set_output_format("csv")
+    handler_module.handler(event_new_file_uploaded, lambda_powertools_ctx)
+    want = list(csv.DictReader(StringIO(output("output.csv").decode())))
+
+    set_output_format("parquet")
+    whole = handler_module.handler(event_new_file_uploaded, lambda_powertools_ctx)
+    parquet = parquet_output()
+    table = parquet.read()
+    assert whole["columns"] == table.column_names == list(want[0])
+    assert table.column("latitude").to_pylist() == [
+        float(row["latitude"]) for row in want
+    ]
+    assert table.column("aal").to_pylist() == [float(row["aal"]) for row in want]
+    assert table.column("address").to_pylist() == [None] * 20
+    column = parquet.metadata.row_group(0).column(0)
+    assert column.compression == "ZSTD"
+    assert column.statistics.has_min_max
+
+    # A row group per chunk
+    monkeypatch.setenv(handler_module.BATCH_CHUNK_ROWS, "7")
+    handler_module.handler(event_new_file_uploaded, lambda_powertools_ctx)
+    parquet = parquet_output()
+    assert parquet.metadata.num_row_groups == 3
+    assert parquet.read().equals(table)
+
+    # Shards merged in order
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        sharding.run_sharded(
+            conn,
+            bucket,
+            "mock_file.csv",
+            read_file(content),
+            tags,
+            handler_module.process_shard,
+            7,
+            executor,
+        )
+    assert parquet_output().read().equals(table)
+
+
+@mock_aws
+@pytest.mark.unit
+@pytest.mark.parametrize("output_format", ["csv", "parquet"])
+def test_empty_input_in_every_mode(
+    event_new_file_uploaded,
+    lambda_powertools_ctx,
+    uploaded_input,
+    monkeypatch,
+    output_format,
+):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tags = {
+        "filename": "src/api/batch/tests/fixtures/small_portion_of_anzio.tif",
+        "output-format": output_format,
+    }
+    conn = uploaded_input(tags, '"lat"|"lon"|"address"\n')
+    bucket = "test-bucket-setup"
+
+    def output_columns():
+        body = conn.get_object(
+            Bucket=bucket, Key=f"mock_file.cs/output.{output_format}"
+        )["Body"].read()
+        if output_format == "parquet":
+            table = pq.read_table(pa.BufferReader(body))
+            assert table.num_rows == 0
+            return table.column_names
+        header, *rows = body.decode().splitlines()
+        assert rows == []
+        return header.split(",")
+
+    # Without rows, only the columns of the frame, values first if any
+    columns = list(BatchFrame([]).columns())
+    handler_module.handler(event_new_file_uploaded, lambda_powertools_ctx)
+    assert output_columns()[-len(columns) :] == columns
+
+    monkeypatch.setenv(handler_module.BATCH_CHUNK_ROWS, "7")
+    handler_module.handler(event_new_file_uploaded, lambda_powertools_ctx)
+    assert output_columns() == columns
+
+    monkeypatch.setenv(handler_module.BATCH_SHARD_ROWS, "7")
+    handler_module.handler(event_new_file_uploaded, lambda_powertools_ctx)
+    assert output_columns() == columns
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        coordinator.run_coordinated(
+            conn, bucket, "mock_file.csv", 2, handler_module.process_unit, executor
+        )
+    assert output_columns() == columns
@@ -29,4 +29,5 @@ def handler(event: dict, context: dict = None) -> dict:
         locations=locations,
         bucket_name=bucket_name,
         body=event["body"].encode(),
+        output_format=validated_input.output_format,
     )
@@ -21,6 +21,10 @@ TIFF_TAGS = [
 ]
 
 
+# Tag of the input file choosing the format of the batch output, if not CSV
+OUTPUT_FORMAT_TAG = "output-format"
+
+
 def list_to_csv(data: List[Dict], fieldnames: List, delimiter: str = "|") -> str:
     # Create a CSV string from the dictionary
     csv_buffer = StringIO()
@@ -2,18 +2,33 @@ import json
 import os
 from typing import Dict, List
 
-import boto3
 from aws_lambda_powertools import Logger, Tracer
-from functions import TIFF_TAGS, hexdigest, list_to_csv, write_batch_input_to_s3
+from awscommon.clients import aws_client
+from functions import (
+    OUTPUT_FORMAT_TAG,
+    TIFF_TAGS,
+    hexdigest,
+    list_to_csv,
+    write_batch_input_to_s3,
+)
 
 logger = Logger()
 tracer = Tracer()
 
 
 @tracer.capture_method
-def main(filename: str, locations: List[Dict], bucket_name: str, body: bytes) -> dict:
+def main(
+    filename: str,
+    locations: List[Dict],
+    bucket_name: str,
+    body: bytes,
+    output_format: str = "csv",
+) -> dict:
     # Tags for S3 file
     tags = f"filename={filename}&tiff-tags={':'.join(TIFF_TAGS)}"
+    # CSV is the default, so that the tags of CSV requests are unchanged
+    if output_format != "csv":
+        tags += f"&{OUTPUT_FORMAT_TAG}={output_format}"
 
     # Generate body hash - unique if couple (input data, tags) is unique
     digest = hexdigest(bdata=json.dumps(locations).encode(), tags=tags.encode())
@@ -24,8 +39,8 @@ def main(filename: str, locations: List[Dict], bucket_name: str, body: bytes) ->
     # Upload the file - do nothing if it already exists
     csv_data = list_to_csv(locations, fieldnames=fieldnames)
 
-    # Initialize S3 client
-    s3_client = boto3.client("s3")
+    # S3 client shared by the container
+    s3_client = aws_client("s3")
 
     # TODO: upload data to an organization-specific s3 path
     # Write input CSV file
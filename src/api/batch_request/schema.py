@@ -1,3 +1,5 @@
+from typing import Literal
+
 from common.input_schema import QueryParameterSchema, RiskInputSchema
 from common.status_codes import StatusCodes
 from pydantic import BaseModel, conlist
@@ -17,6 +19,7 @@ class BatchRequestOutputSchema(BaseModel):
 
 class BatchRequestBodySchema(QueryParameterSchema):
     locations: conlist(RiskInputSchema, min_length=1, max_length=BATCH_MAX_SIZE)
+    output_format: Literal["csv", "parquet"] = "csv"
 
     @staticmethod
     def get_error_msg() -> str:
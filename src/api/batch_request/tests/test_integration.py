@@ -71,6 +71,33 @@ class TestHandler:
         ].read()
         assert body.decode() == json.dumps(locations)
 
+    @mock_aws
+    def test_handler_parquet_output(
+        self, geotiff_json_mock, lambda_powertools_ctx, mocked_bucket, setup_env
+    ):
+        locations = [{"lat": 46.07, "lon": 11.11}]
+        os.environ["S3_BUCKET_NAME"] = mocked_bucket
+        client = boto3.client("s3", region_name="us-east-1")
+
+        csv_response = handler(
+            event={"body": json.dumps({"locations": locations})},
+            context=lambda_powertools_ctx,
+        )
+        response = handler(
+            event={
+                "body": json.dumps({"locations": locations, "output_format": "parquet"})
+            },
+            context=lambda_powertools_ctx,
+        )
+
+        # The output format is part of the request, so of its digest
+        digest = json.loads(response["body"])["id"]
+        assert digest != json.loads(csv_response["body"])["id"]
+        tags = client.get_object_tagging(
+            Bucket=mocked_bucket, Key=f"{digest}/input.csv"
+        )["TagSet"]
+        assert {"Key": "output-format", "Value": "parquet"} in tags
+
     def test_handler_file_already_exists(
         self, geotiff_json_mock, lambda_powertools_ctx, mocked_bucket, setup_env
     ):
@@ -0,0 +1,162 @@
+import threading
+import time
+
+import boto3
+from botocore.config import Config
+
+# Connections kept open per client, enough for the batch geocoding threads
+AWS_MAX_POOL_CONNECTIONS = 32
+
+# Timeouts of the AWS calls, in seconds: Lambda callers fail fast and retry
+AWS_CONNECT_TIMEOUT = 2
+AWS_READ_TIMEOUT = 10
+
+# Attempts of each AWS call, with client-side rate limiting on throttling
+AWS_MAX_ATTEMPTS = 5
+
+# Configuration of every client
+AWS_CLIENT_CONFIG = Config(
+    max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+    connect_timeout=AWS_CONNECT_TIMEOUT,
+    read_timeout=AWS_READ_TIMEOUT,
+    retries={"mode": "adaptive", "max_attempts": AWS_MAX_ATTEMPTS},
+    tcp_keepalive=True,
+)
+
+
+class ClientStats:
+    def __init__(self) -> None:
+        """Counters and latencies of a client, updated by botocore events."""
+        self.hits = 0
+        self.calls = 0
+        self.errors = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self, context: dict, **kwargs) -> None:
+        context["awscommon_start"] = time.perf_counter()
+
+    def after_call(self, context: dict, http_response: object = None, **kwargs) -> None:
+        failed = http_response is None or http_response.status_code >= 300
+        self._record(context, failed)
+
+    def after_call_error(self, context: dict, **kwargs) -> None:
+        self._record(context, True)
+
+    def _record(self, context: dict, failed: bool) -> None:
+        latency = time.perf_counter() - context.pop(
+            "awscommon_start", time.perf_counter()
+        )
+        with self._lock:
+            self.calls += 1
+            self.errors += failed
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "calls": self.calls,
+                "errors": self.errors,
+                "latency_avg_ms": 1000 * self.latency_total / max(self.calls, 1),
+                "latency_max_ms": 1000 * self.latency_max,
+            }
+
+
+class ClientFactory:
+    def __init__(self, config: Config = AWS_CLIENT_CONFIG) -> None:
+        """Factory of boto3 clients, building one client per service and region.
+
+        Clients are thread-safe, so the same one is shared by the whole
+        container: connections, and their TLS sessions, are reused across
+        invocations. The number of times each client is reused and the
+        latency of its calls are recorded.
+
+        Parameters
+        ----------
+        config : Config, optional
+            Configuration of the clients, by default AWS_CLIENT_CONFIG.
+        """
+        self.config = config
+        self._clients = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def client(self, service: str, region_name: str = None) -> object:
+        """Get the client of a service and region, built on first use.
+
+        Parameters
+        ----------
+        service : str
+            Name of the service, e.g. "s3".
+        region_name : str, optional
+            Region of the client, by default the one of the environment.
+
+        Returns
+        -------
+        object
+            The boto3 client.
+        """
+        key = (service, region_name)
+        with self._lock:
+            if key not in self._clients:
+                # Building clients with the default session is not thread-safe
+                client = boto3.client(
+                    service, region_name=region_name, config=self.config
+                )
+                stats = ClientStats()
+                events = client.meta.events
+                events.register("before-call", stats.before_call)
+                events.register("after-call", stats.after_call)
+                events.register("after-call-error", stats.after_call_error)
+                self._clients[key] = client
+                self._stats[key] = stats
+            else:
+                self._stats[key].hits += 1
+            return self._clients[key]
+
+    def stats(self) -> dict:
+        """Return the counters and latencies of every client, by service and region.
+
+        Returns
+        -------
+        dict
+            For each "service:region" (region "default" if not set): hits, the
+            number of times the client was reused; calls and errors, the numbers
+            of AWS calls and failed ones; latency_avg_ms and latency_max_ms.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            f"{service}:{region_name or 'default'}": client_stats.as_dict()
+            for (service, region_name), client_stats in stats.items()
+        }
+
+    def clear(self) -> None:
+        """Forget the clients, e.g. after changing credentials."""
+        with self._lock:
+            self._clients.clear()
+            self._stats.clear()
+
+
+clients = ClientFactory()
+
+
+def aws_client(service: str, region_name: str = None) -> object:
+    """Get the client of a service and region shared by the whole container.
+
+    Parameters
+    ----------
+    service : str
+        Name of the service, e.g. "s3".
+    region_name : str, optional
+        Region of the client, by default the one of the environment.
+
+    Returns
+    -------
+    object
+        The boto3 client.
+    """
+    return clients.client(service, region_name=region_name)
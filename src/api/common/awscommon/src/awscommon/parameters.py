@@ -0,0 +1,215 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable
+
+from aws_lambda_powertools import Logger
+from botocore.exceptions import BotoCoreError, ClientError
+
+from awscommon.clients import aws_client
+
+logger = Logger()
+
+# Lifetime of the cached parameters and secrets, in seconds
+PARAMETER_CACHE_TTL = 300
+
+# Age after which cached values are refreshed in the background, in seconds
+PARAMETER_REFRESH_AFTER = 240
+
+# Parameters and secrets fetched concurrently when prefetching
+PREFETCH_MAX_WORKERS = 8
+
+# Errors of a fetch: AWS errors and invalid values, e.g. malformed JSON
+FETCH_ERRORS = (BotoCoreError, ClientError, ValueError)
+
+
+def _start_thread(function: Callable[[], None]) -> None:
+    threading.Thread(target=function, daemon=True).start()
+
+
+class ParameterProvider:
+    def __init__(
+        self,
+        region_name: str = None,
+        ttl: float = PARAMETER_CACHE_TTL,
+        refresh_after: float = PARAMETER_REFRESH_AFTER,
+        clock: Callable[[], float] = time.monotonic,
+        run_in_background: Callable[[Callable[[], None]], None] = _start_thread,
+    ) -> None:
+        """Cache of SSM parameters and Secrets Manager secrets.
+
+        Values are fetched on first access, then served from memory. Once older
+        than refresh_after, they are still served while fetched again in the
+        background; once older than ttl, they are fetched again before being
+        served. Failed background refreshes are logged, and the cached value
+        kept until the ttl.
+
+        Parameters
+        ----------
+        region_name : str, optional
+            Region of the parameters and secrets, by default the one of the
+            environment.
+        ttl : float, optional
+            Lifetime of the values in seconds, by default PARAMETER_CACHE_TTL.
+        refresh_after : float, optional
+            Age of the values refreshed in the background in seconds, by default
+            PARAMETER_REFRESH_AFTER.
+        clock : Callable[[], float], optional
+            Current time in seconds, by default time.monotonic.
+        run_in_background : Callable[[Callable[[], None]], None], optional
+            Runs a refresh, by default in a new daemon thread.
+        """
+        self.region_name = region_name
+        self.ttl = ttl
+        self.refresh_after = refresh_after
+        self.clock = clock
+        self.run_in_background = run_in_background
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get_parameter(self, name: str, transform: Callable[[str], Any] = None) -> Any:
+        """Get the value of a SSM parameter, decrypted.
+
+        Parameters
+        ----------
+        name : str
+            Name of the parameter.
+        transform : Callable[[str], Any], optional
+            Applied to the value before caching it, e.g. json.loads, by default
+            None.
+
+        Returns
+        -------
+        Any
+            The value of the parameter, transformed.
+        """
+        return self._get(("ssm", name, transform))
+
+    def get_secret(self, secret_id: str, transform: Callable[[str], Any] = None) -> Any:
+        """Get the value of a Secrets Manager secret.
+
+        Parameters
+        ----------
+        secret_id : str
+            Name or ARN of the secret.
+        transform : Callable[[str], Any], optional
+            Applied to the value before caching it, e.g. json.loads, by default
+            None.
+
+        Returns
+        -------
+        Any
+            The string value of the secret, transformed.
+        """
+        return self._get(("secretsmanager", secret_id, transform))
+
+    def prefetch(
+        self,
+        parameters: Iterable[str] = (),
+        secrets: Iterable[str] = (),
+        transform: Callable[[str], Any] = None,
+    ) -> None:
+        """Fetch parameters and secrets concurrently, e.g. during the Lambda init.
+
+        Failures are logged, and the values fetched again on first access.
+
+        Parameters
+        ----------
+        parameters : Iterable[str], optional
+            Names of the SSM parameters, by default none.
+        secrets : Iterable[str], optional
+            Names or ARNs of the secrets, by default none.
+        transform : Callable[[str], Any], optional
+            Applied to the values, as passed on access, by default None.
+        """
+        keys = [("ssm", name, transform) for name in parameters] + [
+            ("secretsmanager", secret_id, transform) for secret_id in secrets
+        ]
+        if not keys:
+            return
+        with ThreadPoolExecutor(max_workers=PREFETCH_MAX_WORKERS) as executor:
+            for key, error in zip(
+                keys, executor.map(self._try_load, keys), strict=True
+            ):
+                if error is not None:
+                    logger.warning(f"Cannot prefetch {key[0]} value {key[1]}: {error}")
+
+    def clear(self) -> None:
+        """Forget the cached values, e.g. after a rotation."""
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, key: tuple) -> Any:
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or now - entry[1] >= self.ttl:
+            return self._load(key)
+        if now - entry[1] >= self.refresh_after:
+            self._refresh(key)
+        return entry[0]
+
+    def _load(self, key: tuple) -> Any:
+        service, name, transform = key
+        fetched_at = self.clock()
+        client = aws_client(service, region_name=self.region_name)
+        if service == "ssm":
+            value = client.get_parameter(Name=name, WithDecryption=True)
+            value = value["Parameter"]["Value"]
+        else:
+            value = client.get_secret_value(SecretId=name)["SecretString"]
+        if transform is not None:
+            value = transform(value)
+
+        with self._lock:
+            self._entries[key] = (value, fetched_at)
+        return value
+
+    def _try_load(self, key: tuple) -> Exception | None:
+        try:
+            self._load(key)
+        except FETCH_ERRORS as error:
+            return error
+        return None
+
+    def _refresh(self, key: tuple) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh() -> None:
+            try:
+                error = self._try_load(key)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+            if error is not None:
+                logger.warning(f"Cannot refresh {key[0]} value {key[1]}: {error}")
+
+        self.run_in_background(refresh)
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def parameter_provider(region_name: str = None) -> ParameterProvider:
+    """Get the provider of the region shared by the whole container.
+
+    Parameters
+    ----------
+    region_name : str, optional
+        Region of the parameters and secrets, by default the one of the
+        environment.
+
+    Returns
+    -------
+    ParameterProvider
+        The same provider on every call with the same region.
+    """
+    with _providers_lock:
+        if region_name not in _providers:
+            _providers[region_name] = ParameterProvider(region_name=region_name)
+        return _providers[region_name]
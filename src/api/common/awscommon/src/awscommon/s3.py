@@ -0,0 +1,166 @@
+import codecs
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator
+
+from aws_lambda_powertools import Logger
+
+logger = Logger()
+
+# Size of the parts of multipart uploads, in bytes: S3 requires 5 MiB at least,
+# but for the last part
+S3_PART_SIZE = 8 * 1024 * 1024
+
+# Size of the chunks read from S3 objects, in bytes
+S3_READ_CHUNK_SIZE = 1024 * 1024
+
+
+def iter_text_lines(
+    stream: object, chunk_size: int = S3_READ_CHUNK_SIZE, encoding: str = "utf-8"
+) -> Iterator[str]:
+    """Decode a binary stream, e.g. the body of an S3 object, line by line.
+
+    The stream is read in chunks, so that memory does not depend on its size.
+    Lines keep their "\\n", so that they can be parsed by csv.reader, even with
+    line breaks in quoted fields.
+
+    Parameters
+    ----------
+    stream : object
+        Binary file-like object, with a read(size) method.
+    chunk_size : int, optional
+        Bytes read at once, by default S3_READ_CHUNK_SIZE.
+    encoding : str, optional
+        Encoding of the stream, by default "utf-8".
+
+    Yields
+    ------
+    str
+        The lines of the stream.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    while chunk := stream.read(chunk_size):
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+class S3MultipartWriter:
+    def __init__(
+        self, s3_client: object, bucket: str, key: str, part_size: int = S3_PART_SIZE
+    ) -> None:
+        """Writer of an S3 object, uploaded in parts while being written.
+
+        At most one part is buffered while the previous one is uploaded in the
+        background, so that memory does not depend on the size of the object.
+        Objects smaller than a part are uploaded with a single put_object.
+        Used as a context manager, the upload is completed on exit, or aborted
+        if an exception is raised. It can be written to as a file, e.g. by
+        pyarrow writers.
+
+        Parameters
+        ----------
+        s3_client : object
+            S3 client.
+        bucket : str
+            Name of the bucket.
+        key : str
+            Key of the object.
+        part_size : int, optional
+            Size of the parts in bytes, by default S3_PART_SIZE.
+        """
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.size = 0
+        self.closed = False
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+        self._pending: Future = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def write(self, data: bytes | str) -> None:
+        """Append data to the object, encoded as UTF-8 if a string."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._buffer += data
+        self.size += len(data)
+        if len(self._buffer) >= self.part_size:
+            self._flush()
+
+    def close(self) -> None:
+        """Upload the buffered data and complete the upload."""
+        try:
+            if self._upload_id is None:
+                self.s3_client.put_object(
+                    Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer)
+                )
+            else:
+                if self._buffer:
+                    self._flush()
+                self._wait()
+                self.s3_client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={"Parts": self._parts},
+                )
+        finally:
+            self._buffer = bytearray()
+            self._executor.shutdown()
+            self.closed = True
+
+    def abort(self) -> None:
+        """Discard the uploaded parts."""
+        try:
+            if self._upload_id is not None:
+                if self._pending is not None:
+                    self._pending.exception()
+                self.s3_client.abort_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+                )
+        finally:
+            self._buffer = bytearray()
+            self._executor.shutdown()
+            self.closed = True
+
+    def __enter__(self) -> "S3MultipartWriter":
+        return self
+
+    def __exit__(self, exc_type: type, exc_value: Exception, traceback: object) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            logger.error(f"Aborting upload to s3://{self.bucket}/{self.key}")
+            self.abort()
+
+    def _flush(self) -> None:
+        if self._upload_id is None:
+            self._upload_id = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key
+            )["UploadId"]
+        # Wait for the previous part, so that only one is kept in memory
+        self._wait()
+        part_number = len(self._parts) + 1
+        body, self._buffer = bytes(self._buffer), bytearray()
+        self._pending = self._executor.submit(self._upload_part, part_number, body)
+
+    def _upload_part(self, part_number: int, body: bytes) -> dict:
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    def _wait(self) -> None:
+        if self._pending is not None:
+            self._parts.append(self._pending.result())
+            self._pending = None
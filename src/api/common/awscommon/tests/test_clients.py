@@ -0,0 +1,59 @@
+import boto3
+import pytest
+from awscommon.clients import AWS_CLIENT_CONFIG, ClientFactory, aws_client
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+REGION = "eu-central-1"
+
+
+@pytest.fixture()
+def factory(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", REGION)
+    with mock_aws():
+        boto3.client("s3").create_bucket(
+            Bucket="bucket",
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        yield ClientFactory()
+
+
+class TestClientFactory:
+    def test_one_client_per_service_and_region(self, factory):
+        s3 = factory.client("s3")
+        assert factory.client("s3") is s3
+        assert factory.client("s3", region_name="eu-west-1") is not s3
+        assert factory.client("dynamodb") is not s3
+        assert factory.stats()["s3:default"]["hits"] == 1
+        assert factory.stats()["s3:eu-west-1"]["hits"] == 0
+
+    def test_config(self, factory):
+        config = factory.client("s3").meta.config
+        assert config.max_pool_connections == AWS_CLIENT_CONFIG.max_pool_connections
+        assert config.retries["mode"] == "adaptive"
+        assert config.tcp_keepalive is True
+        assert config.connect_timeout == AWS_CLIENT_CONFIG.connect_timeout
+        assert config.read_timeout == AWS_CLIENT_CONFIG.read_timeout
+
+    def test_call_metrics(self, factory):
+        s3 = factory.client("s3")
+        s3.put_object(Bucket="bucket", Key="key", Body=b"data")
+        s3.get_object(Bucket="bucket", Key="key")
+        with pytest.raises(ClientError):
+            s3.get_object(Bucket="bucket", Key="missing")
+
+        stats = factory.stats()["s3:default"]
+        assert stats["calls"] == 3
+        assert stats["errors"] == 1
+        assert 0 < stats["latency_avg_ms"] <= stats["latency_max_ms"]
+
+    def test_clear(self, factory):
+        s3 = factory.client("s3")
+        factory.clear()
+        assert factory.stats() == {}
+        assert factory.client("s3") is not s3
+
+
+def test_aws_client_is_shared(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", REGION)
+    assert aws_client("sqs", REGION) is aws_client("sqs", REGION)
@@ -0,0 +1,149 @@
+import json
+
+import boto3
+import pytest
+from awscommon.parameters import ParameterProvider, parameter_provider
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+REGION = "eu-central-1"
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Background:
+    """Runs the background refreshes on demand, counting them"""
+
+    def __init__(self) -> None:
+        self.pending = []
+
+    def __call__(self, function: object) -> None:
+        self.pending.append(function)
+
+    def run(self) -> int:
+        count = len(self.pending)
+        while self.pending:
+            self.pending.pop(0)()
+        return count
+
+
+@pytest.fixture()
+def aws(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", REGION)
+    with mock_aws():
+        ssm = boto3.client("ssm", region_name=REGION)
+        secretsmanager = boto3.client("secretsmanager", region_name=REGION)
+        ssm.put_parameter(Name="config", Value='{"a": 1}', Type="String")
+        ssm.put_parameter(Name="token", Value="s3cr3t", Type="SecureString")
+        secretsmanager.create_secret(Name="api_key", SecretString='{"key": "k1"}')
+        yield ssm, secretsmanager
+
+
+@pytest.fixture()
+def clock():
+    yield FakeClock()
+
+
+@pytest.fixture()
+def background():
+    yield Background()
+
+
+@pytest.fixture()
+def provider(aws, clock, background):
+    yield ParameterProvider(
+        region_name=REGION,
+        ttl=300,
+        refresh_after=240,
+        clock=clock,
+        run_in_background=background,
+    )
+
+
+class TestParameterProvider:
+    def test_get_parameter(self, provider):
+        assert provider.get_parameter("config") == '{"a": 1}'
+        assert provider.get_parameter("config", transform=json.loads) == {"a": 1}
+        assert provider.get_parameter("token") == "s3cr3t"
+
+    def test_get_secret(self, provider):
+        assert provider.get_secret("api_key", transform=json.loads) == {"key": "k1"}
+
+    def test_values_are_cached_and_transformed_once(self, aws, provider):
+        ssm, _ = aws
+        calls = []
+
+        def transform(value: str) -> dict:
+            calls.append(value)
+            return json.loads(value)
+
+        first = provider.get_parameter("config", transform=transform)
+        ssm.put_parameter(Name="config", Value='{"a": 2}', Overwrite=True)
+        assert provider.get_parameter("config", transform=transform) is first
+        assert len(calls) == 1
+
+    def test_refreshes_in_background_before_expiry(
+        self, aws, provider, clock, background
+    ):
+        _, secretsmanager = aws
+        provider.get_secret("api_key")
+        secretsmanager.put_secret_value(SecretId="api_key", SecretString="k2")
+
+        clock.now += 250
+        # The cached value is served while being refreshed
+        assert provider.get_secret("api_key") == '{"key": "k1"}'
+        assert provider.get_secret("api_key") == '{"key": "k1"}'
+        assert background.run() == 1
+        assert provider.get_secret("api_key") == "k2"
+
+    def test_fetches_again_after_expiry(self, aws, provider, clock, background):
+        ssm, _ = aws
+        provider.get_parameter("config")
+        ssm.put_parameter(Name="config", Value="{}", Overwrite=True)
+
+        clock.now += 300
+        assert provider.get_parameter("config") == "{}"
+        assert background.run() == 0
+
+    def test_failed_refresh_keeps_value(self, aws, provider, clock, background):
+        ssm, _ = aws
+        provider.get_parameter("config")
+        ssm.delete_parameter(Name="config")
+
+        clock.now += 250
+        provider.get_parameter("config")
+        background.run()
+        assert provider.get_parameter("config") == '{"a": 1}'
+
+        clock.now += 50
+        with pytest.raises(ClientError):
+            provider.get_parameter("config")
+
+    def test_prefetch(self, aws, provider):
+        ssm, _ = aws
+        provider.prefetch(parameters=["config", "missing"], transform=json.loads)
+        provider.prefetch(secrets=["api_key"])
+        ssm.put_parameter(Name="config", Value="{}", Overwrite=True)
+
+        assert provider.get_parameter("config", transform=json.loads) == {"a": 1}
+        assert provider.get_secret("api_key") == '{"key": "k1"}'
+        with pytest.raises(ClientError):
+            provider.get_parameter("missing", transform=json.loads)
+
+    def test_clear(self, aws, provider):
+        ssm, _ = aws
+        provider.get_parameter("config")
+        ssm.put_parameter(Name="config", Value="{}", Overwrite=True)
+        provider.clear()
+        assert provider.get_parameter("config") == "{}"
+
+
+def test_parameter_provider_is_shared_by_region():
+    assert parameter_provider(REGION) is parameter_provider(REGION)
+    assert parameter_provider(REGION) is not parameter_provider("eu-west-1")
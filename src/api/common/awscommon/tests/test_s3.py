@@ -0,0 +1,86 @@
+import io
+
+import boto3
+import pytest
+from awscommon.s3 import S3MultipartWriter, iter_text_lines
+from moto import mock_aws
+
+REGION = "eu-central-1"
+
+# Smallest part size accepted by S3
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture()
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", REGION)
+    with mock_aws():
+        client = boto3.client("s3")
+        client.create_bucket(
+            Bucket="bucket",
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        yield client
+
+
+def read(s3: object, key: str) -> bytes:
+    return s3.get_object(Bucket="bucket", Key=key)["Body"].read()
+
+
+class TestIterTextLines:
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1024])
+    def test_lines_across_chunks(self, chunk_size):
+        text = 'a|b\n"via\nroma"|città\n\nlast'
+        stream = io.BytesIO(text.encode("utf-8"))
+
+        lines = list(iter_text_lines(stream, chunk_size=chunk_size))
+
+        assert lines == ["a|b\n", '"via\n', 'roma"|città\n', "\n", "last"]
+        assert "".join(lines) == text
+
+    def test_trailing_line_break(self):
+        stream = io.BytesIO(b"a\nb\n")
+        assert list(iter_text_lines(stream, chunk_size=2)) == ["a\n", "b\n"]
+
+    def test_empty(self):
+        assert list(iter_text_lines(io.BytesIO(b""))) == []
+
+
+class TestS3MultipartWriter:
+    def test_small_object_single_put(self, s3):
+        with S3MultipartWriter(s3, "bucket", "small.csv") as writer:
+            writer.write("a,b\n")
+            writer.write(b"1,2\n")
+
+        assert read(s3, "small.csv") == b"a,b\n1,2\n"
+        assert writer.size == 8
+        assert writer.closed
+        assert s3.list_multipart_uploads(Bucket="bucket").get("Uploads") is None
+
+    def test_empty_object(self, s3):
+        with S3MultipartWriter(s3, "bucket", "empty.csv"):
+            pass
+
+        assert read(s3, "empty.csv") == b""
+
+    def test_multipart_upload(self, s3):
+        rows = [f"{i},{'x' * 100}\n" for i in range(110_000)]
+        with S3MultipartWriter(
+            s3, "bucket", "large.csv", part_size=MIN_PART_SIZE
+        ) as writer:
+            for row in rows:
+                writer.write(row)
+
+        assert read(s3, "large.csv") == "".join(rows).encode()
+        assert len(writer._parts) == 3
+
+    def test_abort_on_error(self, s3):
+        with pytest.raises(RuntimeError):
+            with S3MultipartWriter(
+                s3, "bucket", "failed.csv", part_size=MIN_PART_SIZE
+            ) as writer:
+                writer.write(b"x" * MIN_PART_SIZE)
+                raise RuntimeError
+
+        assert s3.list_multipart_uploads(Bucket="bucket").get("Uploads") is None
+        assert "Contents" not in s3.list_objects_v2(Bucket="bucket")
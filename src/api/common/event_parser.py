@@ -1,10 +1,13 @@
 import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
 
 from aws_lambda_powertools import Logger
 from pydantic import BaseModel, ValidationError
 import json
 import urllib.parse
-import boto3
+from awscommon.clients import aws_client
+from awscommon.s3 import iter_text_lines
 import csv
 from .parse_env import EnvParser
 
@@ -114,12 +117,34 @@ def get_bucket_and_key(event: dict):
     return bucket, key
 
 
+def get_file_stream(s3_client: object, bucket: str, key: str) -> object:
+    try:
+        return s3_client.get_object(Bucket=bucket, Key=key)["Body"]
+    except Exception as e:
+        logger.error(f"Error getting content from object {key} in bucket {bucket}: {e}")
+        raise e
+
+
 def parse_s3_file_upload_event(event: dict) -> BaseModel:
     # Get the object from the event
     # https://docs.aws.amazon.com/lambda/latest/dg/with-s3.html
     bucket, key = get_bucket_and_key(event)
-    s3_client = boto3.client("s3")
-    metadata = get_file_metadata(s3_client, bucket, key)
-    content = get_file_body(s3_client, bucket, key)
+    s3_client = aws_client("s3")
+
+    # Fetch the tags and the body concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        metadata = executor.submit(get_file_metadata, s3_client, bucket, key)
+        content = executor.submit(get_file_body, s3_client, bucket, key)
+        return content.result(), metadata.result()
+
+
+def stream_s3_file_upload_event(event: dict) -> tuple[Iterator[str], dict]:
+    """Like parse_s3_file_upload_event, but the content is streamed line by line."""
+    bucket, key = get_bucket_and_key(event)
+    s3_client = aws_client("s3")
 
-    return content, metadata
+    # Fetch the tags and open the body concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        metadata = executor.submit(get_file_metadata, s3_client, bucket, key)
+        stream = executor.submit(get_file_stream, s3_client, bucket, key)
+        return iter_text_lines(stream.result()), metadata.result()
@@ -0,0 +1,249 @@
+import abc
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from aws_lambda_powertools import Logger
+from awscommon.clients import aws_client
+from botocore.exceptions import BotoCoreError, ClientError
+
+from geocoder.geocoder import (
+    FailedGeocodeError,
+    Geocoder,
+    MultipleMatchesForAddressError,
+    OutOfBoundsError,
+)
+from geocoder.normalize import normalize_address
+
+logger = Logger()
+
+# Version of the cache keys, to be bumped when the normalization changes
+GEOCODE_CACHE_KEY_VERSION = "v2"
+
+# Number of geocoded addresses kept in memory
+GEOCODE_CACHE_MAX_SIZE = 10_000
+
+# Lifetime of the cached results, in seconds
+GEOCODE_CACHE_TTL = 30 * 24 * 3600
+
+# Lifetime of the cached errors, in seconds: shorter, since Maps may learn
+# about new addresses
+GEOCODE_CACHE_NEGATIVE_TTL = 24 * 3600
+
+# Errors cached like results, since retrying the same address gives the same error
+CACHED_ERRORS = {
+    error.__name__: error
+    for error in (FailedGeocodeError, MultipleMatchesForAddressError, OutOfBoundsError)
+}
+
+
+def cache_key(address: str) -> str:
+    """Get the cache key of an address, shared by all its spellings."""
+    return f"{GEOCODE_CACHE_KEY_VERSION}#{normalize_address(address)}"
+
+
+class GeocodeStore(metaclass=abc.ABCMeta):
+    """Persistent key-value store of geocoding records."""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> tuple[dict, float] | None:
+        """Get a record and its expiration POSIX timestamp, None if missing."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def put(self, key: str, record: dict, expires_at: float) -> None:
+        """Store a record until its expiration POSIX timestamp."""
+        raise NotImplementedError
+
+
+class SQLiteGeocodeStore(GeocodeStore):
+    def __init__(self, path: str) -> None:
+        """Geocoding records stored in a SQLite database, e.g. for local runs.
+
+        Parameters
+        ----------
+        path : str
+            Path of the database, created if missing.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS geocodes "
+            "(key TEXT PRIMARY KEY, record TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> tuple[dict, float] | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT record, expires_at FROM geocodes WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put(self, key: str, record: dict, expires_at: float) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?)",
+                (key, json.dumps(record), expires_at),
+            )
+
+
+class DynamoGeocodeStore(GeocodeStore):
+    def __init__(self, table_name: str, dynamodb_client: object = None) -> None:
+        """Geocoding records stored in a DynamoDB table.
+
+        The table has a 'PK' string partition key. Items expire through the
+        table's TTL on the 'expires_at' attribute; since DynamoDB deletes them
+        lazily, expiration is checked on read as well.
+
+        Parameters
+        ----------
+        table_name : str
+            Name of the table.
+        dynamodb_client : object, optional
+            DynamoDB client, by default the one shared by the container.
+        """
+        self.table_name = table_name
+        self.dynamodb_client = dynamodb_client or aws_client("dynamodb")
+
+    def get(self, key: str) -> tuple[dict, float] | None:
+        item = self.dynamodb_client.get_item(
+            TableName=self.table_name, Key={"PK": {"S": key}}
+        ).get("Item")
+        if item is None:
+            return None
+        return json.loads(item["record"]["S"]), float(item["expires_at"]["N"])
+
+    def put(self, key: str, record: dict, expires_at: float) -> None:
+        self.dynamodb_client.put_item(
+            TableName=self.table_name,
+            Item={
+                "PK": {"S": key},
+                "record": {"S": json.dumps(record)},
+                "expires_at": {"N": str(int(expires_at))},
+            },
+        )
+
+
+class CachedGeocoder(Geocoder):
+    def __init__(
+        self,
+        geocoder: Geocoder,
+        store: GeocodeStore = None,
+        max_size: int = GEOCODE_CACHE_MAX_SIZE,
+        ttl: float = GEOCODE_CACHE_TTL,
+        negative_ttl: float = GEOCODE_CACHE_NEGATIVE_TTL,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Geocoder caching the results of another one, in two tiers.
+
+        Results are looked up by normalized address in an in-memory LRU, then
+        in the persistent store. Errors raised because of the address itself
+        (FailedGeocodeError, MultipleMatchesForAddressError, OutOfBoundsError)
+        are cached too, and raised again on a hit. Any other error is not cached.
+        Failures of the store are logged and handled as misses.
+
+        Parameters
+        ----------
+        geocoder : Geocoder
+            Geocoder called on a miss.
+        store : GeocodeStore, optional
+            Persistent store, by default None: memory only.
+        max_size : int, optional
+            Number of addresses kept in memory, by default GEOCODE_CACHE_MAX_SIZE.
+        ttl : float, optional
+            Lifetime of results in seconds, by default GEOCODE_CACHE_TTL.
+        negative_ttl : float, optional
+            Lifetime of errors in seconds, by default GEOCODE_CACHE_NEGATIVE_TTL.
+        clock : Callable[[], float], optional
+            Current POSIX timestamp, by default time.time.
+        """
+        self.geocoder = geocoder
+        self.store = store
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def geocode(self, address: str) -> tuple[tuple[float, float], str]:
+        """Geocode an address through the cache, like the wrapped geocoder."""
+        key = cache_key(address)
+        record = self._get(key)
+        if record is None:
+            record = self._geocode(address)
+            ttl = self.negative_ttl if "error" in record else self.ttl
+            self._set(key, record, self.clock() + ttl)
+
+        if "error" in record:
+            raise CACHED_ERRORS[record["error"]](record["message"])
+        return tuple(record["coords"]), record["address"]
+
+    def _geocode(self, address: str) -> dict:
+        try:
+            coords, formatted_address = self.geocoder.geocode(address)
+        except tuple(CACHED_ERRORS.values()) as error:
+            return {"error": type(error).__name__, "message": str(error)}
+        return {"coords": list(coords), "address": formatted_address}
+
+    def _get(self, key: str) -> dict | None:
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+
+        entry = None
+        if self.store is not None:
+            try:
+                entry = self.store.get(key)
+            except (BotoCoreError, ClientError, sqlite3.Error) as error:
+                logger.warning(f"Cannot read geocoding cache: {error}")
+        if entry is None or entry[1] <= now:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.store_hits += 1
+        self._remember(key, *entry)
+        return entry[0]
+
+    def _set(self, key: str, record: dict, expires_at: float) -> None:
+        self._remember(key, record, expires_at)
+        if self.store is not None:
+            try:
+                self.store.put(key, record, expires_at)
+            except (BotoCoreError, ClientError, sqlite3.Error) as error:
+                logger.warning(f"Cannot write geocoding cache: {error}")
+
+    def _remember(self, key: str, record: dict, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (record, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                # If cache is full, remove the least recently used entries
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Return hit and miss counters and size of the memory tier."""
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "store_hits": self.store_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
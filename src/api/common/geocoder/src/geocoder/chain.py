@@ -0,0 +1,43 @@
+from typing import List
+
+from aws_lambda_powertools import Logger
+
+from geocoder.geocoder import (
+    FailedGeocodeError,
+    Geocoder,
+    MultipleMatchesForAddressError,
+)
+
+logger = Logger()
+
+# Errors on which the next geocoder of the chain is tried: a miss or low confidence
+FALLBACK_ERRORS = (FailedGeocodeError, MultipleMatchesForAddressError)
+
+
+class FallbackGeocoder(Geocoder):
+    def __init__(self, geocoders: List[Geocoder]) -> None:
+        """Geocoder trying a chain of geocoders in order, e.g. offline ones first.
+
+        The next geocoder is tried when one raises FailedGeocodeError or
+        MultipleMatchesForAddressError; the errors of the last one are raised.
+        Any other error is raised right away.
+
+        Parameters
+        ----------
+        geocoders : List[Geocoder]
+            Geocoders to be tried, in order.
+        """
+        if not geocoders:
+            raise ValueError("At least one geocoder is needed")
+        self.geocoders = geocoders
+
+    def geocode(self, address: str) -> tuple[tuple[float, float], str]:
+        """Geocode an address with the first geocoder resolving it."""
+        for geocoder in self.geocoders[:-1]:
+            try:
+                return geocoder.geocode(address)
+            except FALLBACK_ERRORS as error:
+                logger.debug(
+                    f"{type(geocoder).__name__} did not resolve address: {error!r}"
+                )
+        return self.geocoders[-1].geocode(address)
@@ -0,0 +1,62 @@
+from typing import Dict
+
+from geocoder.cache import CachedGeocoder, DynamoGeocodeStore, SQLiteGeocodeStore
+from geocoder.chain import FallbackGeocoder
+from geocoder.gazetteer import GazetteerGeocoder
+from geocoder.geocoder import Geocoder
+from geocoder.gmaps_geocoder import GMapsGeocoder
+from geocoder.ratelimit import RateLimitedGeocoder, TokenBucket
+
+# Env var with the DynamoDB table of the geocoding cache, set in prod
+GEOCODE_CACHE_TABLE = "GEOCODE_CACHE_TABLE"
+
+# Env var with the path of a SQLite geocoding cache, e.g. for local runs
+GEOCODE_CACHE_PATH = "GEOCODE_CACHE_PATH"
+
+# Env var with the path of the offline gazetteer, tried before Google Maps
+GAZETTEER_PATH = "GAZETTEER_PATH"
+
+
+def geocoder_from_env(
+    environ: Dict[str, str],
+    retry_over_query_limit: bool = True,
+    limiter: TokenBucket = None,
+) -> Geocoder:
+    """Get the Google Maps geocoder, cached in the store set in the environment.
+
+    Parameters
+    ----------
+    environ : Dict[str, str]
+        Environment variables, e.g. os.environ.
+    retry_over_query_limit : bool, optional
+        Whether Google Maps calls are retried when the quota is exceeded, by
+        default True. Otherwise, OverQueryLimitError is raised.
+    limiter : TokenBucket, optional
+        Limiter of the Google Maps calls, by default None: not limited. Cache
+        hits and gazetteer matches take no tokens.
+
+    Returns
+    -------
+    Geocoder
+        A GMapsGeocoder behind an in-memory cache, backed by the DynamoDB table
+        GEOCODE_CACHE_TABLE if set, else by the SQLite database
+        GEOCODE_CACHE_PATH if set, with its API key prefetched. If
+        GAZETTEER_PATH is set, the offline gazetteer is tried first, and the
+        cached Google Maps geocoder only on a miss or ambiguous match.
+    """
+    store = None
+    if environ.get(GEOCODE_CACHE_TABLE):
+        store = DynamoGeocodeStore(environ[GEOCODE_CACHE_TABLE])
+    elif environ.get(GEOCODE_CACHE_PATH):
+        store = SQLiteGeocodeStore(environ[GEOCODE_CACHE_PATH])
+    gmaps_geocoder = GMapsGeocoder(retry_over_query_limit=retry_over_query_limit)
+    gmaps_geocoder.prefetch_api_key()
+    geocoder = gmaps_geocoder
+    if limiter is not None:
+        geocoder = RateLimitedGeocoder(gmaps_geocoder, limiter)
+    geocoder = CachedGeocoder(geocoder, store=store)
+    if environ.get(GAZETTEER_PATH):
+        geocoder = FallbackGeocoder(
+            [GazetteerGeocoder(environ[GAZETTEER_PATH]), geocoder]
+        )
+    return geocoder
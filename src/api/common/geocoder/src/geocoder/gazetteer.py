@@ -0,0 +1,314 @@
+"""Offline geocoding of Italian addresses, from a gazetteer built from open data.
+
+The gazetteer is a read-only SQLite database, memory-mapped when opened:
+- places: municipalities and streets, with their centroid
+- places_fts: FTS5 index of the normalized names of the places
+- house_numbers: ranges of house numbers along the streets, interpolated
+
+It is built from CSV files, e.g. exported from ISTAT, ANNCSU or OpenStreetMap:
+- municipalities: istat_code, name, province, lon, lat
+- streets: street_id, istat_code, name, postal_code, lon, lat
+- house numbers: street_id, first, last, parity (odd, even or all),
+  start_lon, start_lat, end_lon, end_lat
+
+Usage, at image build time:
+
+    python -m geocoder.gazetteer --output /opt/gazetteer.sqlite \\
+        --municipalities municipalities.csv --streets streets.csv \\
+        --house-numbers house_numbers.csv
+"""
+
+import argparse
+import csv
+import os
+import re
+import sqlite3
+import threading
+from typing import List
+
+from aws_lambda_powertools import Tracer
+
+from geocoder.geocoder import (
+    FailedGeocodeError,
+    Geocoder,
+    MultipleMatchesForAddressError,
+)
+from geocoder.normalize import normalize_address
+
+tracer = Tracer()
+
+# Memory-mapped size of the gazetteer, in bytes
+GAZETTEER_MMAP_SIZE = 512 * 1024 * 1024
+
+# Places matching an address considered at most
+GAZETTEER_MAX_CANDIDATES = 50
+
+# Tokens of the addresses not looked up: country names
+IGNORED_TOKENS = {"italia", "italy"}
+
+# Postal codes, not looked up since many streets have none
+_POSTAL_CODE = re.compile(r"^\d{5}$")
+
+# Leading digits of a house number, e.g. "3" of "3/a"
+_HOUSE_NUMBER = re.compile(r"^(\d+)")
+
+_SCHEMA = """
+CREATE TABLE places (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    search_name TEXT NOT NULL,
+    municipality TEXT NOT NULL,
+    province TEXT NOT NULL,
+    postal_code TEXT,
+    lon REAL NOT NULL,
+    lat REAL NOT NULL
+);
+CREATE VIRTUAL TABLE places_fts USING fts5(
+    document, content='', tokenize='unicode61 remove_diacritics 0'
+);
+CREATE TABLE house_numbers (
+    place_id INTEGER NOT NULL,
+    first INTEGER NOT NULL,
+    last INTEGER NOT NULL,
+    parity TEXT NOT NULL,
+    start_lon REAL NOT NULL,
+    start_lat REAL NOT NULL,
+    end_lon REAL NOT NULL,
+    end_lat REAL NOT NULL
+);
+CREATE INDEX house_numbers_place ON house_numbers (place_id, first);
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    """Split a text in the words indexed by the gazetteer, once normalized."""
+    return re.findall(r"\w+", normalize_address(text))
+
+
+class GazetteerGeocoder(Geocoder):
+    def __init__(self, path: str) -> None:
+        """Geocoder looking up addresses in a local gazetteer.
+
+        An address is resolved only when confident: every word of the address
+        is in the name of the place, its municipality or province, and the
+        whole name of the place is in the address. Otherwise, an error is
+        raised so that a fallback geocoder is tried.
+
+        Parameters
+        ----------
+        path : str
+            Path of the gazetteer, built with this module.
+        """
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, sharing the OS page cache through mmap
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                f"file:{self.path}?mode=ro&immutable=1", uri=True
+            )
+            connection.execute(f"PRAGMA mmap_size = {GAZETTEER_MMAP_SIZE}")
+            self._local.connection = connection
+        return connection
+
+    @tracer.capture_method
+    def geocode(self, address: str) -> tuple[tuple[float, float], str]:
+        """Look up an address in the gazetteer.
+
+        Parameters
+        ----------
+        address : str
+            The address to be looked up.
+
+        Returns
+        -------
+        tuple[tuple[float, float], str]
+            Couple of coordinates (lon, lat) and formatted address.
+
+        Raises
+        ------
+        FailedGeocodeError
+            Raised when no place matches the address, or the house number is
+            not in the gazetteer.
+        MultipleMatchesForAddressError
+            Raised when many places match the address.
+        """
+        words = [
+            word
+            for word in normalize_address(address).split()
+            if word not in IGNORED_TOKENS and not _POSTAL_CODE.match(word)
+        ]
+        # The last number of the address is the house number, e.g. "3/a"
+        numbers = [i for i, word in enumerate(words) if _HOUSE_NUMBER.match(word)]
+        number = None
+        if numbers:
+            number = int(_HOUSE_NUMBER.match(words[numbers[-1]]).group(1))
+            del words[numbers[-1]]
+        tokens = re.findall(r"\w+", " ".join(words))
+        if not tokens:
+            raise FailedGeocodeError("Unable to resolve address " + address)
+
+        connection = self._connection()
+        rows = connection.execute(
+            "SELECT places.id, kind, name, search_name, municipality, province, "
+            "postal_code, lon, lat FROM places_fts "
+            "JOIN places ON places.id = places_fts.rowid "
+            "WHERE places_fts MATCH ? LIMIT ?",
+            (" ".join(f'"{token}"' for token in tokens), GAZETTEER_MAX_CANDIDATES),
+        ).fetchall()
+        # The whole name of the place must be in the address
+        query = set(tokens)
+        candidates = [row for row in rows if set(row[3].split()) <= query]
+        streets = [row for row in candidates if row[1] == "street"]
+        if streets:
+            candidates = streets
+        elif number is not None:
+            # A house number without a known street
+            candidates = []
+
+        if not candidates:
+            raise FailedGeocodeError("Unable to resolve address " + address)
+        if len(candidates) > 1:
+            raise MultipleMatchesForAddressError
+        place_id, kind, name, _, municipality, province, postal_code = candidates[0][:7]
+        lon, lat = candidates[0][7:]
+
+        if kind == "street" and number is not None:
+            lon, lat = self._house_number(connection, place_id, number, address)
+        locality = " ".join(
+            part for part in (postal_code, municipality, province) if part
+        )
+        if kind == "municipality":
+            parts = [locality]
+        elif number is None:
+            parts = [name, locality]
+        else:
+            parts = [name, str(number), locality]
+        return (lon, lat), ", ".join(parts)
+
+    def _house_number(
+        self, connection: sqlite3.Connection, place_id: int, number: int, address: str
+    ) -> tuple[float, float]:
+        ranges = connection.execute(
+            "SELECT first, last, parity, start_lon, start_lat, end_lon, end_lat "
+            "FROM house_numbers WHERE place_id = ? AND first <= ? AND last >= ?",
+            (place_id, number, number),
+        ).fetchall()
+        for first, last, parity, start_lon, start_lat, end_lon, end_lat in ranges:
+            if parity != "all" and (number % 2 == 1) != (parity == "odd"):
+                continue
+            t = (number - first) / (last - first) if last > first else 0.0
+            return (
+                start_lon + t * (end_lon - start_lon),
+                start_lat + t * (end_lat - start_lat),
+            )
+        # Only the street is known: let a more precise geocoder try
+        raise FailedGeocodeError("Unable to resolve house number of " + address)
+
+
+def build(
+    path: str, municipalities: str, streets: str, house_numbers: str = None
+) -> None:
+    """Build a gazetteer from CSV files, described in the module docstring.
+
+    Parameters
+    ----------
+    path : str
+        Path of the gazetteer to write, replaced if it exists.
+    municipalities : str
+        CSV file of the municipalities.
+    streets : str
+        CSV file of the streets.
+    house_numbers : str, optional
+        CSV file of the ranges of house numbers, by default None.
+    """
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = sqlite3.connect(tmp_path)
+    connection.executescript(_SCHEMA)
+
+    def insert(kind: str, name: str, municipality: dict, row: dict) -> int:
+        search_name = " ".join(tokenize(name))
+        document = " ".join(
+            [search_name, *tokenize(municipality["name"]), municipality["province"]]
+        ).casefold()
+        cursor = connection.execute(
+            "INSERT INTO places (kind, name, search_name, municipality, province, "
+            "postal_code, lon, lat) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                kind,
+                name,
+                search_name,
+                municipality["name"],
+                municipality["province"],
+                row.get("postal_code") or None,
+                float(row["lon"]),
+                float(row["lat"]),
+            ),
+        )
+        connection.execute(
+            "INSERT INTO places_fts (rowid, document) VALUES (?, ?)",
+            (cursor.lastrowid, document),
+        )
+        return cursor.lastrowid
+
+    with connection:
+        by_code = {}
+        with open(municipalities, newline="") as f:
+            for row in csv.DictReader(f):
+                by_code[row["istat_code"]] = row
+                insert("municipality", row["name"], row, row)
+
+        place_ids = {}
+        with open(streets, newline="") as f:
+            for row in csv.DictReader(f):
+                place_ids[row["street_id"]] = insert(
+                    "street", row["name"], by_code[row["istat_code"]], row
+                )
+
+        if house_numbers:
+            with open(house_numbers, newline="") as f:
+                connection.executemany(
+                    "INSERT INTO house_numbers VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        (
+                            place_ids[row["street_id"]],
+                            int(row["first"]),
+                            int(row["last"]),
+                            row["parity"],
+                            float(row["start_lon"]),
+                            float(row["start_lat"]),
+                            float(row["end_lon"]),
+                            float(row["end_lat"]),
+                        )
+                        for row in csv.DictReader(f)
+                    ),
+                )
+        connection.execute("INSERT INTO places_fts (places_fts) VALUES ('optimize')")
+
+    connection.execute("VACUUM")
+    connection.close()
+    os.replace(tmp_path, path)
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Build the gazetteer of geocoder.gazetteer from CSV files"
+    )
+    parser.add_argument("--output", required=True, help="Path of the gazetteer")
+    parser.add_argument(
+        "--municipalities", required=True, help="CSV file of the municipalities"
+    )
+    parser.add_argument("--streets", required=True, help="CSV file of the streets")
+    parser.add_argument("--house-numbers", help="CSV file of the house number ranges")
+    args = parser.parse_args(argv)
+
+    build(args.output, args.municipalities, args.streets, args.house_numbers)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,10 @@ class MultipleMatchesForAddressError(Exception):
     pass
 
 
+class OverQueryLimitError(Exception):
+    pass
+
+
 class Geocoder(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def __init__(self) -> None:
@@ -1,54 +1,64 @@
 import json
 import os
 
-import boto3
 import googlemaps
 from aws_lambda_powertools import Tracer
-from botocore.exceptions import ClientError
+from awscommon.parameters import parameter_provider
 
 from geocoder.geocoder import (
     FailedGeocodeError,
     Geocoder,
     MultipleMatchesForAddressError,
     OutOfBoundsError,
+    OverQueryLimitError,
 )
 
 tracer = Tracer()
 
 
 class GMapsGeocoder(Geocoder):
-    def __init__(self) -> None:
+    def __init__(self, retry_over_query_limit: bool = True) -> None:
+        """Geocoder calling Google Maps.
+
+        Parameters
+        ----------
+        retry_over_query_limit : bool, optional
+            Whether the client retries when the quota is exceeded, by default
+            True. Otherwise, OverQueryLimitError is raised, so that callers
+            sending many addresses can slow down.
+        """
         self.gmaps_client = None
+        self.api_key = None
+        self.retry_over_query_limit = retry_over_query_limit
 
-    def _setup_client(self):
+    def _setup_client(self, api_key: str) -> None:
         self.gmaps_client = googlemaps.Client(
-            key=self._get_api_secret_key_from_aws()["gmaps_api_key"]
+            key=api_key,
+            retry_over_query_limit=self.retry_over_query_limit,
         )
+        self.api_key = api_key
 
-    def _get_api_secret_key_from_aws(self):
-        # If you need more information about configurations
-        # or implementing the sample code, visit the AWS docs:
-        # https://aws.amazon.com/developer/language/python/
-
+    def _get_api_secret_key_from_aws(self) -> dict:
+        # The secret is cached by the provider shared by the container, and
+        # refreshed in the background, so rotations are picked up
         secret_name = os.environ.get("GMAPS_SECRET_NAME")
         region_name = os.environ.get("GMAPS_SECRET_REGION", "eu-central-1")
+        return parameter_provider(region_name).get_secret(
+            secret_name, transform=json.loads
+        )
 
-        # Create a Secrets Manager client
-        session = boto3.session.Session()
-        client = session.client(service_name="secretsmanager", region_name=region_name)
-
-        try:
-            get_secret_value_response = client.get_secret_value(SecretId=secret_name)
-        except ClientError as e:
-            # For a list of exceptions thrown, see
-            # https://docs.aws.amazon.com/secretsmanager/latest/apireference/API_GetSecretValue.html
-            raise e
-
-        # Decrypts secret using the associated KMS key.
-        secret = get_secret_value_response["SecretString"]
+    def prefetch_api_key(self) -> None:
+        """Fetch the API key ahead of the first geocoding, e.g. during Lambda init.
 
-        # Your code goes here.
-        return json.loads(secret)
+        Nothing is done if GMAPS_SECRET_NAME is not set, and failures are only
+        logged: the key is fetched again on first use.
+        """
+        secret_name = os.environ.get("GMAPS_SECRET_NAME")
+        region_name = os.environ.get("GMAPS_SECRET_REGION", "eu-central-1")
+        if secret_name:
+            parameter_provider(region_name).prefetch(
+                secrets=[secret_name], transform=json.loads
+            )
 
     def _valid_location(self, geocode_result: str) -> bool:
         valid_countries = ["Italy"]
@@ -84,13 +94,21 @@ class GMapsGeocoder(Geocoder):
         OutOfBoundsError
             Raised when the looked up address is out of bounds.
             As of today, any location outside of Italy is OOB.
+        OverQueryLimitError
+            Raised when the Google Maps quota is exceeded, if not retried.
         """
 
-        # Lazy init
-        if not self.gmaps_client:
-            self._setup_client()
+        # Lazy init, and again when the key is rotated
+        api_key = self._get_api_secret_key_from_aws()["gmaps_api_key"]
+        if api_key != self.api_key:
+            self._setup_client(api_key)
 
-        geocode_result = self.gmaps_client.geocode(address)
+        try:
+            geocode_result = self.gmaps_client.geocode(address)
+        except googlemaps.exceptions.ApiError as error:
+            if error.status == "OVER_QUERY_LIMIT":
+                raise OverQueryLimitError(error.message) from error
+            raise
         result_size = len(geocode_result)
 
         if result_size == 0:
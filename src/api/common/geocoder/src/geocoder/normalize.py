@@ -0,0 +1,77 @@
+import re
+import unicodedata
+
+# Common abbreviations of Italian street types, by their full name
+STREET_ABBREVIATIONS = {
+    "via": ["v."],
+    "viale": ["v.le", "vle"],
+    "vicolo": ["v.lo", "v.co", "vlo"],
+    "piazza": ["p.za", "p.zza", "pza", "pzza"],
+    "piazzale": ["p.le", "ple"],
+    "corso": ["c.so", "cso"],
+    "largo": ["l.go", "lgo"],
+    "strada": ["str.", "str"],
+    "località": ["loc.", "loc", "localita'", "localita"],
+    "frazione": ["fraz.", "fraz"],
+    "contrada": ["c.da", "cda"],
+    "lungomare": ["l.mare", "lgmare"],
+    "borgo": ["b.go", "bgo"],
+}
+
+# Full name of every abbreviation
+_FULL_NAMES = {
+    abbreviation: name
+    for name, abbreviations in STREET_ABBREVIATIONS.items()
+    for abbreviation in abbreviations
+}
+
+# House number markers followed by the number, e.g. "n. 5", "nr 5", "n°5"
+_HOUSE_NUMBER_MARKER = re.compile(r"\b(?:n|nr|num|no)\s*[.°]?\s*(?=\d)")
+
+# Separators between tokens: whitespace and punctuation other than apostrophes,
+# dots of abbreviations and slashes or dashes of house numbers
+_SEPARATORS = re.compile(r"[\s,;:()\"]+")
+
+# Tokens made of punctuation only, e.g. dashes between street and city, are dropped
+_WORD = re.compile(r"\w")
+
+# Typographic apostrophes and accents typed as apostrophes
+_APOSTROPHES = str.maketrans({"’": "'", "‘": "'", "`": "'", "´": "'"})
+
+
+def normalize_address(address: str) -> str:
+    """Normalize an address, so that spellings of the same address match.
+
+    This does the following:
+    - Normalize the Unicode form (NFKC) and casefold
+    - Make all apostrophes straight
+    - Drop house number markers, e.g. "n. 5" -> "5"
+    - Split on whitespace and punctuation, dropping leading and trailing dots
+      and tokens without any letter or digit
+    - Expand abbreviations of street types, e.g. "p.zza" -> "piazza", except
+      in last position where they are more likely names, e.g. "via pio v."
+
+    Parameters
+    ----------
+    address : str
+        Address as typed by the user.
+
+    Returns
+    -------
+    str
+        Normalized tokens joined by a single space.
+    """
+    address = unicodedata.normalize("NFKC", address).casefold()
+    address = address.translate(_APOSTROPHES)
+    address = _HOUSE_NUMBER_MARKER.sub(" ", address)
+
+    tokens = [token for token in _SEPARATORS.split(address) if _WORD.search(token)]
+    return " ".join(
+        token.strip(".") if i == len(tokens) - 1 else _expand(token)
+        for i, token in enumerate(tokens)
+    )
+
+
+def _expand(token: str) -> str:
+    token = _FULL_NAMES.get(token, token).strip(".")
+    return _FULL_NAMES.get(token, token)
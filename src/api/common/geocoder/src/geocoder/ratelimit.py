@@ -0,0 +1,202 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from geocoder.geocoder import (
+    FailedGeocodeError,
+    Geocoder,
+    MultipleMatchesForAddressError,
+    OutOfBoundsError,
+    OverQueryLimitError,
+)
+from geocoder.normalize import normalize_address
+
+# Google Maps Geocoding API quota, in queries per second
+GEOCODE_QPS = 50
+
+# Lowest rate the limiter slows down to, in queries per second
+GEOCODE_MIN_QPS = 1
+
+# Number of addresses geocoded concurrently
+GEOCODE_MAX_WORKERS = 16
+
+# Retries of an address over the quota, and backoff before the first retry, in seconds
+GEOCODE_MAX_RETRIES = 5
+GEOCODE_BACKOFF = 0.5
+
+# Errors caused by the address itself, returned in place of its result
+ADDRESS_ERRORS = (FailedGeocodeError, MultipleMatchesForAddressError, OutOfBoundsError)
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate: float = GEOCODE_QPS,
+        min_rate: float = GEOCODE_MIN_QPS,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Thread-safe token bucket limiting the rate of calls, adaptively.
+
+        The bucket holds up to one second of tokens, so bursts never exceed
+        the rate. The rate is halved when the quota is exceeded, and grows
+        back by a twentieth of the maximum rate on every success (AIMD).
+
+        Parameters
+        ----------
+        rate : float, optional
+            Maximum rate in calls per second, by default GEOCODE_QPS.
+        min_rate : float, optional
+            Lowest rate after slowing down, by default GEOCODE_MIN_QPS.
+        clock : Callable[[], float], optional
+            Monotonic clock in seconds, by default time.monotonic.
+        sleep : Callable[[float], None], optional
+            Sleep function, by default time.sleep.
+        """
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = 1.0
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take a token, waiting for it if the bucket is empty.
+
+        The token is reserved right away, so that waiting callers are served
+        in order without polling.
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(
+                max(self.rate, 1.0),
+                self._tokens + (now - self._updated) * self.rate,
+            )
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate
+        if wait > 0:
+            self.sleep(wait)
+
+    def slow_down(self) -> None:
+        """Halve the rate, after the quota has been exceeded."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def speed_up(self) -> None:
+        """Increase the rate towards its maximum, after a success."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def set_rate(self, rate: float) -> None:
+        """Change the maximum rate, e.g. to a share of the quota, and start from it."""
+        with self._lock:
+            self.max_rate = rate
+            self.min_rate = min(self.min_rate, rate)
+            self.rate = rate
+
+
+class RateLimitedGeocoder(Geocoder):
+    def __init__(self, geocoder: Geocoder, limiter: TokenBucket = None) -> None:
+        """Geocoder calling another one within the rate of a limiter.
+
+        To be placed right around the geocoder calling Google Maps, under the
+        caches and offline geocoders, so that only the calls to Maps take
+        tokens. The limiter slows down when the quota is exceeded, and speeds
+        up on every success.
+
+        Parameters
+        ----------
+        geocoder : Geocoder
+            Geocoder calling Google Maps.
+        limiter : TokenBucket, optional
+            Limiter of the calls, by default a new one at GEOCODE_QPS.
+        """
+        self.geocoder = geocoder
+        self.limiter = limiter or TokenBucket()
+
+    def geocode(self, address: str) -> tuple[tuple[float, float], str]:
+        """Geocode an address, waiting for a token first."""
+        self.limiter.acquire()
+        try:
+            result = self.geocoder.geocode(address)
+        except OverQueryLimitError:
+            self.limiter.slow_down()
+            raise
+        self.limiter.speed_up()
+        return result
+
+
+def geocode_many(
+    geocoder: Geocoder,
+    addresses: List[str],
+    max_workers: int = GEOCODE_MAX_WORKERS,
+    max_retries: int = GEOCODE_MAX_RETRIES,
+    backoff: float = GEOCODE_BACKOFF,
+    sleep: Callable[[float], None] = time.sleep,
+) -> List[tuple | Exception]:
+    """Geocode many addresses concurrently.
+
+    Addresses sharing the same normalized form are geocoded once, with the
+    spelling of their first occurrence, and the result is fanned back to all of
+    them. Addresses over the quota are retried after an exponential, jittered
+    backoff. The calls to Google Maps are limited by a RateLimitedGeocoder
+    wrapped by the geocoder, see geocoder_from_env.
+
+    Parameters
+    ----------
+    geocoder : Geocoder
+        Geocoder of the addresses, called from many threads.
+    addresses : List[str]
+        Addresses to be geocoded.
+    max_workers : int, optional
+        Number of concurrent calls, by default GEOCODE_MAX_WORKERS.
+    max_retries : int, optional
+        Retries of an address over the quota, by default GEOCODE_MAX_RETRIES.
+    backoff : float, optional
+        Backoff before the first retry in seconds, by default GEOCODE_BACKOFF.
+    sleep : Callable[[float], None], optional
+        Sleep function, by default time.sleep.
+
+    Returns
+    -------
+    List[tuple | Exception]
+        For each address, in order, the result of Geocoder.geocode or the error
+        raised for it: any of ADDRESS_ERRORS, FailedGeocodeError for missing
+        addresses, or OverQueryLimitError once the retries are exhausted.
+        Any other error is raised.
+    """
+
+    def geocode(address: str) -> tuple | Exception:
+        if not address:
+            return FailedGeocodeError("Missing address")
+        for retry in range(max_retries + 1):
+            try:
+                return geocoder.geocode(address)
+            except ADDRESS_ERRORS as error:
+                return error
+            except OverQueryLimitError as error:
+                if retry == max_retries:
+                    return error
+                sleep(backoff * 2**retry * (0.5 + random.random()))
+
+    # Index of the distinct address of every address
+    distinct = {}
+    indexes = [
+        distinct.setdefault(normalize_address(address or ""), (len(distinct), address))[
+            0
+        ]
+        for address in addresses
+    ]
+    if not distinct:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(distinct))) as executor:
+        results = list(
+            executor.map(geocode, [address for _, address in distinct.values()])
+        )
+    return [results[index] for index in indexes]
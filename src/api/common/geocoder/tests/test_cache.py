@@ -0,0 +1,184 @@
+import boto3
+import pytest
+from botocore.exceptions import ReadTimeoutError
+from geocoder.cache import (
+    CachedGeocoder,
+    DynamoGeocodeStore,
+    SQLiteGeocodeStore,
+    cache_key,
+)
+from geocoder.geocoder import (
+    FailedGeocodeError,
+    Geocoder,
+    MultipleMatchesForAddressError,
+    OutOfBoundsError,
+)
+from moto import mock_aws
+
+DAY = 24 * 3600
+
+
+class FakeGeocoder(Geocoder):
+    """Geocoder resolving a fixed set of addresses, counting its calls"""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.results = {
+            "via verruca 1 trento": ((11.1, 46.1), "Via Verruca, 1, 38122 Trento TN"),
+        }
+        self.errors = {
+            "via aurelia": MultipleMatchesForAddressError,
+            "calle sta nicerata 1 lima": OutOfBoundsError,
+        }
+
+    def geocode(self, address: str) -> tuple[tuple[float, float], str]:
+        self.calls += 1
+        if address in self.errors:
+            raise self.errors[address]
+        if address not in self.results:
+            raise FailedGeocodeError("Unable to resolve address " + address)
+        return self.results[address]
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def sqlite_store(tmp_path):
+    yield SQLiteGeocodeStore(str(tmp_path / "geocodes.sqlite"))
+
+
+@pytest.fixture()
+def dynamo_store(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "eu-central-1")
+    with mock_aws():
+        client = boto3.client("dynamodb")
+        client.create_table(
+            TableName="geocodes",
+            KeySchema=[{"AttributeName": "PK", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "PK", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        yield DynamoGeocodeStore("geocodes", dynamodb_client=client)
+
+
+class TestCachedGeocoder:
+    def test_spellings_share_an_entry(self):
+        fake = FakeGeocoder()
+        geocoder = CachedGeocoder(fake)
+
+        for address in ["via verruca 1 trento", "  Via  Verruca 1\tTRENTO "]:
+            coords, formatted_address = geocoder.geocode(address)
+
+        assert fake.calls == 1
+        assert coords == (11.1, 46.1)
+        assert formatted_address == "Via Verruca, 1, 38122 Trento TN"
+        assert cache_key("Via  VERRUCA 1 trento") == "v2#via verruca 1 trento"
+
+    @pytest.mark.parametrize(
+        "address, error",
+        [
+            ("unknown address", FailedGeocodeError),
+            ("via aurelia", MultipleMatchesForAddressError),
+            ("calle sta nicerata 1 lima", OutOfBoundsError),
+        ],
+    )
+    def test_errors_are_cached(self, address, error):
+        fake = FakeGeocoder()
+        geocoder = CachedGeocoder(fake)
+
+        for _ in range(2):
+            with pytest.raises(error):
+                geocoder.geocode(address)
+
+        assert fake.calls == 1
+
+    def test_ttl(self):
+        fake, clock = FakeGeocoder(), FakeClock()
+        geocoder = CachedGeocoder(fake, ttl=30 * DAY, negative_ttl=DAY, clock=clock)
+        geocoder.geocode("via verruca 1 trento")
+        with pytest.raises(FailedGeocodeError):
+            geocoder.geocode("unknown address")
+
+        clock.now += 2 * DAY
+        geocoder.geocode("via verruca 1 trento")
+        with pytest.raises(FailedGeocodeError):
+            geocoder.geocode("unknown address")
+
+        # Only the error expired
+        assert fake.calls == 3
+
+    def test_lru_eviction(self):
+        fake = FakeGeocoder()
+        geocoder = CachedGeocoder(fake, max_size=1)
+
+        for address in ["via verruca 1 trento", "via aurelia", "via verruca 1 trento"]:
+            try:
+                geocoder.geocode(address)
+            except MultipleMatchesForAddressError:
+                pass
+
+        assert fake.calls == 3
+        assert geocoder.stats()["entries"] == 1
+
+    @pytest.mark.parametrize("store", ["sqlite_store", "dynamo_store"])
+    def test_store_is_shared_across_containers(self, store, request):
+        store = request.getfixturevalue(store)
+        fake = FakeGeocoder()
+
+        CachedGeocoder(fake, store=store).geocode("via verruca 1 trento")
+        with pytest.raises(OutOfBoundsError):
+            CachedGeocoder(fake, store=store).geocode("calle sta nicerata 1 lima")
+
+        # A new container only has the persistent store
+        geocoder = CachedGeocoder(fake, store=store)
+        assert geocoder.geocode("VIA VERRUCA 1 TRENTO") == (
+            (11.1, 46.1),
+            "Via Verruca, 1, 38122 Trento TN",
+        )
+        with pytest.raises(OutOfBoundsError):
+            geocoder.geocode("calle sta nicerata 1 lima")
+        assert fake.calls == 2
+        assert geocoder.stats()["store_hits"] == 2
+
+    def test_expired_store_records_are_misses(self, sqlite_store):
+        fake, clock = FakeGeocoder(), FakeClock()
+        CachedGeocoder(fake, store=sqlite_store, clock=clock).geocode(
+            "via verruca 1 trento"
+        )
+
+        clock.now += 31 * DAY
+        CachedGeocoder(fake, store=sqlite_store, clock=clock).geocode(
+            "via verruca 1 trento"
+        )
+
+        assert fake.calls == 2
+
+    def test_store_failures_are_misses(self, monkeypatch):
+        monkeypatch.setenv("AWS_DEFAULT_REGION", "eu-central-1")
+        fake = FakeGeocoder()
+        # The table does not exist
+        with mock_aws():
+            geocoder = CachedGeocoder(fake, store=DynamoGeocodeStore("missing"))
+
+            assert geocoder.geocode("via verruca 1 trento")[0] == (11.1, 46.1)
+
+    def test_store_timeouts_are_misses(self):
+        class TimingOutStore:
+            def get(self, key):
+                raise ReadTimeoutError(endpoint_url="https://dynamodb")
+
+            def put(self, key, record, expires_at):
+                raise ReadTimeoutError(endpoint_url="https://dynamodb")
+
+        fake = FakeGeocoder()
+        geocoder = CachedGeocoder(fake, store=TimingOutStore())
+
+        assert geocoder.geocode("via verruca 1 trento")[0] == (11.1, 46.1)
+        assert geocoder.geocode("via verruca 1 trento")[0] == (11.1, 46.1)
+        assert fake.calls == 1
@@ -0,0 +1,144 @@
+import pytest
+from geocoder.chain import FallbackGeocoder
+from geocoder.gazetteer import GazetteerGeocoder, build, main
+from geocoder.geocoder import (
+    FailedGeocodeError,
+    Geocoder,
+    MultipleMatchesForAddressError,
+    OverQueryLimitError,
+)
+
+MUNICIPALITIES = """istat_code,name,province,lon,lat
+022205,Trento,TN,11.12,46.07
+058007,Anzio,RM,12.63,41.45
+058091,Roma,RM,12.48,41.89
+"""
+
+STREETS = """street_id,istat_code,name,postal_code,lon,lat
+1,022205,Via Verruca,38122,11.11,46.08
+2,058007,Via Roma,00042,12.62,41.46
+3,058007,Via Roma Vecchia,00042,12.64,41.47
+4,058091,Piazza Gabriele D'Annunzio,00100,12.50,41.90
+5,058091,Via Verruca,00100,12.51,41.91
+"""
+
+HOUSE_NUMBERS = """street_id,first,last,parity,start_lon,start_lat,end_lon,end_lat
+1,1,21,odd,11.10,46.00,11.20,46.10
+1,2,22,even,12.10,47.00,12.20,47.10
+"""
+
+
+@pytest.fixture(scope="module")
+def gazetteer(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("gazetteer")
+    for name, content in (
+        ("municipalities.csv", MUNICIPALITIES),
+        ("streets.csv", STREETS),
+        ("house_numbers.csv", HOUSE_NUMBERS),
+    ):
+        (tmp_path / name).write_text(content)
+    path = str(tmp_path / "gazetteer.sqlite")
+    main(
+        [
+            "--output",
+            path,
+            "--municipalities",
+            str(tmp_path / "municipalities.csv"),
+            "--streets",
+            str(tmp_path / "streets.csv"),
+            "--house-numbers",
+            str(tmp_path / "house_numbers.csv"),
+        ]
+    )
+    yield GazetteerGeocoder(path)
+
+
+class FakeGeocoder(Geocoder):
+    """Geocoder resolving every address, counting its calls"""
+
+    def __init__(self, error: type = None) -> None:
+        self.calls = 0
+        self.error = error
+
+    def geocode(self, address: str) -> tuple[tuple[float, float], str]:
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return (0.0, 0.0), address
+
+
+class TestGazetteerGeocoder:
+    def test_interpolates_house_number(self, gazetteer):
+        coords, address = gazetteer.geocode("Via Verruca, 11, 38122 Trento TN, Italia")
+        assert coords == pytest.approx((11.15, 46.05))
+        assert address == "Via Verruca, 11, 38122 Trento TN"
+
+    def test_uses_side_of_house_number(self, gazetteer):
+        coords, _ = gazetteer.geocode("v. verruca n. 2 trento")
+        assert coords == pytest.approx((12.10, 47.00))
+
+    def test_street_without_house_number(self, gazetteer):
+        coords, address = gazetteer.geocode("via roma, anzio")
+        assert coords == (12.62, 41.46)
+        assert address == "Via Roma, 00042 Anzio RM"
+
+    def test_municipality(self, gazetteer):
+        assert gazetteer.geocode("Roma") == ((12.48, 41.89), "Roma RM")
+
+    def test_apostrophes_and_abbreviations(self, gazetteer):
+        _, address = gazetteer.geocode("P.zza Gabriele D’Annunzio, Roma")
+        assert address == "Piazza Gabriele D'Annunzio, 00100 Roma RM"
+
+    def test_unknown_house_number_is_a_miss(self, gazetteer):
+        with pytest.raises(FailedGeocodeError):
+            gazetteer.geocode("via verruca 99 trento")
+        with pytest.raises(FailedGeocodeError):
+            gazetteer.geocode("via roma 5 anzio")
+
+    def test_ambiguous_address(self, gazetteer):
+        with pytest.raises(MultipleMatchesForAddressError):
+            gazetteer.geocode("via verruca")
+
+    @pytest.mark.parametrize(
+        "address", ["via garibaldi 3 trento", "roma 5", "viale verruca trento", ""]
+    )
+    def test_unknown_address(self, gazetteer, address):
+        with pytest.raises(FailedGeocodeError):
+            gazetteer.geocode(address)
+
+    def test_rebuild_replaces_gazetteer(self, tmp_path):
+        (tmp_path / "municipalities.csv").write_text(MUNICIPALITIES)
+        (tmp_path / "streets.csv").write_text(STREETS)
+        path = str(tmp_path / "gazetteer.sqlite")
+        (tmp_path / "gazetteer.sqlite").write_text("stale")
+        build(path, str(tmp_path / "municipalities.csv"), str(tmp_path / "streets.csv"))
+
+        coords, _ = GazetteerGeocoder(path).geocode("via verruca, trento")
+        assert coords == (11.11, 46.08)
+
+
+class TestFallbackGeocoder:
+    def test_gazetteer_first(self, gazetteer):
+        fallback = FakeGeocoder()
+        geocoder = FallbackGeocoder([gazetteer, fallback])
+        assert geocoder.geocode("roma")[1] == "Roma RM"
+        assert fallback.calls == 0
+
+    @pytest.mark.parametrize("address", ["via verruca", "via garibaldi 3 trento"])
+    def test_falls_back_on_miss_or_ambiguity(self, gazetteer, address):
+        fallback = FakeGeocoder()
+        geocoder = FallbackGeocoder([gazetteer, fallback])
+        assert geocoder.geocode(address) == ((0.0, 0.0), address)
+        assert fallback.calls == 1
+
+    def test_raises_errors_of_last_geocoder(self, gazetteer):
+        geocoder = FallbackGeocoder([gazetteer, FakeGeocoder(FailedGeocodeError)])
+        with pytest.raises(FailedGeocodeError):
+            geocoder.geocode("via verruca")
+
+    def test_does_not_fall_back_on_other_errors(self):
+        fallback = FakeGeocoder()
+        geocoder = FallbackGeocoder([FakeGeocoder(OverQueryLimitError), fallback])
+        with pytest.raises(OverQueryLimitError):
+            geocoder.geocode("via verruca")
+        assert fallback.calls == 0
@@ -0,0 +1,33 @@
+import pytest
+from geocoder.normalize import normalize_address
+
+
+class TestNormalizeAddress:
+    @pytest.mark.parametrize(
+        "address, want",
+        [
+            ("  Via  Verruca 1\tTRENTO ", "via verruca 1 trento"),
+            ("P.zza  Duomo, 1 - Milano", "piazza duomo 1 milano"),
+            ("V. Roma n. 5, Anzio", "via roma 5 anzio"),
+            ("VIA ROMA N°5 ANZIO", "via roma 5 anzio"),
+            ("C.so Vittorio Emanuele II, 12", "corso vittorio emanuele ii 12"),
+            ("v.le Europa 3/A", "viale europa 3/a"),
+            ("Loc. Ca’ di Sotto", "località ca' di sotto"),
+            ("Ｖｉａ Ｒｏｍａ 1", "via roma 1"),
+            ("Straße 1", "strasse 1"),
+        ],
+    )
+    def test_normalize(self, address, want):
+        assert normalize_address(address) == want
+
+    def test_abbreviation_in_last_position_is_kept(self):
+        assert normalize_address("Via Pio V.") == "via pio v"
+
+    def test_spellings_match(self):
+        spellings = [
+            "Piazza del Duomo 1, Milano",
+            "p.zza del duomo, n. 1 milano",
+            "PZA DEL DUOMO 1 MILANO",
+        ]
+
+        assert len({normalize_address(address) for address in spellings}) == 1
@@ -0,0 +1,205 @@
+import threading
+import time
+
+import pytest
+from geocoder.cache import CachedGeocoder
+from geocoder.geocoder import (
+    FailedGeocodeError,
+    Geocoder,
+    MultipleMatchesForAddressError,
+    OutOfBoundsError,
+    OverQueryLimitError,
+)
+from geocoder.ratelimit import RateLimitedGeocoder, TokenBucket, geocode_many
+
+
+class FakeClock:
+    """Clock advanced by the sleeps"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeGeocoder(Geocoder):
+    """Geocoder with a configurable latency, over the quota for its first calls"""
+
+    def __init__(self, latency: float = 0.0, over_query_limit: int = 0) -> None:
+        self.latency = latency
+        self.over_query_limit = over_query_limit
+        self.calls = 0
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self._lock = threading.Lock()
+
+    def geocode(self, address: str) -> tuple[tuple[float, float], str]:
+        with self._lock:
+            self.calls += 1
+            self.concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self.concurrent)
+            over_query_limit = self.calls <= self.over_query_limit
+        time.sleep(self.latency)
+        with self._lock:
+            self.concurrent -= 1
+
+        if over_query_limit:
+            raise OverQueryLimitError
+        if address.startswith("failed"):
+            raise FailedGeocodeError(address)
+        if address.startswith("multiple"):
+            raise MultipleMatchesForAddressError
+        if address.startswith("oob"):
+            raise OutOfBoundsError
+        index = float(address.split()[-1])
+        return (index, -index), address.upper()
+
+
+class TestTokenBucket:
+    def test_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, clock=clock, sleep=clock.sleep)
+
+        for _ in range(21):
+            bucket.acquire()
+
+        # The first token is available right away
+        assert clock.now == pytest.approx(2.0)
+
+    def test_slow_down_and_speed_up(self):
+        bucket = TokenBucket(rate=40, min_rate=4)
+
+        for _ in range(5):
+            bucket.slow_down()
+        assert bucket.rate == 4
+
+        bucket.speed_up()
+        assert bucket.rate == 6
+        for _ in range(30):
+            bucket.speed_up()
+        assert bucket.rate == 40
+
+    def test_set_rate(self):
+        bucket = TokenBucket(rate=40, min_rate=4)
+        bucket.slow_down()
+
+        bucket.set_rate(2)
+
+        assert bucket.rate == bucket.max_rate == bucket.min_rate == 2
+
+
+class CountingBucket(TokenBucket):
+    """Bucket counting the tokens taken"""
+
+    def __init__(self) -> None:
+        super().__init__(rate=1000)
+        self.acquired = 0
+
+    def acquire(self) -> None:
+        self.acquired += 1
+        super().acquire()
+
+
+class TestRateLimitedGeocoder:
+    def test_cache_hits_take_no_tokens(self):
+        fake = FakeGeocoder()
+        limiter = CountingBucket()
+        geocoder = CachedGeocoder(RateLimitedGeocoder(fake, limiter))
+        addresses = [f"address {i}" for i in range(5)]
+
+        first = geocode_many(geocoder, addresses)
+        second = geocode_many(geocoder, addresses)
+
+        assert first == second
+        assert fake.calls == limiter.acquired == 5
+
+    def test_over_query_limit_slows_down(self):
+        limiter = TokenBucket(rate=40)
+        geocoder = RateLimitedGeocoder(FakeGeocoder(over_query_limit=1), limiter)
+
+        with pytest.raises(OverQueryLimitError):
+            geocoder.geocode("address 1")
+        assert limiter.rate == 20
+        assert geocoder.geocode("address 1") == ((1.0, -1.0), "ADDRESS 1")
+        assert limiter.rate == 22
+
+
+class TestGeocodeMany:
+    def test_order_and_errors(self):
+        addresses = ["address 1", "failed 2", "multiple 3", "oob 4", "address 5"]
+
+        got = geocode_many(FakeGeocoder(latency=0.01), addresses)
+
+        assert got[0] == ((1.0, -1.0), "ADDRESS 1")
+        assert isinstance(got[1], FailedGeocodeError)
+        assert isinstance(got[2], MultipleMatchesForAddressError)
+        assert isinstance(got[3], OutOfBoundsError)
+        assert got[4] == ((5.0, -5.0), "ADDRESS 5")
+
+    def test_concurrent_calls(self):
+        fake = FakeGeocoder(latency=0.05)
+        addresses = [f"address {i}" for i in range(40)]
+
+        start = time.perf_counter()
+        got = geocode_many(fake, addresses, max_workers=8)
+        elapsed = time.perf_counter() - start
+
+        assert [result[0][0] for result in got] == list(range(40))
+        assert fake.max_concurrent == 8
+        # 5 rounds of 8 calls, instead of 40 serial calls
+        assert elapsed < 40 * 0.05 / 2
+
+    def test_over_query_limit_is_retried(self):
+        fake = FakeGeocoder(over_query_limit=2)
+        limiter = TokenBucket(rate=100)
+        sleeps = []
+
+        got = geocode_many(
+            RateLimitedGeocoder(fake, limiter),
+            ["address 1"],
+            backoff=0.5,
+            sleep=sleeps.append,
+        )
+
+        assert got == [((1.0, -1.0), "ADDRESS 1")]
+        assert fake.calls == 3
+        assert len(sleeps) == 2
+        assert 0.25 <= sleeps[0] <= 0.75 and 0.5 <= sleeps[1] <= 1.5
+        # Halved twice, then sped up once
+        assert limiter.rate == 25 + 5
+
+    def test_over_query_limit_retries_are_bounded(self):
+        fake = FakeGeocoder(over_query_limit=10)
+
+        got = geocode_many(
+            fake, ["address 1"], max_retries=3, sleep=lambda seconds: None
+        )
+
+        assert isinstance(got[0], OverQueryLimitError)
+        assert fake.calls == 4
+
+    def test_other_errors_are_raised(self):
+        class BrokenGeocoder(FakeGeocoder):
+            def geocode(self, address: str) -> tuple[tuple[float, float], str]:
+                raise ConnectionError
+
+        with pytest.raises(ConnectionError):
+            geocode_many(BrokenGeocoder(), ["address 1"])
+
+    def test_spellings_are_geocoded_once(self):
+        fake = FakeGeocoder()
+        addresses = ["Via Roma 1", "failed 2", "via  roma 1", "V. ROMA 1", None]
+
+        got = geocode_many(fake, addresses)
+
+        assert fake.calls == 2
+        # Geocoded with the spelling of the first occurrence
+        assert got[0] == got[2] == got[3] == ((1.0, -1.0), "VIA ROMA 1")
+        assert isinstance(got[1], FailedGeocodeError)
+        assert isinstance(got[4], FailedGeocodeError)
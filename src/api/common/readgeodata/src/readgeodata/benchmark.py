@@ -0,0 +1,464 @@
+"""Micro-benchmarks of the readers on synthetic national-scale rasters.
+
+A synthetic COG covering the extent of Italy is generated locally: 9 float32
+bands, tiled, DEFLATE-compressed, with nodata outside of a land-like ellipse.
+The readers then sample it with batches of 1 to 1M points, uniformly spread or
+clustered around a few cities, for several band counts and reader backends.
+
+Results are written as JSON, one record per case, so that runs on two commits
+can be compared with --baseline.
+
+Usage:
+
+    python -m readgeodata.benchmark --workdir /tmp/bench --output results.json
+    python -m readgeodata.benchmark --workdir /tmp/bench --baseline results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+from functools import partial
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import rasterio
+import rasterio.shutil
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+
+from readgeodata.flat import convert, flat_path
+from readgeodata.interfaces import GeoDataReader
+from readgeodata.mmapreader import MmapReader
+from readgeodata.pool import DatasetPool
+from readgeodata.rasterioreader import RasterIOReader
+from readgeodata.transform import transform_coordinates
+
+# Extent of Italy in EPSG:3035 (left, bottom, right, top)
+ITALY_BOUNDS_3035 = (4_000_000, 1_400_000, 5_100_000, 2_700_000)
+
+# Number of bands of the synthetic raster, like the risk rasters
+BENCHMARK_BANDS = 9
+
+# Pixel size of the synthetic raster, in meters
+BENCHMARK_RESOLUTION = 100
+
+# Block size of the synthetic COG, in pixels
+BENCHMARK_BLOCK_SIZE = 512
+
+BENCHMARK_BATCH_SIZES = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+BENCHMARK_BAND_COUNTS = (1, 3, 9)
+BENCHMARK_DISTRIBUTIONS = ("uniform", "clustered")
+BENCHMARK_BACKENDS = ("rasterio", "mmap")
+
+# Points sampled per case at most, bounding the repeats of large batches
+BENCHMARK_MAX_POINTS = 2_000_000
+
+# Clustered points are drawn around this many centers, with this spread in meters
+CLUSTER_COUNT = 20
+CLUSTER_SIGMA = 5_000
+
+
+def make_raster(
+    path: str,
+    resolution: float = BENCHMARK_RESOLUTION,
+    bounds: Tuple[float, float, float, float] = ITALY_BOUNDS_3035,
+    bands: int = BENCHMARK_BANDS,
+    block_size: int = BENCHMARK_BLOCK_SIZE,
+    seed: int = 0,
+) -> str:
+    """Generate a synthetic multi-band COG in EPSG:3035.
+
+    Bands hold a smooth field plus noise, so that they compress like real
+    rasters. Pixels outside of an ellipse inscribed in the bounds are nodata.
+    The raster is written strip by strip, so memory stays bounded.
+
+    Parameters
+    ----------
+    path : str
+        Path of the COG to write.
+    resolution : float, optional
+        Pixel size in meters, by default BENCHMARK_RESOLUTION.
+    bounds : Tuple[float, float, float, float], optional
+        Extent of the raster, by default ITALY_BOUNDS_3035.
+    bands : int, optional
+        Number of bands, by default BENCHMARK_BANDS.
+    block_size : int, optional
+        Block size of the COG, by default BENCHMARK_BLOCK_SIZE.
+    seed : int, optional
+        Seed of the noise, by default 0.
+
+    Returns
+    -------
+    str
+        Path of the COG.
+    """
+    left, bottom, right, top = bounds
+    width = int(np.ceil((right - left) / resolution))
+    height = int(np.ceil((top - bottom) / resolution))
+    profile = {
+        "driver": "GTiff",
+        "dtype": "float32",
+        "nodata": -2.0,
+        "width": width,
+        "height": height,
+        "count": bands,
+        "crs": "EPSG:3035",
+        "transform": from_origin(left, top, resolution, resolution),
+        "tiled": True,
+        "blockxsize": block_size,
+        "blockysize": block_size,
+    }
+    rng = np.random.default_rng(seed)
+    tmp_path = f"{path}.tmp.tif"
+
+    with rasterio.open(tmp_path, "w", **profile) as ds:
+        for band in range(1, bands + 1):
+            ds.set_band_description(band, f"band{band}")
+        ds.update_tags(Average_Residential_AAL=0.0021)
+
+        for row_start in range(0, height, block_size):
+            rows = min(block_size, height - row_start)
+            ys, xs = np.mgrid[row_start : row_start + rows, 0:width]
+            # Normalized coordinates within the inscribed ellipse
+            u, v = 2 * xs / width - 1, 2 * ys / height - 1
+            outside = u**2 + v**2 > 1
+            for band in range(1, bands + 1):
+                data = (
+                    band * 1000
+                    + 100 * np.sin(xs / (50 + band)) * np.cos(ys / (70 + band))
+                    + rng.random((rows, width))
+                ).astype("float32")
+                data[outside] = profile["nodata"]
+                ds.write(data, band, window=Window(0, row_start, width, rows))
+
+    rasterio.shutil.copy(
+        tmp_path,
+        path,
+        driver="COG",
+        compress="DEFLATE",
+        predictor=3,
+        blocksize=block_size,
+        overviews="NONE",
+    )
+    os.remove(tmp_path)
+    return path
+
+
+def random_points(
+    n: int,
+    distribution: str,
+    bounds: Tuple[float, float, float, float] = ITALY_BOUNDS_3035,
+    seed: int = 0,
+) -> np.ndarray:
+    """Draw random (lon, lat) points within bounds in EPSG:3035.
+
+    Parameters
+    ----------
+    n : int
+        Number of points.
+    distribution : str
+        "uniform" over the bounds, or "clustered" around CLUSTER_COUNT centers.
+    bounds : Tuple[float, float, float, float], optional
+        Extent of the points, by default ITALY_BOUNDS_3035.
+    seed : int, optional
+        Seed of the points, by default 0.
+
+    Returns
+    -------
+    np.ndarray
+        Array shaped N x 2 of (lon, lat) points in EPSG:4326.
+    """
+    left, bottom, right, top = bounds
+    rng = np.random.default_rng(seed)
+    if distribution == "uniform":
+        xs = rng.uniform(left, right, n)
+        ys = rng.uniform(bottom, top, n)
+    elif distribution == "clustered":
+        centers_x = rng.uniform(left, right, CLUSTER_COUNT)
+        centers_y = rng.uniform(bottom, top, CLUSTER_COUNT)
+        cluster = rng.integers(0, CLUSTER_COUNT, n)
+        xs = np.clip(rng.normal(centers_x[cluster], CLUSTER_SIGMA), left, right)
+        ys = np.clip(rng.normal(centers_y[cluster], CLUSTER_SIGMA), bottom, top)
+    else:
+        raise ValueError(
+            f"Unknown distribution '{distribution}', "
+            f"expected one of {BENCHMARK_DISTRIBUTIONS}"
+        )
+
+    lons, lats = transform_coordinates(xs, ys, 3035, 4326)
+    return np.column_stack([lons, lats])
+
+
+def make_reader(backend: str, filename: str, root: str) -> GeoDataReader:
+    """Create a reader with its own caches, converting the file if needed.
+
+    Parameters
+    ----------
+    backend : str
+        "rasterio" or "mmap".
+    filename : str
+        Path of the file to be sampled.
+    root : str
+        Directory storing the flat rasters of the "mmap" backend.
+
+    Returns
+    -------
+    GeoDataReader
+        The reader.
+    """
+    if backend == "rasterio":
+        return RasterIOReader(pool=DatasetPool())
+    if backend == "mmap":
+        directory = flat_path(filename, root)
+        if not os.path.isdir(directory):
+            os.makedirs(os.path.dirname(directory), exist_ok=True)
+            convert(filename, directory)
+        return MmapReader(root=root)
+    raise ValueError(
+        f"Unknown backend '{backend}', expected one of {BENCHMARK_BACKENDS}"
+    )
+
+
+def measure(call: Callable[[], object], n: int, repeats: int) -> Dict[str, float]:
+    """Time a call, once cold and 'repeats' times warm.
+
+    Parameters
+    ----------
+    call : Callable[[], object]
+        Sampling call.
+    n : int
+        Number of points sampled per call.
+    repeats : int
+        Number of warm calls.
+
+    Returns
+    -------
+    Dict[str, float]
+        Latencies in seconds and throughput of the median warm call in points/s.
+    """
+    start = time.perf_counter()
+    call()
+    first = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+
+    median = float(np.median(latencies))
+    return {
+        "repeats": repeats,
+        "first_s": first,
+        "min_s": float(np.min(latencies)),
+        "median_s": median,
+        "p95_s": float(np.percentile(latencies, 95)),
+        "points_per_s": n / median if median > 0 else float("inf"),
+    }
+
+
+def run(
+    filename: str,
+    root: str,
+    batch_sizes: Sequence[int] = BENCHMARK_BATCH_SIZES,
+    band_counts: Sequence[int] = BENCHMARK_BAND_COUNTS,
+    distributions: Sequence[str] = BENCHMARK_DISTRIBUTIONS,
+    backends: Sequence[str] = BENCHMARK_BACKENDS,
+    repeats: int = 5,
+    seed: int = 0,
+) -> List[dict]:
+    """Benchmark sample_data_points on every combination of the parameters.
+
+    Each backend gets a fresh reader, so the first call of the first case
+    includes opening the file. Large batches are repeated less, so that no case
+    samples more than BENCHMARK_MAX_POINTS points.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the raster to be sampled, e.g. made with make_raster.
+    root : str
+        Directory storing the flat rasters of the "mmap" backend.
+    batch_sizes : Sequence[int], optional
+        Numbers of points per call, by default BENCHMARK_BATCH_SIZES.
+    band_counts : Sequence[int], optional
+        Numbers of bands read, by default BENCHMARK_BAND_COUNTS.
+    distributions : Sequence[str], optional
+        Spatial distributions of the points, by default BENCHMARK_DISTRIBUTIONS.
+    backends : Sequence[str], optional
+        Readers, by default BENCHMARK_BACKENDS.
+    repeats : int, optional
+        Number of warm calls per case, by default 5.
+    seed : int, optional
+        Seed of the points, by default 0.
+
+    Returns
+    -------
+    List[dict]
+        One record per case, with its parameters and measures.
+    """
+    points = {
+        (distribution, n): random_points(n, distribution, seed=seed).tolist()
+        for distribution in distributions
+        for n in batch_sizes
+    }
+
+    results = []
+    for backend in backends:
+        reader = make_reader(backend, filename, root)
+        for distribution in distributions:
+            for n in batch_sizes:
+                for band_count in band_counts:
+                    call = partial(
+                        reader.sample_data_points,
+                        filename=filename,
+                        coordinates=points[(distribution, n)],
+                        bands=[f"band{band}" for band in range(1, band_count + 1)],
+                    )
+                    case = {
+                        "backend": backend,
+                        "distribution": distribution,
+                        "batch_size": n,
+                        "bands": band_count,
+                    }
+                    repeats_n = max(1, min(repeats, BENCHMARK_MAX_POINTS // n))
+                    case.update(measure(call, n, repeats_n))
+                    print(json.dumps(case), file=sys.stderr)
+                    results.append(case)
+    return results
+
+
+def environment() -> dict:
+    """Describe the machine and library versions the benchmark ran with."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "rasterio": rasterio.__version__,
+        "gdal": rasterio.__gdal_version__,
+    }
+
+
+def compare(baseline: List[dict], results: List[dict]) -> List[dict]:
+    """Compare the median latencies of the cases run in both benchmarks.
+
+    Parameters
+    ----------
+    baseline : List[dict]
+        Results of the reference run.
+    results : List[dict]
+        Results of the new run.
+
+    Returns
+    -------
+    List[dict]
+        Parameters of each common case with the median latencies and their
+        ratio, new / baseline: above 1 is a regression.
+    """
+    params = ("backend", "distribution", "batch_size", "bands")
+    reference = {tuple(case[p] for p in params): case for case in baseline}
+
+    comparison = []
+    for case in results:
+        key = tuple(case[p] for p in params)
+        if key not in reference:
+            continue
+        before, after = reference[key]["median_s"], case["median_s"]
+        comparison.append(
+            {
+                **dict(zip(params, key, strict=True)),
+                "baseline_median_s": before,
+                "median_s": after,
+                "ratio": after / before if before > 0 else float("inf"),
+            }
+        )
+    return comparison
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark readgeodata readers on synthetic rasters"
+    )
+    parser.add_argument(
+        "--workdir", required=True, help="Directory of the generated rasters"
+    )
+    parser.add_argument("--output", help="JSON file of the results, else stdout")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--resolution", type=float, default=BENCHMARK_RESOLUTION)
+    parser.add_argument("--block-size", type=int, default=BENCHMARK_BLOCK_SIZE)
+    parser.add_argument(
+        "--batch-sizes", type=int, nargs="+", default=BENCHMARK_BATCH_SIZES
+    )
+    parser.add_argument(
+        "--band-counts", type=int, nargs="+", default=BENCHMARK_BAND_COUNTS
+    )
+    parser.add_argument(
+        "--distributions",
+        nargs="+",
+        choices=BENCHMARK_DISTRIBUTIONS,
+        default=BENCHMARK_DISTRIBUTIONS,
+    )
+    parser.add_argument(
+        "--backends", nargs="+", choices=BENCHMARK_BACKENDS, default=BENCHMARK_BACKENDS
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--regenerate",
+        action="store_true",
+        help="Generate the raster again, even if it exists",
+    )
+    args = parser.parse_args(argv)
+
+    filename = os.path.join(
+        args.workdir, f"italy_{args.resolution:g}m_{args.block_size}.tif"
+    )
+    root = os.path.join(args.workdir, "flat")
+    if args.regenerate or not os.path.exists(filename):
+        os.makedirs(args.workdir, exist_ok=True)
+        shutil.rmtree(flat_path(filename, root), ignore_errors=True)
+        print(f"Generating {filename}", file=sys.stderr)
+        make_raster(filename, resolution=args.resolution, block_size=args.block_size)
+
+    with rasterio.open(filename) as ds:
+        raster = {
+            "width": ds.width,
+            "height": ds.height,
+            "bands": ds.count,
+            "resolution": args.resolution,
+            "block_size": args.block_size,
+            "size_bytes": os.path.getsize(filename),
+        }
+    output = {
+        "environment": environment(),
+        "raster": raster,
+        "results": run(
+            filename,
+            root,
+            batch_sizes=args.batch_sizes,
+            band_counts=args.band_counts,
+            distributions=args.distributions,
+            backends=args.backends,
+            repeats=args.repeats,
+            seed=args.seed,
+        ),
+    }
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            output["comparison"] = compare(json.load(f)["results"], output["results"])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
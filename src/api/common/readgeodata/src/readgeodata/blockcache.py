@@ -0,0 +1,252 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Sequence
+
+import numpy as np
+from rasterio.io import DatasetReader
+from rasterio.windows import Window
+
+# Lambda ephemeral storage (/tmp) is 512 MB by default
+BLOCK_CACHE_DIR = os.path.join(tempfile.gettempdir(), "readgeodata-blocks")
+BLOCK_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+class DiskBlockCache:
+    def __init__(
+        self, directory: str = BLOCK_CACHE_DIR, max_bytes: int = BLOCK_CACHE_MAX_BYTES
+    ):
+        """Read-through cache of raster blocks, persisted on the local disk.
+
+        Every block fetched from a (remote) file is stored as a .npy file,
+        so that following reads of the same region never go back to the
+        remote storage while the container is alive. Blocks are evicted in
+        LRU order once the cache exceeds 'max_bytes'.
+
+        Blocks found in 'directory' at init, e.g. written by a previous
+        process of the same container, are reused.
+
+        Parameters
+        ----------
+        directory : str, optional
+            Directory storing the blocks, by default BLOCK_CACHE_DIR.
+        max_bytes : int, optional
+            Size budget of the cache on disk, by default BLOCK_CACHE_MAX_BYTES.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        # Restore the entries on disk, oldest first
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npy"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, entry.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._entries[name] = size
+            self.size += size
+        self._evict()
+
+    def _evict(self) -> None:
+        # Must be called holding the lock (or during init)
+        while self.size > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _name(key: Hashable) -> str:
+        return hashlib.sha1(repr(key).encode()).hexdigest() + ".npy"
+
+    def get_or_read(self, key: Hashable, read: Callable[[], np.ndarray]) -> np.ndarray:
+        """Get the block associated with key, calling read() on a miss.
+
+        Parameters
+        ----------
+        key : Hashable
+            Key identifying the block. Its repr() must be stable across
+            processes, e.g. a tuple of strings and numbers.
+        read : Callable[[], np.ndarray]
+            Function reading the block from the source file.
+
+        Returns
+        -------
+        np.ndarray
+            The block.
+        """
+        name = self._name(key)
+        path = os.path.join(self.directory, name)
+
+        with self._lock:
+            cached = name in self._entries
+            if cached:
+                self._entries.move_to_end(name)
+
+        if cached:
+            try:
+                data = np.load(path)
+            except (OSError, ValueError):
+                # Evicted by another thread, or partially written by a dead process
+                pass
+            else:
+                with self._lock:
+                    self.hits += 1
+                return data
+
+        with self._lock:
+            self.misses += 1
+
+        data = read()
+        self._store(name, path, data)
+        return data
+
+    def _store(self, name: str, path: str, data: np.ndarray) -> None:
+        # Write to a temporary file first, so that readers never see partial blocks
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, data)
+            os.replace(tmp_path, path)
+        except OSError:
+            # A full disk must not fail the read
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        size = os.path.getsize(path)
+        with self._lock:
+            self.size += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            self._evict()
+
+    def stats(self) -> dict:
+        """Return hit, miss and eviction counters and size of the cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": self.size,
+                "blocks": len(self._entries),
+            }
+
+
+def read_block(
+    ds: DatasetReader,
+    index: int,
+    block_row: int,
+    block_col: int,
+    cache: DiskBlockCache,
+    version: Hashable = None,
+) -> np.ndarray:
+    """Read a whole block of a band through the cache.
+
+    Parameters
+    ----------
+    ds : DatasetReader
+        Open dataset.
+    index : int
+        1-based index of the band.
+    block_row : int
+        Row of the block in the band's block grid.
+    block_col : int
+        Col of the block in the band's block grid.
+    cache : DiskBlockCache
+        Cache storing the block.
+    version : Hashable, optional
+        Version of the file (e.g. its ETag), by default None.
+
+    Returns
+    -------
+    np.ndarray
+        2D array with the block's data. Blocks on the right and bottom
+        edges of the raster can be smaller than the nominal block shape.
+    """
+    index, block_row, block_col = int(index), int(block_row), int(block_col)
+    key = (ds.name, version, index, block_row, block_col)
+    return cache.get_or_read(
+        key,
+        lambda: ds.read(index, window=ds.block_window(index, block_row, block_col)),
+    )
+
+
+def read_window(
+    ds: DatasetReader,
+    indexes: Sequence[int],
+    window: Window,
+    cache: DiskBlockCache,
+    version: Hashable = None,
+) -> np.ndarray:
+    """Read a (possibly boundless) window, assembling it from cached blocks.
+
+    Parameters
+    ----------
+    ds : DatasetReader
+        Open dataset.
+    indexes : Sequence[int]
+        1-based indexes of the bands to read.
+    window : Window
+        Window to read, with integer offsets and lengths. The parts outside
+        of the raster are filled with the nodata value (0 if not set).
+    cache : DiskBlockCache
+        Cache storing the blocks.
+    version : Hashable, optional
+        Version of the file (e.g. its ETag), by default None.
+
+    Returns
+    -------
+    np.ndarray
+        Array shaped (bands, rows, cols).
+    """
+    row_off, col_off = int(window.row_off), int(window.col_off)
+    height, width = int(window.height), int(window.width)
+    output = np.full(
+        (len(indexes), height, width), ds.nodata or 0, dtype=ds.dtypes[indexes[0] - 1]
+    )
+
+    # Part of the window inside the raster
+    row_start, row_stop = max(row_off, 0), min(row_off + height, ds.height)
+    col_start, col_stop = max(col_off, 0), min(col_off + width, ds.width)
+    if row_start >= row_stop or col_start >= col_stop:
+        return output
+
+    for band, index in enumerate(indexes):
+        block_height, block_width = ds.block_shapes[index - 1]
+        for block_row in range(
+            row_start // block_height, (row_stop - 1) // block_height + 1
+        ):
+            for block_col in range(
+                col_start // block_width, (col_stop - 1) // block_width + 1
+            ):
+                block = read_block(ds, index, block_row, block_col, cache, version)
+
+                # Overlap between the block and the window, in raster coordinates
+                top, left = block_row * block_height, block_col * block_width
+                r0, r1 = max(row_start, top), min(row_stop, top + block.shape[0])
+                c0, c1 = max(col_start, left), min(col_stop, left + block.shape[1])
+
+                output[
+                    band, r0 - row_off : r1 - row_off, c0 - col_off : c1 - col_off
+                ] = block[r0 - top : r1 - top, c0 - left : c1 - left]
+
+    return output
+
+
+# Shared by every reader of the container, used for remote files
+block_cache = DiskBlockCache(directory=BLOCK_CACHE_DIR, max_bytes=BLOCK_CACHE_MAX_BYTES)
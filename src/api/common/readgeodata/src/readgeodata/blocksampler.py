@@ -0,0 +1,157 @@
+from typing import Hashable, Iterable, Sequence, Tuple
+
+import numpy as np
+from affine import Affine
+from rasterio.io import DatasetReader
+from rasterio.windows import Window
+
+from readgeodata.blockcache import DiskBlockCache, read_block
+
+
+def pixel_indexes(
+    transform: Affine, xs: np.ndarray, ys: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Get rows and cols of the pixels containing (x, y), vectorized.
+
+    Parameters
+    ----------
+    transform : Affine
+        Affine transform of the raster.
+    xs : np.ndarray
+        X coordinates in the raster's CRS.
+    ys : np.ndarray
+        Y coordinates in the raster's CRS.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Integer rows and cols, possibly outside of the raster.
+    """
+    fcols, frows = ~transform * (np.asarray(xs), np.asarray(ys))
+    return np.floor(frows).astype(np.int64), np.floor(fcols).astype(np.int64)
+
+
+def unique_pixels(
+    transform: Affine, xs: np.ndarray, ys: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Find the distinct pixels containing (x, y), vectorized.
+
+    Parameters
+    ----------
+    transform : Affine
+        Affine transform of the raster.
+    xs : np.ndarray
+        X coordinates in the raster's CRS.
+    ys : np.ndarray
+        Y coordinates in the raster's CRS.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Index of one point per distinct pixel, sorted by pixel row and col,
+        and index of the pixel of each point, such that values sampled at
+        the first ones are scattered back to all the points with
+        'values[inverse]'.
+    """
+    rows, cols = pixel_indexes(transform, xs, ys)
+    _, first, inverse = np.unique(
+        np.column_stack([rows, cols]), axis=0, return_index=True, return_inverse=True
+    )
+    return first, inverse.reshape(-1)
+
+
+def sample_blocks(
+    ds: DatasetReader,
+    xs: Iterable[float],
+    ys: Iterable[float],
+    indexes: Sequence[int] = None,
+    block_cache: DiskBlockCache = None,
+    version: Hashable = None,
+) -> np.ndarray:
+    """Sample a dataset at many coordinates, reading each block at most once.
+
+    This does the following:
+    - Convert all the coordinates to rows and cols with the inverse affine
+    - Group the points by the internal block (tile or strip) they fall in
+    - For each block, read the window covering its points with a single
+      ds.read and gather their values with NumPy fancy indexing
+
+    When a block cache is provided, whole blocks are read through it instead.
+
+    Points outside of the raster get the nodata value (0 if not set), like
+    in rasterio's DatasetReader.sample.
+
+    Parameters
+    ----------
+    ds : DatasetReader
+        Open dataset to sample.
+    xs : Iterable[float]
+        X coordinates in the dataset's CRS.
+    ys : Iterable[float]
+        Y coordinates in the dataset's CRS.
+    indexes : Sequence[int], optional
+        1-based indexes of the bands to read, by default all of them.
+    block_cache : DiskBlockCache, optional
+        Cache of the blocks read from the file, by default None.
+    version : Hashable, optional
+        Version of the file used to key the cached blocks, by default None.
+
+    Returns
+    -------
+    np.ndarray
+        Array shaped B x N, where B is the number of bands and N the number
+        of coordinates.
+    """
+    if indexes is None:
+        indexes = ds.indexes
+    indexes = list(indexes)
+
+    rows, cols = pixel_indexes(ds.transform, xs, ys)
+    output = np.full(
+        (len(indexes), rows.size), ds.nodata or 0, dtype=ds.dtypes[indexes[0] - 1]
+    )
+
+    inside = np.flatnonzero(
+        (rows >= 0) & (rows < ds.height) & (cols >= 0) & (cols < ds.width)
+    )
+    if inside.size == 0:
+        return output
+
+    block_height, block_width = ds.block_shapes[indexes[0] - 1]
+    block_rows = rows[inside] // block_height
+    block_cols = cols[inside] // block_width
+    blocks_per_row = -(-ds.width // block_width)
+
+    # Sort the points by block so that each block is a contiguous slice
+    block_ids = block_rows * blocks_per_row + block_cols
+    order = np.argsort(block_ids, kind="stable")
+    sorted_ids = block_ids[order]
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    ends = np.r_[starts[1:], sorted_ids.size]
+
+    for start, end in zip(starts, ends, strict=True):
+        points = inside[order[start:end]]
+        point_rows, point_cols = rows[points], cols[points]
+
+        if block_cache is not None:
+            block_row, block_col = divmod(sorted_ids[start], blocks_per_row)
+            row_off, col_off = block_row * block_height, block_col * block_width
+            for band, index in enumerate(indexes):
+                block = read_block(
+                    ds, index, block_row, block_col, block_cache, version
+                )
+                output[band, points] = block[point_rows - row_off, point_cols - col_off]
+            continue
+
+        # Read only the part of the block covering its points
+        row_off, col_off = point_rows.min(), point_cols.min()
+        window = Window(
+            col_off,
+            row_off,
+            point_cols.max() - col_off + 1,
+            point_rows.max() - row_off + 1,
+        )
+        data = ds.read(indexes, window=window)
+        output[:, points] = data[:, point_rows - row_off, point_cols - col_off]
+
+    return output
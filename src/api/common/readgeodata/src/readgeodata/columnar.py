@@ -0,0 +1,96 @@
+import json
+from typing import TYPE_CHECKING, Dict
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# Key of the sampled values holding the file's metadata
+METADATA_KEY = "metadata"
+
+
+def _null_mask(column: np.ndarray) -> np.ndarray | None:
+    # Masked values of masked arrays become nulls
+    if np.ma.is_masked(column):
+        return np.ma.getmaskarray(column)
+    return None
+
+
+def band_columns(values: Dict) -> Dict[str, np.ndarray]:
+    """Get the band arrays of sampled values, without copying them.
+
+    Parameters
+    ----------
+    values : Dict
+        Values as returned by GeoDataReader.sample_data_points.
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        Band names mapped to their 1D arrays, in the order of 'values'.
+    """
+    return {
+        band: column if isinstance(column, np.ndarray) else np.asarray(column)
+        for band, column in values.items()
+        if band != METADATA_KEY
+    }
+
+
+def to_structured_array(values: Dict) -> np.ndarray:
+    """Pack sampled values in a NumPy structured array, one record per point.
+
+    Unlike the band arrays, records are interleaved, so this makes one copy
+    of the values. Metadata are not included.
+
+    Parameters
+    ----------
+    values : Dict
+        Values as returned by GeoDataReader.sample_data_points.
+
+    Returns
+    -------
+    np.ndarray
+        Structured array with one field per band.
+    """
+    columns = band_columns(values)
+    size = len(next(iter(columns.values()))) if columns else 0
+    output = np.empty(
+        size, dtype=[(band, column.dtype) for band, column in columns.items()]
+    )
+    for band, column in columns.items():
+        output[band] = column
+    return output
+
+
+def to_arrow_table(values: Dict) -> "pa.Table":
+    """Wrap sampled values in an Apache Arrow table, without copying them.
+
+    Band arrays become the table's columns, and metadata are stored as JSON
+    in the schema metadata under 'metadata'. Requires pyarrow, installed
+    with the 'arrow' extra of this package.
+
+    Parameters
+    ----------
+    values : Dict
+        Values as returned by GeoDataReader.sample_data_points.
+
+    Returns
+    -------
+    pyarrow.Table
+        Table with one column per band.
+    """
+    import pyarrow as pa
+
+    table = pa.table(
+        # Contiguous numeric arrays without nulls are wrapped, not copied
+        {
+            band: pa.array(np.ma.getdata(column), mask=_null_mask(column))
+            for band, column in band_columns(values).items()
+        }
+    )
+    if METADATA_KEY in values:
+        table = table.replace_schema_metadata(
+            {METADATA_KEY: json.dumps(values[METADATA_KEY])}
+        )
+    return table
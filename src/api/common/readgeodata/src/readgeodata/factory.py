@@ -0,0 +1,31 @@
+from typing import Dict
+
+from readgeodata.gdalenv import apply_reader_config
+from readgeodata.interfaces import GeoDataReader
+from readgeodata.mmapreader import MmapReader
+from readgeodata.rasterioreader import RasterIOReader
+
+# Env var with the directory of the flat rasters, set in images that ship them
+FLAT_RASTER_ROOT = "FLAT_RASTER_ROOT"
+
+
+def geodatareader_from_env(environ: Dict[str, str]) -> GeoDataReader:
+    """Get the reader matching the rasters available in the environment.
+
+    The GDAL environment set in 'environ' is applied to the container first.
+
+    Parameters
+    ----------
+    environ : Dict[str, str]
+        Environment variables, e.g. os.environ.
+
+    Returns
+    -------
+    GeoDataReader
+        A MmapReader over FLAT_RASTER_ROOT if set, a RasterIOReader otherwise.
+    """
+    apply_reader_config(environ)
+    root = environ.get(FLAT_RASTER_ROOT)
+    if root:
+        return MmapReader(root=root)
+    return RasterIOReader()
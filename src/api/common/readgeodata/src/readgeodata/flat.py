@@ -0,0 +1,204 @@
+"""Convert GeoTIFFs to flat, memory-mappable rasters.
+
+A flat raster is a directory holding one .npy file per band, band_<index>.npy,
+a header.json sidecar with descriptions, tags, CRS, transform and nodata, and
+the footprint of the raster, footprint.npz.
+Bands are stored uncompressed and in row-major order, so that a pixel is read
+with plain np.memmap indexing, without any GDAL decode.
+
+Usage, at image build time:
+
+    python -m readgeodata.flat --root /opt/flat s3://bucket/raster.tif
+    python -m readgeodata.flat --root /opt/flat --geotiff-json build-env-variables.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+from typing import List
+
+import numpy as np
+import rasterio
+from affine import Affine
+from rasterio.coords import BoundingBox
+from rasterio.crs import CRS
+from rasterio.windows import Window
+
+from readgeodata.footprint import Footprint
+from readgeodata.header import DatasetHeader
+
+# Suffix of the flat raster directories
+FLAT_SUFFIX = ".flat"
+
+# Name of the JSON sidecar of a flat raster
+FLAT_HEADER = "header.json"
+
+# Name of the footprint (coarse valid-data mask) of a flat raster
+FLAT_FOOTPRINT = "footprint.npz"
+
+# Rows converted at a time, bounding the memory used by the converter
+CONVERT_STRIP_ROWS = 1024
+
+
+def flat_path(filename: str, root: str) -> str:
+    """Get the directory of the flat raster converted from a file.
+
+    The path of the file, without any scheme, is mirrored under 'root',
+    e.g. s3://bucket/dir/raster.tif -> <root>/bucket/dir/raster.tif.flat.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the source file.
+    root : str
+        Directory storing all the flat rasters.
+
+    Returns
+    -------
+    str
+        Directory of the flat raster.
+    """
+    relative = filename.split("://", 1)[-1].lstrip("/")
+    return os.path.join(root, relative + FLAT_SUFFIX)
+
+
+def band_path(directory: str, index: int) -> str:
+    """Get the .npy file of a band of a flat raster."""
+    return os.path.join(directory, f"band_{index}.npy")
+
+
+def convert(filename: str, directory: str) -> None:
+    """Convert a raster to a flat raster.
+
+    The conversion happens in a temporary directory, moved into place once
+    complete, so that readers never see partially converted rasters.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the raster to convert, any path rasterio can open.
+    directory : str
+        Directory of the flat raster, replaced if it exists.
+    """
+    tmp_directory = f"{directory}.{os.getpid()}.tmp"
+    os.makedirs(tmp_directory)
+
+    with rasterio.open(filename) as ds:
+        for index in ds.indexes:
+            band = np.lib.format.open_memmap(
+                band_path(tmp_directory, index),
+                mode="w+",
+                dtype=ds.dtypes[index - 1],
+                shape=(ds.height, ds.width),
+            )
+            for row_off in range(0, ds.height, CONVERT_STRIP_ROWS):
+                height = min(CONVERT_STRIP_ROWS, ds.height - row_off)
+                band[row_off : row_off + height] = ds.read(
+                    index, window=Window(0, row_off, ds.width, height)
+                )
+            band.flush()
+            del band
+
+        Footprint.from_dataset(ds).save(os.path.join(tmp_directory, FLAT_FOOTPRINT))
+
+        header = {
+            "source": filename,
+            "descriptions": list(ds.descriptions),
+            "tags": ds.tags(),
+            "crs": ds.crs.to_wkt() if ds.crs else None,
+            "transform": list(ds.transform)[:6],
+            "nodata": ds.nodata,
+            "width": ds.width,
+            "height": ds.height,
+            "count": ds.count,
+            "dtypes": list(ds.dtypes),
+        }
+
+    with open(os.path.join(tmp_directory, FLAT_HEADER), "w") as f:
+        json.dump(header, f, indent=2)
+
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    os.replace(tmp_directory, directory)
+
+
+def read_header(directory: str, version: tuple = None) -> DatasetHeader:
+    """Read the header of a flat raster.
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the flat raster.
+    version : tuple, optional
+        Version of the flat raster, by default None.
+
+    Returns
+    -------
+    DatasetHeader
+        Header of the flat raster, like the one of its source file.
+    """
+    with open(os.path.join(directory, FLAT_HEADER)) as f:
+        header = json.load(f)
+
+    descriptions = tuple(header["descriptions"])
+    tags = header["tags"]
+    crs = CRS.from_wkt(header["crs"]) if header["crs"] else None
+    transform = Affine(*header["transform"])
+    width, height = header["width"], header["height"]
+    left, top = transform * (0, 0)
+    right, bottom = transform * (width, height)
+
+    return DatasetHeader.from_metadata(
+        descriptions=descriptions,
+        tags=tags,
+        profile={
+            "driver": "NPY",
+            "dtype": header["dtypes"][0],
+            "nodata": header["nodata"],
+            "width": width,
+            "height": height,
+            "count": header["count"],
+            "crs": crs,
+            "transform": transform,
+        },
+        crs=crs,
+        transform=transform,
+        nodata=header["nodata"],
+        bounds=BoundingBox(
+            min(left, right), min(top, bottom), max(left, right), max(top, bottom)
+        ),
+        version=version,
+        local=True,
+    )
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Convert GeoTIFFs to flat rasters for readgeodata.mmapreader"
+    )
+    parser.add_argument("files", nargs="*", help="Paths of the rasters to convert")
+    parser.add_argument(
+        "--root", required=True, help="Directory storing all the flat rasters"
+    )
+    parser.add_argument(
+        "--geotiff-json",
+        help="JSON file listing rasters as [{'path': ...}], "
+        "like the GEOTIFF_JSON build variable",
+    )
+    args = parser.parse_args(argv)
+
+    files = list(args.files)
+    if args.geotiff_json:
+        with open(args.geotiff_json) as f:
+            files.extend(entry["path"] for entry in json.load(f))
+
+    for filename in files:
+        directory = flat_path(filename, args.root)
+        print(f"Converting {filename} to {directory}")
+        os.makedirs(os.path.dirname(directory), exist_ok=True)
+        convert(filename, directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+from affine import Affine
+from rasterio.io import DatasetReader
+from rasterio.windows import Window
+
+from readgeodata.blocksampler import pixel_indexes
+from readgeodata.header import HEADER_CACHE_MAX_SIZE, DatasetHeader
+from readgeodata.pool import DatasetPool, dataset_pool
+
+# Side, in pixels, of the cells of the coarse valid-data mask
+FOOTPRINT_CELL_PIXELS = 32
+
+
+class Footprint:
+    def __init__(
+        self,
+        transform: Affine,
+        width: int,
+        height: int,
+        valid: np.ndarray = None,
+        cell_pixels: int = FOOTPRINT_CELL_PIXELS,
+    ):
+        """Footprint of a raster: its extent plus a coarse valid-data mask.
+
+        Each cell of the mask covers 'cell_pixels' x 'cell_pixels' pixels, and
+        is valid if any of them holds data in any band. The mask is therefore
+        conservative: points in invalid cells are certainly nodata, and can be
+        rejected without reading the raster.
+
+        Parameters
+        ----------
+        transform : Affine
+            Affine transform of the raster.
+        width : int
+            Width of the raster, in pixels.
+        height : int
+            Height of the raster, in pixels.
+        valid : np.ndarray, optional
+            Coarse valid-data mask, by default None, i.e. only the extent
+            of the raster is known.
+        cell_pixels : int, optional
+            Side of the cells of the mask, by default FOOTPRINT_CELL_PIXELS.
+        """
+        self.transform = transform
+        self.width = width
+        self.height = height
+        self.valid = valid
+        self.cell_pixels = cell_pixels
+
+    @classmethod
+    def from_header(cls, header: DatasetHeader) -> "Footprint":
+        """Footprint made of the extent of a raster only."""
+        return cls(
+            transform=header.transform,
+            width=header.profile["width"],
+            height=header.profile["height"],
+        )
+
+    @classmethod
+    def from_dataset(
+        cls, ds: DatasetReader, cell_pixels: int = FOOTPRINT_CELL_PIXELS
+    ) -> "Footprint":
+        """Build the footprint of a dataset, scanning its valid-data mask.
+
+        The dataset is read one strip of cells at a time.
+
+        Parameters
+        ----------
+        ds : DatasetReader
+            Open dataset.
+        cell_pixels : int, optional
+            Side of the cells of the mask, by default FOOTPRINT_CELL_PIXELS.
+
+        Returns
+        -------
+        Footprint
+            Footprint of the dataset.
+        """
+        cell_rows = -(-ds.height // cell_pixels)
+        cell_cols = -(-ds.width // cell_pixels)
+        valid = np.zeros((cell_rows, cell_cols), dtype=bool)
+
+        for cell_row in range(cell_rows):
+            row_off = cell_row * cell_pixels
+            height = min(cell_pixels, ds.height - row_off)
+            mask = ds.dataset_mask(window=Window(0, row_off, ds.width, height)) > 0
+
+            # Pad to whole cells, then reduce each cell to 'any valid pixel'
+            padded = np.zeros((cell_pixels, cell_cols * cell_pixels), dtype=bool)
+            padded[:height, : ds.width] = mask
+            valid[cell_row] = padded.reshape(cell_pixels, cell_cols, cell_pixels).any(
+                axis=(0, 2)
+            )
+
+        return cls(
+            transform=ds.transform,
+            width=ds.width,
+            height=ds.height,
+            valid=valid,
+            cell_pixels=cell_pixels,
+        )
+
+    def save(self, path: str) -> None:
+        """Save the valid-data mask, e.g. next to a flat raster."""
+        with open(path, "wb") as f:
+            np.savez(f, valid=self.valid, cell_pixels=self.cell_pixels)
+
+    @classmethod
+    def load(cls, path: str, header: DatasetHeader) -> "Footprint":
+        """Load a valid-data mask saved with save()."""
+        with np.load(path) as data:
+            return cls(
+                transform=header.transform,
+                width=header.profile["width"],
+                height=header.profile["height"],
+                valid=data["valid"],
+                cell_pixels=int(data["cell_pixels"]),
+            )
+
+    def contains(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Check which points may hold data, vectorized.
+
+        Parameters
+        ----------
+        xs : np.ndarray
+            X coordinates in the raster's CRS.
+        ys : np.ndarray
+            Y coordinates in the raster's CRS.
+
+        Returns
+        -------
+        np.ndarray
+            Boolean array, False for points outside of the raster or in cells
+            without any valid pixel.
+        """
+        rows, cols = pixel_indexes(self.transform, xs, ys)
+        inside = (rows >= 0) & (rows < self.height) & (cols >= 0) & (cols < self.width)
+        if self.valid is not None:
+            points = np.flatnonzero(inside)
+            inside[points] = self.valid[
+                rows[points] // self.cell_pixels, cols[points] // self.cell_pixels
+            ]
+        return inside
+
+
+class FootprintIndex:
+    def __init__(self, pool: DatasetPool = None, max_size: int = HEADER_CACHE_MAX_SIZE):
+        """Footprints of the sampled files, keyed by filename and file version.
+
+        Footprints of local files are built on first use, scanning the whole
+        file once. Remote files are not scanned, only their extent is used.
+
+        Parameters
+        ----------
+        pool : DatasetPool, optional
+            Pool used to open the files, by default the shared one.
+        max_size : int, optional
+            Maximum number of footprints, by default HEADER_CACHE_MAX_SIZE.
+        """
+        self.pool = pool if pool is not None else dataset_pool
+        self.max_size = max_size
+        self._footprints = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, filename: str, header: DatasetHeader) -> Footprint:
+        """Get the footprint of a file.
+
+        Parameters
+        ----------
+        filename : str
+            Path of the file.
+        header : DatasetHeader
+            Header of the current version of the file.
+
+        Returns
+        -------
+        Footprint
+            Footprint of the file.
+        """
+        key = (filename, header.version)
+
+        with self._lock:
+            footprint = self._footprints.get(key)
+            if footprint is not None:
+                self._footprints.move_to_end(key)
+                return footprint
+
+        if header.local:
+            footprint = Footprint.from_dataset(self.pool.open(filename))
+        else:
+            footprint = Footprint.from_header(header)
+
+        with self._lock:
+            self._footprints[key] = footprint
+            if len(self._footprints) > self.max_size:
+                self._footprints.popitem(last=False)
+
+        return footprint
+
+
+def sample_within(
+    footprint: Footprint,
+    xs: np.ndarray,
+    ys: np.ndarray,
+    sample: Callable[[np.ndarray, np.ndarray], np.ndarray],
+    bands: int,
+    nodata: float | None,
+    dtype: str,
+    masked: bool = False,
+) -> np.ndarray:
+    """Sample only the points within a footprint, rejecting the others.
+
+    Rejected points are never read: they get the nodata value (0 if not set),
+    like points outside of the raster in rasterio's DatasetReader.sample.
+
+    Parameters
+    ----------
+    footprint : Footprint
+        Footprint of the raster.
+    xs : np.ndarray
+        X coordinates in the raster's CRS.
+    ys : np.ndarray
+        Y coordinates in the raster's CRS.
+    sample : Callable[[np.ndarray, np.ndarray], np.ndarray]
+        Function sampling the raster at (xs, ys), returning a B x N array.
+    bands : int
+        Number of sampled bands, B.
+    nodata : float | None
+        Nodata value of the raster.
+    dtype : str
+        Data type of the sampled bands.
+    masked : bool, optional
+        Whether to return a masked array, masking rejected points and nodata
+        values, by default False.
+
+    Returns
+    -------
+    np.ndarray
+        Array shaped B x N, where N is the number of coordinates.
+    """
+    keep = footprint.contains(xs, ys)
+    output = np.full((bands, keep.size), nodata or 0, dtype=dtype)
+    if keep.any():
+        output[:, keep] = sample(xs[keep], ys[keep])
+
+    if not masked:
+        return output
+
+    mask = np.broadcast_to(~keep, output.shape)
+    if nodata is not None:
+        mask = mask | (np.isnan(output) if np.isnan(nodata) else output == nodata)
+    return np.ma.MaskedArray(output, mask=mask)
+
+
+footprint_index = FootprintIndex(pool=dataset_pool)
@@ -0,0 +1,185 @@
+"""GDAL environment of the readers, tuned for reading COGs from S3.
+
+The environment is picked once per container, when the reader is created,
+from a named profile updated with:
+- the 'gdal_options' of the entries of build-env-variables.json, shipped in
+  the image through the GEOTIFF_JSON build variable
+- any GDAL_*, CPL_* or VSI_* env var set on the function
+
+so that options can be A/B tested under load by redeploying the function with
+other env vars, without rebuilding the image. The options in force are
+recorded in the traces of every sample.
+
+Usage
+-----
+    reader_config = apply_reader_config(os.environ)
+"""
+
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import Dict
+
+import rasterio
+from aws_lambda_powertools import Tracer
+
+# Env var with the name of the GDAL profile, for A/B tests
+READER_GDAL_PROFILE = "READER_GDAL_PROFILE"
+
+# Key of the GDAL options in the entries of build-env-variables.json
+GDAL_OPTIONS_KEY = "gdal_options"
+
+# Prefixes of the env vars read as GDAL config options
+GDAL_OPTION_PREFIXES = ("GDAL_", "CPL_", "VSI_")
+
+# GDAL config options of each profile
+GDAL_PROFILES = {
+    # GDAL defaults, as a baseline
+    "gdal": {},
+    # Few requests per sample on COGs stored in S3
+    "cog": {
+        # Do not list the S3 prefix of the file on open
+        "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+        "CPL_VSIL_CURL_ALLOWED_EXTENSIONS": ".tif,.tiff,.TIF,.TIFF",
+        # Read the header of the COG with a single request
+        "GDAL_INGESTED_BYTES_AT_OPEN": "32768",
+        # Keep the downloaded ranges in memory, 64 MiB per file
+        "VSI_CACHE": "TRUE",
+        "VSI_CACHE_SIZE": "67108864",
+        # Decoded blocks cache, 256 MiB
+        "GDAL_CACHEMAX": "268435456",
+        # Send concurrent ranges over one HTTP/2 connection, merging adjacent ones
+        "GDAL_HTTP_VERSION": "2",
+        "GDAL_HTTP_MULTIPLEX": "YES",
+        "GDAL_HTTP_MERGE_CONSECUTIVE_RANGES": "YES",
+        # Decompress blocks with all the cores
+        "GDAL_NUM_THREADS": "ALL_CPUS",
+    },
+}
+
+# Profile used when READER_GDAL_PROFILE is not set
+DEFAULT_GDAL_PROFILE = "cog"
+
+tracer = Tracer()
+
+
+@dataclass(frozen=True)
+class ReaderConfig:
+    """GDAL environment of the readers.
+
+    Attributes
+    ----------
+    profile : str
+        Name of the profile the options are based on.
+    options : Dict[str, str]
+        GDAL config options.
+    """
+
+    profile: str = DEFAULT_GDAL_PROFILE
+    options: Dict[str, str] = field(
+        default_factory=lambda: dict(GDAL_PROFILES[DEFAULT_GDAL_PROFILE])
+    )
+
+    @classmethod
+    def from_env(cls, environ: Dict[str, str]) -> "ReaderConfig":
+        """Build the configuration set in the environment.
+
+        Parameters
+        ----------
+        environ : Dict[str, str]
+            Environment variables, e.g. os.environ.
+
+        Returns
+        -------
+        ReaderConfig
+            Options of the profile, updated with the ones of GEOTIFF_JSON,
+            updated with the GDAL env vars.
+
+        Raises
+        ------
+        ValueError
+            Raised when the profile is unknown or GEOTIFF_JSON is not valid JSON.
+        """
+        profile = environ.get(READER_GDAL_PROFILE) or DEFAULT_GDAL_PROFILE
+        if profile not in GDAL_PROFILES:
+            raise ValueError(
+                f"Unknown GDAL profile '{profile}', expected one of {list(GDAL_PROFILES)}"
+            )
+        options = dict(GDAL_PROFILES[profile])
+
+        geotiff_json = environ.get("GEOTIFF_JSON")
+        if geotiff_json:
+            try:
+                entries = json.loads(geotiff_json)
+            except json.JSONDecodeError:
+                raise ValueError(
+                    f"Variable is not a valid JSON: {geotiff_json}"
+                ) from None
+            for entry in entries:
+                options.update(entry.get(GDAL_OPTIONS_KEY, {}))
+
+        options.update(
+            {
+                key: value
+                for key, value in environ.items()
+                if key.startswith(GDAL_OPTION_PREFIXES)
+            }
+        )
+        return cls(
+            profile=profile,
+            options={key: str(value) for key, value in options.items()},
+        )
+
+    def env_options(self) -> Dict[str, str | int]:
+        """Get the options as rasterio.Env expects them, with integers parsed.
+
+        rasterio sets GDAL_CACHEMAX through GDAL's API, which requires an
+        integer number of bytes.
+        """
+        return {
+            key: int(value) if value.isdigit() else value
+            for key, value in self.options.items()
+        }
+
+    def annotate(self) -> None:
+        """Record the profile and options in the current trace segment."""
+        tracer.put_annotation(key="gdal_profile", value=self.profile)
+        tracer.put_metadata(key="gdal_options", value=self.options)
+
+
+_applied_config = None
+_applied_env = None
+_lock = threading.Lock()
+
+
+def apply_reader_config(environ: Dict[str, str]) -> ReaderConfig:
+    """Apply the GDAL environment once per container.
+
+    The first call enters a rasterio.Env with the options set in 'environ' and
+    keeps it open for the container's lifetime. GDAL config options are
+    process-wide, so they apply to the reads of every thread. Later calls
+    return the configuration already applied.
+
+    Parameters
+    ----------
+    environ : Dict[str, str]
+        Environment variables, e.g. os.environ.
+
+    Returns
+    -------
+    ReaderConfig
+        The configuration in force.
+    """
+    global _applied_config, _applied_env
+    with _lock:
+        if _applied_config is None:
+            config = ReaderConfig.from_env(environ)
+            env = rasterio.Env(**config.env_options())
+            env.__enter__()
+            _applied_config, _applied_env = config, env
+        return _applied_config
+
+
+def applied_reader_config() -> ReaderConfig | None:
+    """Get the configuration applied to the container, if any."""
+    return _applied_config
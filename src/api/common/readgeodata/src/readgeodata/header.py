@@ -0,0 +1,277 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable
+
+from affine import Affine
+from rasterio.coords import BoundingBox
+from rasterio.crs import CRS
+from rasterio.io import DatasetReader
+
+from readgeodata.interfaces import BandNotFoundError
+from readgeodata.pool import DatasetPool, dataset_pool
+
+# Maximum number of file headers kept in memory
+HEADER_CACHE_MAX_SIZE = 64
+
+# Tags holding the national average AAL of each land use, e.g. Average_Residential_AAL
+AVERAGE_AAL_TAG = re.compile(r"^Average_\w+_AAL$")
+
+
+@dataclass(frozen=True)
+class DatasetHeader:
+    """Header information of a dataset, read once per file version."""
+
+    descriptions: tuple
+    band_indexes: dict
+    tags: dict
+    average_aal: dict
+    profile: dict
+    crs: CRS
+    transform: Affine
+    nodata: float | None
+    bounds: BoundingBox
+    version: Hashable = None
+    local: bool = True
+
+    @classmethod
+    def from_dataset(
+        cls, ds: DatasetReader, version: Hashable = None, local: bool = True
+    ) -> "DatasetHeader":
+        """Read the header of an open dataset.
+
+        Parameters
+        ----------
+        ds : DatasetReader
+            Open dataset.
+        version : Hashable, optional
+            Version of the file the dataset has been opened from, by default None.
+        local : bool, optional
+            Whether the file is on the local filesystem, by default True.
+
+        Returns
+        -------
+        DatasetHeader
+            Header of the dataset. 'band_indexes' maps each band name to its
+            1-based index, 'average_aal' maps each Average_*_AAL tag to its
+            value as float.
+        """
+        return cls.from_metadata(
+            descriptions=ds.descriptions,
+            tags=ds.tags(),
+            profile=dict(ds.profile),
+            crs=ds.crs,
+            transform=ds.transform,
+            nodata=ds.nodata,
+            bounds=ds.bounds,
+            version=version,
+            local=local,
+        )
+
+    @classmethod
+    def from_metadata(
+        cls,
+        descriptions: tuple,
+        tags: dict,
+        profile: dict,
+        crs: CRS,
+        transform: Affine,
+        nodata: float | None,
+        bounds: BoundingBox,
+        version: Hashable = None,
+        local: bool = True,
+    ) -> "DatasetHeader":
+        """Build a header from metadata read from any source.
+
+        Band names are indexed and Average_*_AAL tags parsed like in
+        from_dataset, see its parameters.
+
+        Returns
+        -------
+        DatasetHeader
+            Header with the provided metadata.
+        """
+        return cls(
+            descriptions=tuple(descriptions),
+            band_indexes={
+                name: index
+                for index, name in enumerate(descriptions, start=1)
+                if name is not None
+            },
+            tags=tags,
+            average_aal={
+                tag: float(value)
+                for tag, value in tags.items()
+                if AVERAGE_AAL_TAG.match(tag)
+            },
+            profile=profile,
+            crs=crs,
+            transform=transform,
+            nodata=nodata,
+            bounds=bounds,
+            version=version,
+            local=local,
+        )
+
+    def metadata(self, tags: list[str]) -> dict:
+        """Get the values of some tags, Average_*_AAL ones parsed as float."""
+        return {tag: self.average_aal.get(tag, self.tags[tag]) for tag in tags}
+
+    def resolve_bands(self, bands: list[int | str] | None, filename: str) -> list[int]:
+        """Map each band, either a 1-based index or a name, to its 1-based index.
+
+        Parameters
+        ----------
+        bands : list[int | str] | None
+            Bands to resolve, all of them if None.
+        filename : str
+            Path of the file, used in error messages.
+
+        Returns
+        -------
+        list[int]
+            1-based indexes of the bands.
+
+        Raises
+        ------
+        BandNotFoundError
+            Raised when any of the bands is not in the file.
+        """
+        if bands is None:
+            return list(range(1, len(self.descriptions) + 1))
+
+        indexes = []
+        for band in bands:
+            if isinstance(band, str):
+                if band not in self.band_indexes:
+                    raise BandNotFoundError(f"Cannot find band '{band}' in {filename}")
+                indexes.append(self.band_indexes[band])
+            elif 1 <= band <= len(self.descriptions):
+                indexes.append(band)
+            else:
+                raise BandNotFoundError(f"Cannot find band {band} in {filename}")
+        return indexes
+
+
+def file_version(filename: str) -> Hashable:
+    """Identify the current version of a file.
+
+    Local files are identified by modification time and size. Remote files
+    (e.g. s3://) are versioned artifacts whose path never changes content,
+    so the path alone identifies them and None is returned.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the file.
+
+    Returns
+    -------
+    Hashable
+        Version of the file.
+    """
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def s3_etag(filename: str) -> str | None:
+    """Get the ETag of an s3:// object, or None if it cannot be retrieved.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the object, in the form s3://bucket/key.
+
+    Returns
+    -------
+    str | None
+        ETag of the object.
+    """
+    if not filename.startswith("s3://"):
+        return None
+
+    try:
+        # boto3 is always available in the Lambda runtime, but it is not
+        # a dependency of this package
+        import boto3
+
+        bucket, key = filename[len("s3://") :].split("/", 1)
+        return boto3.client("s3").head_object(Bucket=bucket, Key=key)["ETag"]
+    except Exception:
+        return None
+
+
+class HeaderCache:
+    def __init__(self, pool: DatasetPool = None, max_size: int = HEADER_CACHE_MAX_SIZE):
+        """Cache of dataset headers, keyed by filename and file version.
+
+        Parameters
+        ----------
+        pool : DatasetPool, optional
+            Pool used to open the files on a miss, by default the shared one.
+        max_size : int, optional
+            Maximum number of cached headers, by default HEADER_CACHE_MAX_SIZE.
+        """
+        self.pool = pool if pool is not None else dataset_pool
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._headers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, filename: str) -> DatasetHeader:
+        """Get the header of a file, reading it on a miss.
+
+        Parameters
+        ----------
+        filename : str
+            Path of the file.
+
+        Returns
+        -------
+        DatasetHeader
+            Header of the current version of the file.
+        """
+        key = (filename, file_version(filename))
+
+        with self._lock:
+            header = self._headers.get(key)
+            if header is not None:
+                self._headers.move_to_end(key)
+                self.hits += 1
+                return header
+            self.misses += 1
+
+        # Remote files are versioned by their ETag, fetched once with the header
+        version = key[1]
+        local = version is not None
+        if not local:
+            version = s3_etag(filename)
+        header = DatasetHeader.from_dataset(
+            self.pool.open(filename), version=version, local=local
+        )
+
+        with self._lock:
+            self._headers[key] = header
+            if len(self._headers) > self.max_size:
+                # If cache is full, remove the least recently used header
+                self._headers.popitem(last=False)
+
+        return header
+
+    def stats(self) -> dict:
+        """Return hit and miss counters of the cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._headers),
+            }
+
+
+header_cache = HeaderCache(pool=dataset_pool)
@@ -5,9 +5,26 @@ class BandsNameNotFoundError(Exception):
     pass
 
 
+class BandNotFoundError(Exception):
+    pass
+
+
 class GeoDataReader(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def sample_data_points(  # noqa: ANN201
-        self, filename: str, coordinates: list[tuple], coordinates_crs: int = 4326
+        self,
+        filename: str,
+        coordinates: list[tuple],
+        coordinates_crs: int = 4326,
+        bands: list[int | str] | None = None,
+        masked: bool = False,
     ):
         pass
+
+    def header(self, filename: str):  # noqa: ANN201
+        """Header of a file (a readgeodata.header.DatasetHeader), if known.
+
+        It is used to snap coordinates to the file's pixels, e.g. to cache
+        sampled values per pixel. Readers that do not know it return None.
+        """
+        return None
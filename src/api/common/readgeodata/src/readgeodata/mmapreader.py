@@ -0,0 +1,215 @@
+import os
+import threading
+
+import numpy as np
+from aws_lambda_powertools import Tracer
+
+from readgeodata.blocksampler import pixel_indexes
+from readgeodata.flat import (
+    FLAT_FOOTPRINT,
+    FLAT_HEADER,
+    band_path,
+    flat_path,
+    read_header,
+)
+from readgeodata.footprint import Footprint, sample_within
+from readgeodata.header import DatasetHeader, file_version
+from readgeodata.interfaces import BandsNameNotFoundError, GeoDataReader
+from readgeodata.transform import transform_coordinates
+
+tracer = Tracer()
+
+
+class FlatRaster:
+    def __init__(self, directory: str, version: tuple = None):
+        """Flat raster whose bands are memory-mapped on first use.
+
+        Pages of the bands are loaded by the OS on access and kept in its
+        page cache, shared by every process and every warm invocation.
+
+        Parameters
+        ----------
+        directory : str
+            Directory of the flat raster.
+        version : tuple, optional
+            Version of the flat raster, by default None.
+        """
+        self.directory = directory
+        self.header = read_header(directory, version=version)
+        footprint_path = os.path.join(directory, FLAT_FOOTPRINT)
+        if os.path.exists(footprint_path):
+            self.footprint = Footprint.load(footprint_path, self.header)
+        else:
+            # Converted without footprint, only its extent is known
+            self.footprint = Footprint.from_header(self.header)
+        self._bands = {}
+        self._lock = threading.Lock()
+
+    def band(self, index: int) -> np.ndarray:
+        """Get the memory-mapped array of a band, by its 1-based index."""
+        with self._lock:
+            if index not in self._bands:
+                self._bands[index] = np.load(
+                    band_path(self.directory, index), mmap_mode="r"
+                )
+            return self._bands[index]
+
+
+class MmapReader(GeoDataReader):
+    def __init__(self, root: str):
+        """Reader sampling flat rasters converted with readgeodata.flat.
+
+        It is a drop-in replacement for RasterIOReader: files are requested
+        with the path of their source GeoTIFF, mapped to their flat raster
+        under 'root'. Sampling is plain NumPy indexing of memory-mapped bands,
+        with no GDAL decode.
+
+        Parameters
+        ----------
+        root : str
+            Directory storing all the flat rasters.
+        """
+        self.root = root
+        self._rasters = {}
+        self._lock = threading.Lock()
+
+    def open(self, filename: str) -> FlatRaster:
+        """Get the flat raster of a file, reopened when converted again.
+
+        Parameters
+        ----------
+        filename : str
+            Path of the source file.
+
+        Returns
+        -------
+        FlatRaster
+            The flat raster.
+
+        Raises
+        ------
+        FileNotFoundError
+            Raised when the file has not been converted.
+        """
+        directory = flat_path(filename, self.root)
+        version = file_version(os.path.join(directory, FLAT_HEADER))
+        if version is None:
+            raise FileNotFoundError(f"Cannot find flat raster of {filename}")
+
+        with self._lock:
+            raster = self._rasters.get(directory)
+            if raster is None or raster.header.version != version:
+                raster = FlatRaster(directory, version=version)
+                self._rasters[directory] = raster
+            return raster
+
+    def header(self, filename: str) -> DatasetHeader:
+        """Get the header of the flat raster of a file."""
+        return self.open(filename).header
+
+    @tracer.capture_method
+    def sample_data_points(
+        self,
+        filename: str,
+        coordinates: list[tuple],
+        metadata: list[str] = None,
+        coordinates_crs: int = 4326,
+        bands: list[int | str] | None = None,
+        masked: bool = False,
+    ) -> dict:
+        """Sample the flat raster of a .tif file at specific coordinates.
+
+        Parameters and output are the same as RasterIOReader.sample_data_points.
+
+        Parameters
+        ----------
+        filename : str
+            Path of the source file to be read.
+        coordinates : list[tuple]
+            List of tuples in the form (lon, lat).
+        metadata : list[str], optional
+            Metadatas to fetch from file, by default None.
+        coordinates_crs : int, optional
+            CRS of the provided coordinates, by default 4326.
+        bands : list[int | str], optional
+            Bands to read, as 1-based indexes or band names, by default all of them.
+        masked : bool, optional
+            Whether to return masked arrays, masking the points outside of the
+            file's footprint and nodata values, by default False.
+
+        Returns
+        -------
+        dict
+            Dictionary of data mapping the band names to the values sampled at
+            specified coordinates, plus the requested metadata in a 'metadata'
+            field. Average_*_AAL metadata values are parsed as float.
+
+        Raises
+        ------
+        FileNotFoundError
+            Raised when the file has not been converted.
+        BandsNameNotFoundError
+            Raised when any of the file's bands has no name.
+        BandNotFoundError
+            Raised when any of the requested bands is not in the file.
+        """
+        if metadata is None:
+            metadata = []
+
+        raster = self.open(filename)
+        header = raster.header
+        tags = header.metadata(metadata)
+
+        xs, ys = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2).T
+        xs, ys = transform_coordinates(xs, ys, coordinates_crs, header.crs)
+
+        descriptions = header.descriptions
+        if not all(descriptions):
+            raise BandsNameNotFoundError(f"Cannot find bands name in {filename}")
+
+        indexes = header.resolve_bands(bands, filename)
+        mat = sample_within(
+            raster.footprint,
+            xs,
+            ys,
+            lambda xs, ys: sample_flat(raster, header, xs, ys, indexes),
+            bands=len(indexes),
+            nodata=header.nodata,
+            dtype=raster.band(indexes[0]).dtype,
+            masked=masked,
+        )
+
+        return dict(
+            zip([descriptions[i - 1] for i in indexes], mat, strict=True),
+            **{"metadata": tags},
+        )
+
+
+def sample_flat(
+    raster: FlatRaster,
+    header: DatasetHeader,
+    xs: np.ndarray,
+    ys: np.ndarray,
+    indexes: list[int],
+) -> np.ndarray:
+    """Sample memory-mapped bands, like blocksampler.sample_blocks.
+
+    Returns
+    -------
+    np.ndarray
+        Array shaped B x N, where B is the number of bands and N the number
+        of coordinates. Points outside of the raster get the nodata value
+        (0 if not set).
+    """
+    rows, cols = pixel_indexes(header.transform, xs, ys)
+    height, width = header.profile["height"], header.profile["width"]
+    inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+
+    output = np.full(
+        (len(indexes), rows.size),
+        header.nodata or 0,
+        dtype=raster.band(indexes[0]).dtype,
+    )
+    for band, index in enumerate(indexes):
+        output[band, inside] = raster.band(index)[rows[inside], cols[inside]]
+    return output
@@ -0,0 +1,92 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Sequence, Tuple
+
+from readgeodata.interfaces import GeoDataReader
+from readgeodata.rasterioreader import RasterIOReader
+
+# Maximum number of files sampled at the same time, e.g. 3 RCP scenarios x 3 years
+SAMPLE_MANY_MAX_WORKERS = 9
+
+riogeoreader = RasterIOReader()
+
+# Threads sampling the files, kept for the life of the container so that the
+# dataset handles they open, local to each thread, are reused across calls
+sample_many_executor = ThreadPoolExecutor(
+    max_workers=SAMPLE_MANY_MAX_WORKERS, thread_name_prefix="sample_many"
+)
+
+
+def sample_many(
+    files: Sequence[str],
+    coordinates: List[Tuple[float, float]],
+    bands: List[int | str] | None = None,
+    metadata: List[str] = None,
+    coordinates_crs: int = 4326,
+    geodatareader: GeoDataReader = None,
+    max_workers: int = SAMPLE_MANY_MAX_WORKERS,
+) -> List[dict]:
+    """Sample the same coordinates across many files concurrently.
+
+    Each file is sampled in a thread of a pool shared by all the calls, of
+    SAMPLE_MANY_MAX_WORKERS threads. Files are read with rasterio, which
+    releases the GIL while reading, and each thread keeps its own dataset
+    handles from the reader's pool across calls, so that sampling N files
+    takes roughly the time of the slowest one instead of the sum of all.
+
+    Parameters
+    ----------
+    files : Sequence[str]
+        Paths of the files to sample.
+    coordinates : List[Tuple[float, float]]
+        List of tuples in the form (lon, lat).
+    bands : List[int | str], optional
+        Bands to read from every file, as 1-based indexes or band names,
+        by default all of them.
+    metadata : List[str], optional
+        Metadatas to fetch from every file, by default None.
+    coordinates_crs : int, optional
+        CRS of the provided coordinates, by default 4326.
+    geodatareader : GeoDataReader, optional
+        Reader used to sample the files, by default a shared RasterIOReader.
+    max_workers : int, optional
+        Maximum number of files sampled at the same time by this call, at
+        most SAMPLE_MANY_MAX_WORKERS, by default SAMPLE_MANY_MAX_WORKERS.
+
+    Returns
+    -------
+    List[dict]
+        One result per file, in the order of 'files', as returned by
+        GeoDataReader.sample_data_points.
+
+    Raises
+    ------
+    Exception
+        The first error raised while sampling any of the files, in the order
+        of 'files'.
+    """
+    if geodatareader is None:
+        geodatareader = riogeoreader
+    if not files:
+        return []
+
+    def sample_file(filename: str) -> dict:
+        return geodatareader.sample_data_points(
+            filename=filename,
+            coordinates=coordinates,
+            metadata=metadata,
+            coordinates_crs=coordinates_crs,
+            bands=bands,
+        )
+
+    if len(files) == 1:
+        return [sample_file(files[0])]
+
+    futures = []
+    running = set()
+    for filename in files:
+        if len(running) >= max_workers:
+            _, running = wait(running, return_when=FIRST_COMPLETED)
+        future = sample_many_executor.submit(sample_file, filename)
+        futures.append(future)
+        running.add(future)
+    return [future.result() for future in futures]
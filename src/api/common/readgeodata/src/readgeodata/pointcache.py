@@ -0,0 +1,148 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+import numpy as np
+
+from readgeodata.blocksampler import pixel_indexes
+from readgeodata.interfaces import GeoDataReader
+from readgeodata.transform import transform_coordinates
+
+# Memory budget of the sampled values cached per pixel
+POINT_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Estimated memory used by an entry besides its values: key, dict and arrays
+POINT_CACHE_ENTRY_OVERHEAD = 512
+
+
+class PointCache:
+    def __init__(self, max_bytes: int = POINT_CACHE_MAX_BYTES):
+        """LRU cache of the values sampled at single points, per raster pixel.
+
+        Coordinates are snapped to the pixel containing them, so that every
+        coordinate falling in the same pixel of the same file version shares
+        one entry. Entries are evicted in LRU order once their estimated size
+        exceeds 'max_bytes'.
+
+        Parameters
+        ----------
+        max_bytes : int, optional
+            Memory budget of the cache, by default POINT_CACHE_MAX_BYTES.
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sample_data_points(
+        self,
+        geodatareader: GeoDataReader,
+        filename: str,
+        coordinates: list[tuple],
+        metadata: list[str] = None,
+        coordinates_crs: int = 4326,
+        bands: list[int | str] | None = None,
+    ) -> dict:
+        """Sample a file through the cache, like GeoDataReader.sample_data_points.
+
+        Only single points are cached. Many points, or readers that do not
+        know the header of the file, are passed through to the reader.
+
+        Parameters
+        ----------
+        geodatareader : GeoDataReader
+            Reader used on a miss.
+        filename : str
+            Path of the file to be read.
+        coordinates : list[tuple]
+            List of tuples in the form (lon, lat).
+        metadata : list[str], optional
+            Metadatas to fetch from file, by default None.
+        coordinates_crs : int, optional
+            CRS of the provided coordinates, by default 4326.
+        bands : list[int | str], optional
+            Bands to read, as 1-based indexes or band names, by default all of them.
+
+        Returns
+        -------
+        dict
+            Values as returned by the reader. Cached band arrays are read-only.
+        """
+        header = geodatareader.header(filename) if len(coordinates) == 1 else None
+        if header is None:
+            return geodatareader.sample_data_points(
+                filename=filename,
+                coordinates=coordinates,
+                metadata=metadata,
+                coordinates_crs=coordinates_crs,
+                bands=bands,
+            )
+
+        xs, ys = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2).T
+        xs, ys = transform_coordinates(xs, ys, coordinates_crs, header.crs)
+        rows, cols = pixel_indexes(header.transform, xs, ys)
+        key = (
+            filename,
+            header.version,
+            tuple(header.resolve_bands(bands, filename)),
+            int(rows[0]),
+            int(cols[0]),
+        )
+
+        values = self._get(key)
+        if values is None:
+            values = geodatareader.sample_data_points(
+                filename=filename,
+                coordinates=coordinates,
+                coordinates_crs=coordinates_crs,
+                bands=bands,
+            )
+            values.pop("metadata", None)
+            self._set(key, values)
+
+        return {**values, "metadata": header.metadata(metadata or [])}
+
+    def _get(self, key: Hashable) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _set(self, key: Hashable, values: dict) -> None:
+        for column in values.values():
+            column.flags.writeable = False
+        size = POINT_CACHE_ENTRY_OVERHEAD + sum(
+            column.nbytes for column in values.values()
+        )
+
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (values, size)
+            self.size += size
+            while self.size > self.max_bytes and self._entries:
+                # If cache is full, remove the least recently used entries
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """Return hit, miss and eviction counters and size of the cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": self.size,
+                "entries": len(self._entries),
+            }
+
+
+point_cache = PointCache(max_bytes=POINT_CACHE_MAX_BYTES)
@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+
+import rasterio
+from rasterio.io import DatasetReader
+
+# Maximum number of datasets kept open by each thread
+POOL_MAX_SIZE = 16
+
+
+class DatasetPool:
+    def __init__(self, max_size: int = POOL_MAX_SIZE):
+        """Pool of open rasterio datasets, keyed by filename.
+
+        Opening a dataset means a GDAL open, a header fetch and a CRS parse,
+        which for remote files costs several round trips. The pool keeps
+        the datasets open for the whole life of the (warm) Lambda container.
+
+        GDAL dataset handles must not be shared between threads, hence each
+        thread owns its own handles. Handles are evicted in LRU order once
+        a thread holds more than 'max_size' of them.
+
+        Parameters
+        ----------
+        max_size : int, optional
+            Maximum number of open datasets per thread, by default POOL_MAX_SIZE.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _datasets(self) -> OrderedDict:
+        # Lazily create the handles of the calling thread
+        if not hasattr(self._local, "datasets"):
+            self._local.datasets = OrderedDict()
+        return self._local.datasets
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def open(self, filename: str) -> DatasetReader:
+        """Get an open dataset for filename, opening it on a miss.
+
+        The returned dataset is owned by the pool and must not be closed
+        by the caller.
+
+        Parameters
+        ----------
+        filename : str
+            Path of the file to open.
+
+        Returns
+        -------
+        DatasetReader
+            Open dataset, usable only by the calling thread.
+        """
+        datasets = self._datasets()
+
+        ds = datasets.get(filename)
+        if ds is not None and not ds.closed:
+            datasets.move_to_end(filename)
+            self._count("hits")
+            return ds
+
+        self._count("misses")
+        ds = rasterio.open(filename)
+        datasets[filename] = ds
+
+        while len(datasets) > self.max_size:
+            # If the pool is full, close the least recently used dataset
+            _, oldest = datasets.popitem(last=False)
+            oldest.close()
+            self._count("evictions")
+
+        return ds
+
+    def close(self) -> None:
+        """Close all the datasets opened by the calling thread."""
+        datasets = self._datasets()
+        while datasets:
+            _, ds = datasets.popitem()
+            ds.close()
+
+    def stats(self) -> dict:
+        """Return hit, miss and eviction counters of the pool.
+
+        Returns
+        -------
+        dict
+            Counters accumulated by every thread since the pool was created,
+            and the number of datasets open in the calling thread.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "open": len(self._datasets()),
+            }
+
+
+# Shared by every reader of the container, so it survives warm invocations
+dataset_pool = DatasetPool(max_size=POOL_MAX_SIZE)
@@ -1,17 +1,61 @@
 import numpy as np
-import rasterio
-import rasterio.warp
 from aws_lambda_powertools import Tracer
-from rasterio.crs import CRS
 
+from readgeodata.blockcache import DiskBlockCache
+from readgeodata.blockcache import block_cache as shared_block_cache
+from readgeodata.blocksampler import sample_blocks
+from readgeodata.footprint import FootprintIndex, footprint_index, sample_within
+from readgeodata.gdalenv import applied_reader_config
+from readgeodata.header import DatasetHeader, HeaderCache, header_cache
 from readgeodata.interfaces import BandsNameNotFoundError, GeoDataReader
+from readgeodata.pool import DatasetPool, dataset_pool
+from readgeodata.transform import transform_coordinates
 
 tracer = Tracer()
 
 
 class RasterIOReader(GeoDataReader):
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        pool: DatasetPool = None,
+        headers: HeaderCache = None,
+        block_cache: DiskBlockCache = None,
+        footprints: FootprintIndex = None,
+    ):
+        """Reader sampling .tif files through rasterio.
+
+        Parameters
+        ----------
+        pool : DatasetPool, optional
+            Pool of open datasets, by default the one shared by the container.
+        headers : HeaderCache, optional
+            Cache of the files' headers, by default the one shared by the container.
+        block_cache : DiskBlockCache, optional
+            Cache of the blocks read from any file. By default, only blocks of
+            remote files are cached, in the cache shared by the container.
+        footprints : FootprintIndex, optional
+            Footprints of the files, by default the ones shared by the container.
+        """
+        self.pool = pool if pool is not None else dataset_pool
+        if headers is None:
+            headers = header_cache if pool is None else HeaderCache(pool=self.pool)
+        self.headers = headers
+        self.block_cache = block_cache
+        if footprints is None:
+            footprints = (
+                footprint_index if pool is None else FootprintIndex(pool=self.pool)
+            )
+        self.footprints = footprints
+
+    def _block_cache_for(self, header: DatasetHeader) -> DiskBlockCache | None:
+        if self.block_cache is not None:
+            return self.block_cache
+        # Local files are already as fast as the disk cache
+        return None if header.local else shared_block_cache
+
+    def header(self, filename: str) -> DatasetHeader:
+        """Get the cached header of a file."""
+        return self.headers.get(filename)
 
     @tracer.capture_method
     def sample_data_points(
@@ -20,14 +64,19 @@ class RasterIOReader(GeoDataReader):
         coordinates: list[tuple],
         metadata: list[str] = None,
         coordinates_crs: int = 4326,
+        bands: list[int | str] | None = None,
+        masked: bool = False,
     ) -> dict:
         """Sample a .tif file at specific coordinates.
 
         This does the following:
-        - Open the file
-        - Transform the coordinates in the provided CRS
-        - Sample the data points from the file
-        - Include any provided metadata
+        - Record the GDAL environment in force in the trace, if applied
+        - Get the open file from the dataset pool
+        - Transform the coordinates to the file's CRS, if they differ
+        - Reject the points outside of the file's footprint, without reading them
+        - Sample the requested bands at the data points, reading each block once,
+          through the local block cache for remote files
+        - Include any provided metadata, read from the cached file header
 
         Parameters
         ----------
@@ -39,6 +88,11 @@ class RasterIOReader(GeoDataReader):
             Metadatas to fetch from file, by default None.
         coordinates_crs : int, optional
             CRS of the provided coordinates, by default 4326.
+        bands : list[int | str], optional
+            Bands to read, as 1-based indexes or band names, by default all of them.
+        masked : bool, optional
+            Whether to return masked arrays, masking the points outside of the
+            file's footprint and nodata values, by default False.
 
         Returns
         -------
@@ -47,41 +101,56 @@ class RasterIOReader(GeoDataReader):
             sampled at specified coordinates. Any additional metadata included
             as arguments is included in a 'metadata' field, which is a dictionary
             mapping metadata fields and values found in the .tif file.
+            Average_*_AAL metadata values are parsed as float.
 
         Raises
         ------
         BandsNameNotFoundError
             Raised when any of the tif file's bands has no name.
+        BandNotFoundError
+            Raised when any of the requested bands is not in the tif file.
         """
         if metadata is None:
             metadata = []
 
-        with rasterio.open(filename) as ds:
-            current_crs = ds.profile["crs"]
-            tags = {tag: ds.tags()[tag] for tag in metadata}
+        config = applied_reader_config()
+        if config is not None:
+            config.annotate()
 
-            points = [list(pair) for pair in coordinates]
-            feature = {
-                "type": "MultiPoint",
-                "coordinates": points,
-            }
+        header = self.headers.get(filename)
+        tags = header.metadata(metadata)
 
-            # FIXME: avoid warp if same crs
-            feature_proj = rasterio.warp.transform_geom(
-                CRS.from_epsg(coordinates_crs), current_crs, feature
-            )
+        xs, ys = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2).T
+        xs, ys = transform_coordinates(xs, ys, coordinates_crs, header.crs)
+
+        descriptions = header.descriptions
+        if not all(descriptions):
+            raise BandsNameNotFoundError(f"Cannot find bands name in {filename}")
 
-            descriptions = ds.descriptions
-            if not all(descriptions):
-                raise BandsNameNotFoundError(f"Cannot find bands name in {filename}")
-
-            # sampled points response is N x B where:
-            # - N is the number of coordinates
-            # - and B the number of bands
-            # we want the output to be shaped as B x N
-            sampled_data_points = ds.sample(feature_proj["coordinates"])
-            mat = np.array(list(sampled_data_points))
-            t = mat.T
-            output = dict(zip(ds.descriptions, t, strict=False), **{"metadata": tags})
+        indexes = header.resolve_bands(bands, filename)
+        # sampled points response is B x N where:
+        # - B is the number of bands
+        # - and N the number of coordinates
+        mat = sample_within(
+            self.footprints.get(filename, header),
+            xs,
+            ys,
+            lambda xs, ys: sample_blocks(
+                self.pool.open(filename),
+                xs,
+                ys,
+                indexes=indexes,
+                block_cache=self._block_cache_for(header),
+                version=header.version,
+            ),
+            bands=len(indexes),
+            nodata=header.nodata,
+            dtype=header.profile["dtype"],
+            masked=masked,
+        )
+        output = dict(
+            zip([descriptions[i - 1] for i in indexes], mat, strict=True),
+            **{"metadata": tags},
+        )
 
         return output
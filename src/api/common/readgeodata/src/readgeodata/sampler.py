@@ -7,8 +7,11 @@ from geocoder.geocoder import (
     OutOfBoundsError,
 )
 from geocoder.gmaps_geocoder import GMapsGeocoder
+from readgeodata.blocksampler import unique_pixels
+from readgeodata.columnar import METADATA_KEY, to_arrow_table
 from readgeodata.interfaces import GeoDataReader
 from readgeodata.rasterioreader import RasterIOReader
+from readgeodata.transform import transform_coordinates
 from typing import Dict
 import numpy as np
 
@@ -17,6 +20,9 @@ logger = Logger()
 gmapsgeocoder = GMapsGeocoder()
 riogeoreader = RasterIOReader()
 
+# Output formats of the sampled values
+SAMPLE_OUTPUTS = ("lists", "numpy", "arrow")
+
 
 def extend_lists_in_dict(input_dict, M, fill_value=None, exclude_keys=["metadata"]):
     return {
@@ -65,6 +71,9 @@ def sample(
     coordinates: List[Tuple[str, str, str]],
     geodatareader: GeoDataReader,
     tiff_tags: List[str] = None,
+    bands: List[int | str] = None,
+    output: str = "lists",
+    masked: bool = False,
 ) -> dict:
     """
     Sample data from a file based on given coordinates or addresses.
@@ -73,6 +82,10 @@ def sample(
     sampling the file at coordinates (lat, lon). If addresses are provided,
     it first retrieves corresponding coordinates using the geocoder object.
 
+    When the geodatareader knows the header of the file, coordinates are
+    snapped to the file's pixels first: each distinct pixel is sampled once,
+    then its values are scattered back to every row falling in it.
+
     Args:
         filename (str): Path of the file to read data from.
         tiff_tags (List[str]): Metadata to fetch from the file.
@@ -80,21 +93,63 @@ def sample(
             Each tuple is (lon, lat, address).
         geocoder (Geocoder): Object for geocoding addresses to coordinates.
         geodatareader (GeoDataReader): Object for reading geo data from file.
+        bands (List[int | str]): Bands to sample, as 1-based indexes or names.
+            All of them if None.
+        output (str): Format of the sampled bands, one of SAMPLE_OUTPUTS:
+            - "lists": Python lists, ready to be serialized as JSON
+            - "numpy": NumPy arrays, passed through from the reader without copies
+            - "arrow": a pyarrow.Table wrapping the NumPy arrays, with the
+              metadata in the schema metadata (requires the 'arrow' extra)
+        masked (bool): Whether to mask the points outside of the file's footprint
+            and nodata values. Masked values are None in lists, and nulls in
+            Arrow tables.
 
     Returns:
-        dict: Dictionary containing sampled data and location information.
+        dict: Dictionary containing sampled data and location information,
+            or a pyarrow.Table if output is "arrow".
     """
+    if output not in SAMPLE_OUTPUTS:
+        raise ValueError(f"Unknown output '{output}', expected one of {SAMPLE_OUTPUTS}")
+
     if tiff_tags is None:
         tiff_tags = []
 
     print(f"Processing coords: {coordinates}")
 
+    points = [(lon, lat) for lat, lon, _ in coordinates]
+    coordinates_crs = 4326
+    inverse = None
+
+    header = geodatareader.header(filename) if len(points) > 1 else None
+    if header is not None:
+        xs, ys = np.asarray(points, dtype=np.float64).T
+        xs, ys = transform_coordinates(xs, ys, coordinates_crs, header.crs)
+        first, inverse = unique_pixels(header.transform, xs, ys)
+        # Sample one point per pixel, already in the file's CRS
+        points = np.column_stack([xs[first], ys[first]])
+        coordinates_crs = header.crs
+
     values = geodatareader.sample_data_points(
         filename=filename,
-        coordinates=[(lon, lat) for lat, lon, _ in coordinates],
+        coordinates=points,
+        coordinates_crs=coordinates_crs,
         metadata=tiff_tags,
+        bands=bands,
+        masked=masked,
     )
 
+    if inverse is not None:
+        # Scatter the values back to the original rows, in their order
+        values = {
+            key: value if key == METADATA_KEY else value[inverse]
+            for key, value in values.items()
+        }
+
+    if output == "numpy":
+        return values
+    if output == "arrow":
+        return to_arrow_table(values)
+
     converted_values = convert_ndarrays_to_lists(values)
 
     return converted_values
@@ -0,0 +1,73 @@
+import functools
+from typing import Any, Iterable, Tuple
+
+import numpy as np
+from pyproj import Transformer
+from rasterio.crs import CRS
+
+# Number of (source, destination) CRS couples whose transformer is kept around
+TRANSFORMER_CACHE_SIZE = 32
+
+
+@functools.lru_cache(maxsize=TRANSFORMER_CACHE_SIZE)
+def get_transformer(src_crs: str, dst_crs: str) -> Transformer:
+    """Get the cached transformer between two CRSs.
+
+    Parameters
+    ----------
+    src_crs : str
+        Source CRS, in any format understood by pyproj (e.g. 'EPSG:4326').
+    dst_crs : str
+        Destination CRS, in any format understood by pyproj.
+
+    Returns
+    -------
+    Transformer
+        Transformer expecting and returning coordinates in (x, y) order,
+        i.e. (lon, lat) for geographic CRSs.
+    """
+    return Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+
+
+@functools.lru_cache(maxsize=TRANSFORMER_CACHE_SIZE)
+def _to_crs(crs: Any) -> CRS:
+    return CRS.from_user_input(crs)
+
+
+def transform_coordinates(
+    xs: Iterable[float], ys: Iterable[float], src_crs: Any, dst_crs: Any
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Transform arrays of coordinates from src_crs to dst_crs.
+
+    If the two CRSs are the same the coordinates are returned as they are,
+    otherwise all of them are transformed with a single vectorized call.
+
+    Parameters
+    ----------
+    xs : Iterable[float]
+        X coordinates (longitudes for geographic CRSs).
+    ys : Iterable[float]
+        Y coordinates (latitudes for geographic CRSs).
+    src_crs : Any
+        CRS of the provided coordinates, e.g. an EPSG code or a rasterio CRS.
+    dst_crs : Any
+        CRS to transform the coordinates to.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Transformed x and y coordinates as float arrays.
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+
+    src_crs, dst_crs = _to_crs(src_crs), _to_crs(dst_crs)
+    if src_crs == dst_crs:
+        return xs, ys
+
+    transformer = get_transformer(src_crs.to_string(), dst_crs.to_string())
+    if xs.size == 1:
+        # pyproj takes its scalar code path on single-element arrays
+        x, y = transformer.transform(xs.item(), ys.item())
+        return np.full(xs.shape, x), np.full(ys.shape, y)
+    return transformer.transform(xs, ys)
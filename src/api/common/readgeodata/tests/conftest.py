@@ -1,8 +1,11 @@
 import json
 import os
 
+import numpy as np
 import pytest
+import rasterio
 from geocoder.geocoder import Geocoder
+from rasterio.transform import from_origin
 from readgeodata.interfaces import GeoDataReader
 
 
@@ -30,6 +33,37 @@ def geotiff_env_baseline(geotiff_json_baseline):
     del os.environ["GEOTIFF_JSON"]
 
 
+@pytest.fixture()
+def tiled_geotiff(tmp_path):
+    """Tiled 3-band 64x64 GeoTIFF in EPSG:3035, made of 16x16 blocks.
+
+    Each band stores 'band_index * 10000 + row * 100 + col', so that every
+    sampled value tells where it has been read from.
+    """
+    path = tmp_path / "tiled.tif"
+    rows, cols = np.mgrid[0:64, 0:64]
+    profile = {
+        "driver": "GTiff",
+        "dtype": "float32",
+        "nodata": -2.0,
+        "width": 64,
+        "height": 64,
+        "count": 3,
+        "crs": "EPSG:3035",
+        "transform": from_origin(4511820, 2072220, 30, 30),
+        "tiled": True,
+        "blockxsize": 16,
+        "blockysize": 16,
+        "compress": "deflate",
+    }
+    with rasterio.open(path, "w", **profile) as ds:
+        for band in range(1, 4):
+            ds.write((band * 10000 + rows * 100 + cols).astype("float32"), band)
+            ds.set_band_description(band, f"band{band}")
+        ds.update_tags(STATISTICS_MEAN="0.0034", Average_Residential_AAL="0.0021")
+    yield str(path)
+
+
 @pytest.fixture(scope="function")
 def event_address():
     yield {"queryStringParameters": {"address": "via verruca 1 trento"}}
@@ -114,6 +148,7 @@ class MockGeoDataReaderFlood(GeoDataReader):
         coordinates: list[tuple],
         metadata: list[str],
         coordinates_crs: int = 4326,
+        bands: list[int | str] | None = None,
     ):
         return {
             FloodKeys.LAND_USE: [112],
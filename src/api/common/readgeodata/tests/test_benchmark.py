@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+import pytest
+import rasterio
+from readgeodata.benchmark import (
+    ITALY_BOUNDS_3035,
+    compare,
+    main,
+    make_raster,
+    random_points,
+    run,
+)
+from readgeodata.transform import transform_coordinates
+
+
+@pytest.fixture(scope="module")
+def italy_cog(tmp_path_factory):
+    """Synthetic COG of Italy with 10 km pixels, made of 16x16 blocks"""
+    path = str(tmp_path_factory.mktemp("bench") / "italy.tif")
+    yield make_raster(path, resolution=10_000, block_size=16)
+
+
+class TestBenchmark:
+    def test_make_raster(self, italy_cog):
+        with rasterio.open(italy_cog) as ds:
+            assert (ds.width, ds.height, ds.count) == (110, 130, 9)
+            assert ds.block_shapes[0] == (16, 16)
+            assert ds.compression.name == "deflate"
+            assert ds.descriptions[8] == "band9"
+            # Corners are outside of the ellipse
+            assert ds.read(1, window=((0, 1), (0, 1)))[0, 0] == ds.nodata
+
+    @pytest.mark.parametrize("distribution", ["uniform", "clustered"])
+    def test_random_points_are_in_italy(self, distribution):
+        points = random_points(1000, distribution)
+
+        assert points.shape == (1000, 2)
+        xs, ys = transform_coordinates(points[:, 0], points[:, 1], 4326, 3035)
+        left, bottom, right, top = ITALY_BOUNDS_3035
+        assert ((xs > left - 1) & (xs < right + 1)).all()
+        assert ((ys > bottom - 1) & (ys < top + 1)).all()
+
+    def test_run(self, italy_cog, tmp_path):
+        results = run(
+            italy_cog,
+            str(tmp_path / "flat"),
+            batch_sizes=[1, 100],
+            band_counts=[1, 9],
+            distributions=["clustered"],
+            repeats=2,
+        )
+
+        assert len(results) == 2 * 2 * 2
+        assert {case["backend"] for case in results} == {"rasterio", "mmap"}
+        for case in results:
+            assert case["repeats"] == 2
+            assert case["min_s"] <= case["median_s"] <= case["p95_s"]
+            assert np.isfinite(case["points_per_s"])
+
+    def test_compare(self):
+        case = {"backend": "mmap", "distribution": "uniform", "batch_size": 10}
+        baseline = [{**case, "bands": 1, "median_s": 2.0}]
+        results = [
+            {**case, "bands": 1, "median_s": 1.0},
+            {**case, "bands": 3, "median_s": 1.0},
+        ]
+
+        assert compare(baseline, results) == [
+            {
+                **case,
+                "bands": 1,
+                "baseline_median_s": 2.0,
+                "median_s": 1.0,
+                "ratio": 0.5,
+            }
+        ]
+
+    def test_main(self, tmp_path):
+        output = tmp_path / "results.json"
+        args = ["--workdir", str(tmp_path), "--resolution", "20000"]
+        args += ["--block-size", "16", "--batch-sizes", "10", "--band-counts", "3"]
+        args += ["--repeats", "1"]
+
+        main(args + ["--output", str(output)])
+        main(args + ["--output", str(output), "--baseline", str(output)])
+
+        got = json.loads(output.read_text())
+        assert got["raster"]["bands"] == 9
+        assert len(got["results"]) == 4
+        assert len(got["comparison"]) == 4
@@ -0,0 +1,128 @@
+import time
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+from readgeodata.blockcache import DiskBlockCache, read_window
+from readgeodata.blocksampler import sample_blocks
+from readgeodata.pool import DatasetPool
+from readgeodata.rasterioreader import RasterIOReader
+
+
+class SlowDataset:
+    """Stand-in for a remote dataset: every .read() is slow and counted"""
+
+    def __init__(self, ds, latency=0.01):
+        self.ds = ds
+        self.latency = latency
+        self.reads = 0
+
+    def read(self, *args, **kwargs):
+        self.reads += 1
+        time.sleep(self.latency)
+        return self.ds.read(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.ds, name)
+
+
+class TestDiskBlockCache:
+    def test_read_through(self, tmp_path):
+        cache = DiskBlockCache(directory=str(tmp_path))
+        calls = []
+
+        def read():
+            calls.append(1)
+            return np.arange(4, dtype="float32")
+
+        first = cache.get_or_read(("file.tif", "etag", 1, 0, 0), read)
+        second = cache.get_or_read(("file.tif", "etag", 1, 0, 0), read)
+
+        np.testing.assert_array_equal(first, second)
+        assert len(calls) == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_new_version_is_a_miss(self, tmp_path):
+        cache = DiskBlockCache(directory=str(tmp_path))
+
+        cache.get_or_read(("file.tif", "etag1", 1, 0, 0), lambda: np.zeros(4))
+        cache.get_or_read(("file.tif", "etag2", 1, 0, 0), lambda: np.ones(4))
+
+        assert cache.stats()["misses"] == 2
+
+    def test_lru_eviction_within_budget(self, tmp_path):
+        block = np.zeros(1000, dtype="float64")  # 8 KB
+        cache = DiskBlockCache(directory=str(tmp_path), max_bytes=20_000)
+
+        for i in range(3):
+            cache.get_or_read(("file.tif", None, 1, 0, i), lambda: block)
+
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["blocks"] == 2
+        assert stats["size"] <= 20_000
+        assert len(list(tmp_path.glob("*.npy"))) == 2
+
+        # The oldest block has been evicted
+        cache.get_or_read(("file.tif", None, 1, 0, 0), lambda: block)
+        assert cache.stats()["misses"] == 4
+
+    def test_reuses_blocks_on_disk(self, tmp_path):
+        DiskBlockCache(directory=str(tmp_path)).get_or_read(
+            ("file.tif", None, 1, 0, 0), lambda: np.ones(4)
+        )
+
+        cache = DiskBlockCache(directory=str(tmp_path))
+        got = cache.get_or_read(("file.tif", None, 1, 0, 0), lambda: np.zeros(4))
+
+        np.testing.assert_array_equal(got, np.ones(4))
+        assert cache.stats()["hits"] == 1
+
+
+class TestCachedSampling:
+    def test_repeated_sampling_skips_slow_reads(self, tiled_geotiff, tmp_path):
+        cache = DiskBlockCache(directory=str(tmp_path / "blocks"))
+        xs = np.linspace(4511821, 4512299, 100)
+        ys = np.linspace(2072219, 2071741, 100)
+
+        with rasterio.open(tiled_geotiff) as ds:
+            want = sample_blocks(ds, xs, ys)
+
+            slow_ds = SlowDataset(ds)
+            first = sample_blocks(slow_ds, xs, ys, block_cache=cache)
+            reads_after_first = slow_ds.reads
+            second = sample_blocks(slow_ds, xs, ys, block_cache=cache)
+
+        np.testing.assert_array_equal(first, want)
+        np.testing.assert_array_equal(second, want)
+        # One block, three bands
+        assert reads_after_first == 3
+        assert slow_ds.reads == reads_after_first
+
+    def test_read_window_matches_boundless_read(self, tiled_geotiff, tmp_path):
+        cache = DiskBlockCache(directory=str(tmp_path / "blocks"))
+        # Partially outside the raster, across several blocks
+        window = Window(col_off=-5, row_off=10, width=40, height=60)
+
+        with rasterio.open(tiled_geotiff) as ds:
+            want = ds.read([1, 3], window=window, boundless=True, fill_value=-2.0)
+            got = read_window(ds, [1, 3], window, cache)
+
+        np.testing.assert_array_equal(got, want)
+
+    def test_reader_with_block_cache(self, tiled_geotiff, tmp_path):
+        cache = DiskBlockCache(directory=str(tmp_path / "blocks"))
+        rio = RasterIOReader(pool=DatasetPool(), block_cache=cache)
+
+        for _ in range(2):
+            got = rio.sample_data_points(
+                filename=tiled_geotiff,
+                coordinates=[(4511835, 2072205)],
+                coordinates_crs=3035,
+                bands=["band2"],
+            )
+
+        np.testing.assert_array_equal(got["band2"], [20000])
+        assert cache.stats()["misses"] == 1
+        assert cache.stats()["hits"] == 1
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+import rasterio
+from readgeodata.blocksampler import pixel_indexes, sample_blocks
+
+
+class CountingDataset:
+    """Wrap a dataset and count the calls to .read()"""
+
+    def __init__(self, ds):
+        self.ds = ds
+        self.reads = 0
+
+    def read(self, *args, **kwargs):
+        self.reads += 1
+        return self.ds.read(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.ds, name)
+
+
+class TestSampleBlocks:
+    def random_points(self, ds, n, seed=0):
+        rng = np.random.default_rng(seed)
+        left, bottom, right, top = ds.bounds
+        return rng.uniform(left, right, n), rng.uniform(bottom, top, n)
+
+    def test_matches_rasterio_sample(self, tiled_geotiff):
+        with rasterio.open(tiled_geotiff) as ds:
+            xs, ys = self.random_points(ds, 500)
+
+            want = np.array(list(ds.sample(zip(xs, ys, strict=True)))).T
+            got = sample_blocks(ds, xs, ys)
+
+        np.testing.assert_array_equal(got, want)
+
+    def test_reads_each_block_once(self, tiled_geotiff):
+        with rasterio.open(tiled_geotiff) as ds:
+            counting_ds = CountingDataset(ds)
+            xs, ys = self.random_points(ds, 2000)
+
+            sample_blocks(counting_ds, xs, ys)
+
+        # 64x64 raster with 16x16 blocks
+        assert counting_ds.reads == 16
+
+    def test_clustered_points_read_one_block(self, tiled_geotiff):
+        with rasterio.open(tiled_geotiff) as ds:
+            counting_ds = CountingDataset(ds)
+            # All points in the first 16x16 block
+            xs = np.linspace(4511821, 4512299, 1000)
+            ys = np.linspace(2072219, 2071741, 1000)
+
+            got = sample_blocks(counting_ds, xs, ys, indexes=[2])
+
+        assert counting_ds.reads == 1
+        assert got.shape == (1, 1000)
+        rows, cols = pixel_indexes(ds.transform, xs, ys)
+        np.testing.assert_array_equal(got[0], 20000 + rows * 100 + cols)
+
+    @pytest.mark.parametrize(
+        "x,y",
+        [
+            (4511800, 2072000),
+            (4514000, 2072000),
+            (4512000, 2072300),
+            (4512000, 2070000),
+        ],
+    )
+    def test_out_of_bounds_is_nodata(self, tiled_geotiff, x, y):
+        with rasterio.open(tiled_geotiff) as ds:
+            got = sample_blocks(ds, np.array([x]), np.array([y]))
+
+        np.testing.assert_array_equal(got, [[-2.0], [-2.0], [-2.0]])
+
+    def test_keeps_input_order(self, tiled_geotiff):
+        with rasterio.open(tiled_geotiff) as ds:
+            xs, ys = self.random_points(ds, 300, seed=42)
+
+            got = sample_blocks(ds, xs, ys, indexes=[1])
+            got_reversed = sample_blocks(ds, xs[::-1], ys[::-1], indexes=[1])
+
+        np.testing.assert_array_equal(got[:, ::-1], got_reversed)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from readgeodata.columnar import band_columns, to_arrow_table, to_structured_array
+from readgeodata.pool import DatasetPool
+from readgeodata.rasterioreader import RasterIOReader
+
+
+@pytest.fixture()
+def sampled_values(tiled_geotiff):
+    rio = RasterIOReader(pool=DatasetPool())
+    yield rio.sample_data_points(
+        filename=tiled_geotiff,
+        coordinates=[(4511835, 2072205), (4511865, 2072175)],
+        metadata=["Average_Residential_AAL"],
+        coordinates_crs=3035,
+    )
+
+
+class TestColumnar:
+    def test_band_columns_are_not_copied(self, sampled_values):
+        columns = band_columns(sampled_values)
+
+        assert list(columns) == ["band1", "band2", "band3"]
+        for band, column in columns.items():
+            assert np.shares_memory(column, sampled_values[band])
+
+    def test_structured_array(self, sampled_values):
+        records = to_structured_array(sampled_values)
+
+        assert records.dtype.names == ("band1", "band2", "band3")
+        np.testing.assert_array_equal(records["band1"], [10000, 10101])
+        np.testing.assert_array_equal(records[1].tolist(), [10101, 20101, 30101])
+
+    def test_arrow_table(self, sampled_values):
+        pa = pytest.importorskip("pyarrow")
+
+        table = to_arrow_table(sampled_values)
+
+        assert table.column_names == ["band1", "band2", "band3"]
+        assert table.schema.field("band1").type == pa.float32()
+        assert table.column("band3").to_pylist() == [30000, 30101]
+        assert table.schema.metadata == {
+            b"metadata": b'{"Average_Residential_AAL": 0.0021}'
+        }
+        # The Arrow buffers point to the sampled NumPy arrays
+        column = table.column("band2").chunk(0).to_numpy(zero_copy_only=True)
+        assert np.shares_memory(column, sampled_values["band2"])
+
+    def test_arrow_table_masked_values_are_nulls(self):
+        pytest.importorskip("pyarrow")
+        values = {
+            "band1": np.ma.MaskedArray([1.0, -2.0], mask=[False, True]),
+            "metadata": {},
+        }
+
+        table = to_arrow_table(values)
+
+        assert table.column("band1").to_pylist() == [1.0, None]
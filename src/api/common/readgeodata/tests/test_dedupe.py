@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from affine import Affine
+from readgeodata.blocksampler import unique_pixels
+from readgeodata.pool import DatasetPool
+from readgeodata.rasterioreader import RasterIOReader
+from readgeodata.sampler import sample
+from readgeodata.transform import transform_coordinates
+
+ORIGIN_X, ORIGIN_Y = 4511820, 2072220
+
+
+class CountingReader(RasterIOReader):
+    """RasterIOReader recording the number of points sampled per call"""
+
+    def __init__(self):
+        super().__init__(pool=DatasetPool())
+        self.points = []
+
+    def sample_data_points(self, *args, **kwargs):
+        self.points.append(len(kwargs["coordinates"]))
+        return super().sample_data_points(*args, **kwargs)
+
+
+def lat_lon(row, col, dx=15, dy=15):
+    """(lat, lon, address) of a point in a pixel of the tiled_geotiff fixture"""
+    xs, ys = transform_coordinates(
+        np.array([ORIGIN_X + col * 30 + dx], dtype=np.float64),
+        np.array([ORIGIN_Y - row * 30 - dy], dtype=np.float64),
+        3035,
+        4326,
+    )
+    return ys[0], xs[0], f"{row},{col}"
+
+
+@pytest.fixture()
+def coordinates():
+    # 6 rows in 3 distinct pixels, one of them outside of the raster
+    yield [
+        lat_lon(1, 2),
+        lat_lon(0, 0),
+        lat_lon(1, 2, dx=2, dy=28),
+        lat_lon(-3, 5),
+        lat_lon(0, 0, dx=28),
+        lat_lon(1, 2),
+    ]
+
+
+class TestUniquePixels:
+    def test_inverse_scatters_back(self):
+        # Points in pixels (0, 1), (0, 0), (0, 1), (1, 0), (0, 2)
+        xs = np.array([45.0, 15.0, 44.0, 15.0, 75.0])
+        ys = np.array([-15.0, -15.0, -20.0, -45.0, -15.0])
+
+        first, inverse = unique_pixels(Affine(30, 0, 0, 0, -30, 0), xs, ys)
+
+        assert first.tolist() == [1, 0, 4, 3]
+        assert inverse.tolist() == [1, 0, 1, 3, 2]
+
+
+class TestSampleDedupe:
+    def test_distinct_pixels_are_sampled_once(self, tiled_geotiff, coordinates):
+        reader = CountingReader()
+
+        got = sample(tiled_geotiff, coordinates, reader, output="numpy")
+
+        assert reader.points == [3]
+        assert got["band1"].tolist() == [10102, 10000, 10102, -2, 10000, 10102]
+
+    def test_same_as_without_dedupe(self, tiled_geotiff, coordinates):
+        reader = RasterIOReader(pool=DatasetPool())
+        want = reader.sample_data_points(
+            filename=tiled_geotiff,
+            coordinates=[(lon, lat) for lat, lon, _ in coordinates],
+            metadata=["Average_Residential_AAL"],
+            masked=True,
+        )
+
+        got = sample(
+            tiled_geotiff,
+            coordinates,
+            reader,
+            tiff_tags=["Average_Residential_AAL"],
+            output="numpy",
+            masked=True,
+        )
+
+        assert got.keys() == want.keys()
+        assert got["metadata"] == want["metadata"]
+        for band in ["band1", "band2", "band3"]:
+            assert got[band].tolist() == want[band].tolist()
+
+    def test_lists_output(self, tiled_geotiff, coordinates):
+        got = sample(tiled_geotiff, coordinates, RasterIOReader(pool=DatasetPool()))
+
+        assert got["band3"] == [30102, 30000, 30102, -2, 30000, 30102]
@@ -0,0 +1,158 @@
+import numpy as np
+import pytest
+import rasterio
+import readgeodata.rasterioreader as rasterioreader_module
+from rasterio.transform import from_origin
+from readgeodata.flat import main
+from readgeodata.footprint import Footprint, FootprintIndex
+from readgeodata.header import HeaderCache
+from readgeodata.mmapreader import MmapReader
+from readgeodata.pool import DatasetPool
+from readgeodata.rasterioreader import RasterIOReader
+
+ORIGIN_X, ORIGIN_Y = 4511820, 2072220
+
+
+def pixel_center(row, col):
+    return ORIGIN_X + col * 30 + 15, ORIGIN_Y - row * 30 - 15
+
+
+@pytest.fixture()
+def sparse_geotiff(tmp_path):
+    """2-band 64x64 GeoTIFF whose top-left 32x32 quarter is nodata."""
+    path = tmp_path / "sparse.tif"
+    rows, cols = np.mgrid[0:64, 0:64]
+    profile = {
+        "driver": "GTiff",
+        "dtype": "float32",
+        "nodata": -2.0,
+        "width": 64,
+        "height": 64,
+        "count": 2,
+        "crs": "EPSG:3035",
+        "transform": from_origin(ORIGIN_X, ORIGIN_Y, 30, 30),
+        "tiled": True,
+        "blockxsize": 16,
+        "blockysize": 16,
+    }
+    with rasterio.open(path, "w", **profile) as ds:
+        for band in range(1, 3):
+            data = (band * 10000 + rows * 100 + cols).astype("float32")
+            data[:32, :32] = -2.0
+            ds.write(data, band)
+            ds.set_band_description(band, f"band{band}")
+    yield str(path)
+
+
+class TestFootprint:
+    def test_valid_mask(self, sparse_geotiff):
+        with rasterio.open(sparse_geotiff) as ds:
+            footprint = Footprint.from_dataset(ds, cell_pixels=16)
+
+        want = np.ones((4, 4), dtype=bool)
+        want[:2, :2] = False
+        np.testing.assert_array_equal(footprint.valid, want)
+
+    def test_partial_cells_are_valid(self, sparse_geotiff):
+        # Cells of 24 pixels mix valid and nodata pixels, and overflow the raster
+        with rasterio.open(sparse_geotiff) as ds:
+            footprint = Footprint.from_dataset(ds, cell_pixels=24)
+
+        want = np.ones((3, 3), dtype=bool)
+        want[0, 0] = False
+        np.testing.assert_array_equal(footprint.valid, want)
+
+    def test_contains(self, sparse_geotiff):
+        with rasterio.open(sparse_geotiff) as ds:
+            footprint = Footprint.from_dataset(ds, cell_pixels=16)
+
+        xs, ys = np.array(
+            [
+                pixel_center(0, 0),  # nodata
+                pixel_center(40, 40),  # valid
+                pixel_center(10, 50),  # valid
+                pixel_center(-1, 10),  # outside
+                pixel_center(10, 64),  # outside
+            ]
+        ).T
+
+        np.testing.assert_array_equal(
+            footprint.contains(xs, ys), [False, True, True, False, False]
+        )
+
+    def test_extent_only(self, sparse_geotiff):
+        footprint = Footprint.from_header(
+            HeaderCache(pool=DatasetPool()).get(sparse_geotiff)
+        )
+        xs, ys = np.array([pixel_center(0, 0), pixel_center(-1, 10)]).T
+
+        np.testing.assert_array_equal(footprint.contains(xs, ys), [True, False])
+
+
+class TestMaskedSampling:
+    coordinates = [
+        pixel_center(0, 0),
+        pixel_center(40, 40),
+        pixel_center(-1, 10),
+        pixel_center(10, 50),
+    ]
+
+    def test_masked_values(self, sparse_geotiff):
+        rio = RasterIOReader(pool=DatasetPool())
+
+        got = rio.sample_data_points(
+            filename=sparse_geotiff,
+            coordinates=self.coordinates,
+            coordinates_crs=3035,
+            masked=True,
+        )
+
+        assert isinstance(got["band1"], np.ma.MaskedArray)
+        assert got["band1"].tolist() == [None, 14040, None, 11050]
+        assert got["band2"].tolist() == [None, 24040, None, 21050]
+
+    def test_unmasked_values(self, sparse_geotiff):
+        rio = RasterIOReader(pool=DatasetPool())
+
+        got = rio.sample_data_points(
+            filename=sparse_geotiff, coordinates=self.coordinates, coordinates_crs=3035
+        )
+
+        assert not isinstance(got["band1"], np.ma.MaskedArray)
+        assert got["band1"].tolist() == [-2, 14040, -2, 11050]
+
+    def test_rejected_points_are_not_read(self, sparse_geotiff, monkeypatch):
+        pool = DatasetPool()
+        rio = RasterIOReader(pool=pool, footprints=FootprintIndex(pool=pool))
+        # Build the footprint
+        rio.sample_data_points(
+            filename=sparse_geotiff,
+            coordinates=[pixel_center(0, 0)],
+            coordinates_crs=3035,
+        )
+
+        def fail(*args, **kwargs):
+            raise AssertionError("Rejected points must not be read")
+
+        monkeypatch.setattr(rasterioreader_module, "sample_blocks", fail)
+        got = rio.sample_data_points(
+            filename=sparse_geotiff,
+            coordinates=[pixel_center(0, 0), pixel_center(-5, -5), (12.0, 42.0)],
+            coordinates_crs=3035,
+            masked=True,
+        )
+
+        assert got["band1"].mask.all()
+
+    def test_mmap_reader(self, sparse_geotiff, tmp_path):
+        root = str(tmp_path / "flat")
+        main(["--root", root, sparse_geotiff])
+
+        got = MmapReader(root=root).sample_data_points(
+            filename=sparse_geotiff,
+            coordinates=self.coordinates,
+            coordinates_crs=3035,
+            masked=True,
+        )
+
+        assert got["band1"].tolist() == [None, 14040, None, 11050]
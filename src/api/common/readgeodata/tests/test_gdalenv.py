@@ -0,0 +1,85 @@
+import json
+
+import pytest
+import readgeodata.gdalenv as gdalenv
+from rasterio.env import get_gdal_config
+from readgeodata.gdalenv import (
+    GDAL_PROFILES,
+    ReaderConfig,
+    applied_reader_config,
+    apply_reader_config,
+)
+
+
+@pytest.fixture()
+def fresh_container(monkeypatch):
+    """Forget the configuration applied to the test process"""
+    monkeypatch.setattr(gdalenv, "_applied_config", None)
+    monkeypatch.setattr(gdalenv, "_applied_env", None)
+    yield
+    if gdalenv._applied_env is not None:
+        gdalenv._applied_env.__exit__()
+
+
+class TestReaderConfig:
+    def test_default_profile(self):
+        config = ReaderConfig.from_env({})
+
+        assert config.profile == "cog"
+        assert config.options == GDAL_PROFILES["cog"]
+
+    def test_gdal_defaults_profile(self):
+        config = ReaderConfig.from_env({"READER_GDAL_PROFILE": "gdal"})
+
+        assert config.options == {}
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError):
+            ReaderConfig.from_env({"READER_GDAL_PROFILE": "fast"})
+
+    def test_env_vars_override_geotiff_json(self):
+        geotiff_json = json.dumps(
+            [
+                {
+                    "path": "s3://bucket/raster.tif",
+                    "gdal_options": {"GDAL_CACHEMAX": 1024, "VSI_CACHE": "FALSE"},
+                }
+            ]
+        )
+
+        config = ReaderConfig.from_env(
+            {
+                "GEOTIFF_JSON": geotiff_json,
+                "VSI_CACHE": "TRUE",
+                "GDAL_NUM_THREADS": "2",
+                "AWS_REGION": "eu-west-1",
+            }
+        )
+
+        assert config.options == {
+            **GDAL_PROFILES["cog"],
+            "GDAL_CACHEMAX": "1024",
+            "VSI_CACHE": "TRUE",
+            "GDAL_NUM_THREADS": "2",
+        }
+
+    def test_env_options(self):
+        config = ReaderConfig.from_env({"GDAL_CACHEMAX": "1024"})
+
+        assert config.env_options()["GDAL_CACHEMAX"] == 1024
+        assert config.env_options()["VSI_CACHE"] == "TRUE"
+
+    def test_invalid_geotiff_json(self):
+        with pytest.raises(ValueError):
+            ReaderConfig.from_env({"GEOTIFF_JSON": "not json"})
+
+
+class TestApplyReaderConfig:
+    def test_applied_once(self, fresh_container):
+        first = apply_reader_config({"GDAL_HTTP_MAX_RETRY": "7"})
+        second = apply_reader_config({"GDAL_HTTP_MAX_RETRY": "1"})
+
+        assert second is first
+        assert applied_reader_config() is first
+        assert get_gdal_config("GDAL_HTTP_MAX_RETRY") == 7
+        assert get_gdal_config("GDAL_DISABLE_READDIR_ON_OPEN") == "EMPTY_DIR"
@@ -0,0 +1,61 @@
+import os
+
+from readgeodata.header import HeaderCache, file_version
+from readgeodata.pool import DatasetPool
+from readgeodata.rasterioreader import RasterIOReader
+
+
+class TestHeaderCache:
+    def test_header_content(self, tiled_geotiff):
+        header = HeaderCache(pool=DatasetPool()).get(tiled_geotiff)
+
+        assert header.descriptions == ("band1", "band2", "band3")
+        assert header.band_indexes == {"band1": 1, "band2": 2, "band3": 3}
+        assert header.average_aal == {"Average_Residential_AAL": 0.0021}
+        assert header.tags["STATISTICS_MEAN"] == "0.0034"
+        assert header.crs.to_epsg() == 3035
+        assert header.nodata == -2.0
+        assert header.profile["count"] == 3
+        assert header.bounds.left == 4511820
+
+    def test_filled_once(self, tiled_geotiff):
+        headers = HeaderCache(pool=DatasetPool())
+
+        first = headers.get(tiled_geotiff)
+        second = headers.get(tiled_geotiff)
+
+        assert first is second
+        assert headers.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+    def test_new_file_version_is_reloaded(self, tiled_geotiff):
+        headers = HeaderCache(pool=DatasetPool())
+        headers.get(tiled_geotiff)
+
+        stat = os.stat(tiled_geotiff)
+        os.utime(tiled_geotiff, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        headers.get(tiled_geotiff)
+
+        assert headers.stats()["misses"] == 2
+
+    def test_remote_file_version(self):
+        assert file_version("s3://bucket/not/a/local/file.tif") is None
+
+    def test_reader_metadata_from_header(self, tiled_geotiff):
+        pool = DatasetPool()
+        headers = HeaderCache(pool=pool)
+        rio = RasterIOReader(pool=pool, headers=headers)
+
+        for _ in range(3):
+            got = rio.sample_data_points(
+                filename=tiled_geotiff,
+                coordinates=[(4511830, 2072210)],
+                metadata=["Average_Residential_AAL", "STATISTICS_MEAN"],
+                coordinates_crs=3035,
+            )
+
+        # Average AAL tags are parsed, the others are returned as they are
+        assert got["metadata"] == {
+            "Average_Residential_AAL": 0.0021,
+            "STATISTICS_MEAN": "0.0034",
+        }
+        assert headers.stats()["misses"] == 1
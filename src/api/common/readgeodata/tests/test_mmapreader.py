@@ -0,0 +1,125 @@
+import json
+import os
+
+import numpy as np
+import pytest
+from readgeodata.factory import FLAT_RASTER_ROOT, geodatareader_from_env
+from readgeodata.flat import convert, flat_path, main, read_header
+from readgeodata.header import HeaderCache
+from readgeodata.interfaces import BandNotFoundError
+from readgeodata.mmapreader import MmapReader
+from readgeodata.pool import DatasetPool
+from readgeodata.rasterioreader import RasterIOReader
+
+FIXTURE_3B = "tests/fixtures/ostia_near_sea_fixture_3bands_metadata.tiff"
+
+
+@pytest.fixture()
+def flat_root(tmp_path, tiled_geotiff):
+    root = str(tmp_path / "flat")
+    main(["--root", root, tiled_geotiff, FIXTURE_3B])
+    yield root
+
+
+class TestFlatConversion:
+    def test_flat_path(self):
+        assert flat_path("s3://bucket/dir/raster.tif", "/opt/flat") == (
+            "/opt/flat/bucket/dir/raster.tif.flat"
+        )
+        assert flat_path("/data/raster.tif", "/opt/flat") == (
+            "/opt/flat/data/raster.tif.flat"
+        )
+
+    def test_header_matches_source(self, flat_root, tiled_geotiff):
+        want = HeaderCache(pool=DatasetPool()).get(tiled_geotiff)
+
+        got = read_header(flat_path(tiled_geotiff, flat_root))
+
+        assert got.descriptions == want.descriptions
+        assert got.band_indexes == want.band_indexes
+        assert got.tags == want.tags
+        assert got.average_aal == want.average_aal
+        assert got.crs == want.crs
+        assert got.transform == want.transform
+        assert got.nodata == want.nodata
+        assert got.bounds == want.bounds
+
+    def test_geotiff_json(self, tmp_path, tiled_geotiff):
+        geotiff_json = tmp_path / "build-env-variables.json"
+        geotiff_json.write_text(json.dumps([{"path": tiled_geotiff}]))
+        root = str(tmp_path / "flat")
+
+        main(["--root", root, "--geotiff-json", str(geotiff_json)])
+
+        assert os.path.exists(flat_path(tiled_geotiff, root))
+
+
+class TestMmapReader:
+    @pytest.mark.parametrize("bands", [None, ["band3", 1]])
+    def test_same_as_rasterio(self, flat_root, tiled_geotiff, bands):
+        rng = np.random.default_rng(0)
+        # Some points fall outside of the raster
+        coordinates = np.column_stack(
+            [rng.uniform(4511700, 4513800, 500), rng.uniform(2070200, 2072300, 500)]
+        )
+        kwargs = {
+            "filename": tiled_geotiff,
+            "coordinates": coordinates,
+            "metadata": ["STATISTICS_MEAN", "Average_Residential_AAL"],
+            "coordinates_crs": 3035,
+            "bands": bands,
+        }
+
+        want = RasterIOReader(pool=DatasetPool()).sample_data_points(**kwargs)
+        got = MmapReader(root=flat_root).sample_data_points(**kwargs)
+
+        assert got.keys() == want.keys()
+        assert got["metadata"] == want["metadata"]
+        for band in want:
+            if band != "metadata":
+                assert got[band].dtype == want[band].dtype
+                np.testing.assert_array_equal(got[band], want[band])
+
+    def test_fixture_in_4326(self, flat_root):
+        kwargs = {"filename": FIXTURE_3B, "coordinates": [(12.2851, 41.7301)]}
+
+        want = RasterIOReader(pool=DatasetPool()).sample_data_points(**kwargs)
+        got = MmapReader(root=flat_root).sample_data_points(**kwargs)
+
+        for band in want:
+            np.testing.assert_array_equal(got[band], want[band])
+
+    def test_missing_band(self, flat_root, tiled_geotiff):
+        with pytest.raises(BandNotFoundError):
+            MmapReader(root=flat_root).sample_data_points(
+                filename=tiled_geotiff, coordinates=[(12.0, 42.0)], bands=["band4"]
+            )
+
+    def test_not_converted(self, flat_root):
+        with pytest.raises(FileNotFoundError):
+            MmapReader(root=flat_root).sample_data_points(
+                filename="missing.tif", coordinates=[(12.0, 42.0)]
+            )
+
+    def test_reconverted_raster_is_reopened(self, flat_root, tiled_geotiff):
+        reader = MmapReader(root=flat_root)
+        first = reader.open(tiled_geotiff)
+        assert reader.open(tiled_geotiff) is first
+
+        directory = flat_path(tiled_geotiff, flat_root)
+        convert(tiled_geotiff, directory)
+        # Make sure the version changes even on coarse mtime filesystems
+        os.utime(os.path.join(directory, "header.json"), ns=(0, 0))
+
+        assert reader.open(tiled_geotiff) is not first
+
+
+class TestGeodatareaderFromEnv:
+    def test_mmap_reader(self, flat_root):
+        reader = geodatareader_from_env({FLAT_RASTER_ROOT: flat_root})
+
+        assert isinstance(reader, MmapReader)
+        assert reader.root == flat_root
+
+    def test_default_reader(self):
+        assert isinstance(geodatareader_from_env({}), RasterIOReader)
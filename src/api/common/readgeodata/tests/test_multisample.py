@@ -0,0 +1,123 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+from readgeodata.interfaces import BandNotFoundError, GeoDataReader
+from readgeodata.multisample import SAMPLE_MANY_MAX_WORKERS, sample_many
+from readgeodata.pool import DatasetPool
+from readgeodata.rasterioreader import RasterIOReader
+
+FIXTURE_1B = "tests/fixtures/ostia_near_sea_fixture_1b.tiff"
+FIXTURE_3B = "tests/fixtures/ostia_near_sea_fixture_3bands.tiff"
+
+
+class SlowReader(GeoDataReader):
+    """Reader taking 'latency' seconds per file, tracking concurrent calls"""
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def sample_data_points(
+        self, filename, coordinates, metadata=None, coordinates_crs=4326, bands=None
+    ):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.latency)
+        with self.lock:
+            self.running -= 1
+        return {"file": filename, "n": len(coordinates)}
+
+
+class TestSampleMany:
+    def test_one_result_per_file_in_order(self, tiled_geotiff):
+        rio = RasterIOReader(pool=DatasetPool())
+        files = [FIXTURE_1B, tiled_geotiff, FIXTURE_3B]
+        coordinates = [(4511823, 2072213), (4511835, 2072205)]
+
+        got = sample_many(files, coordinates, coordinates_crs=3035, geodatareader=rio)
+
+        assert len(got) == 3
+        for filename, result in zip(files, got, strict=True):
+            want = rio.sample_data_points(
+                filename=filename, coordinates=coordinates, coordinates_crs=3035
+            )
+            assert result.keys() == want.keys()
+            for band in want:
+                if band != "metadata":
+                    np.testing.assert_array_equal(result[band], want[band])
+
+    def test_bands(self, tiled_geotiff):
+        rio = RasterIOReader(pool=DatasetPool())
+
+        got = sample_many(
+            [tiled_geotiff, tiled_geotiff],
+            [(4511835, 2072205)],
+            bands=["band3"],
+            coordinates_crs=3035,
+            geodatareader=rio,
+        )
+
+        for result in got:
+            assert list(result) == ["band3", "metadata"]
+            np.testing.assert_array_equal(result["band3"], [30000])
+
+    def test_runs_concurrently(self):
+        reader = SlowReader(latency=0.05)
+        files = [f"file{i}.tif" for i in range(9)]
+
+        start = time.perf_counter()
+        got = sample_many(files, [(12.0, 42.0)], geodatareader=reader)
+        elapsed = time.perf_counter() - start
+
+        assert [result["file"] for result in got] == files
+        assert reader.max_running == 9
+        # Far less than the 0.45 s of sequential reads
+        assert elapsed < 0.3
+
+    def test_bounded_workers(self):
+        reader = SlowReader(latency=0.01)
+
+        sample_many(
+            [f"file{i}.tif" for i in range(10)],
+            [(12.0, 42.0)],
+            geodatareader=reader,
+            max_workers=2,
+        )
+
+        assert reader.max_running <= 2
+
+    def test_error_is_raised(self, tiled_geotiff):
+        rio = RasterIOReader(pool=DatasetPool())
+
+        with pytest.raises(BandNotFoundError):
+            sample_many(
+                [tiled_geotiff, FIXTURE_1B],
+                [(4511835, 2072205)],
+                bands=["band3"],
+                coordinates_crs=3035,
+                geodatareader=rio,
+            )
+
+    def test_no_files(self):
+        assert sample_many([], [(12.0, 42.0)]) == []
+
+    def test_threads_are_reused_across_calls(self):
+        threads = []
+
+        class ThreadReader(SlowReader):
+            def sample_data_points(self, filename, coordinates, **kwargs):
+                threads.append(threading.current_thread())
+                return super().sample_data_points(filename, coordinates, **kwargs)
+
+        reader = ThreadReader(latency=0.01)
+        files = [f"file{i}.tif" for i in range(9)]
+
+        sample_many(files, [(12.0, 42.0)], geodatareader=reader)
+        sample_many(files, [(12.0, 42.0)], geodatareader=reader)
+
+        assert len(set(threads)) <= SAMPLE_MANY_MAX_WORKERS
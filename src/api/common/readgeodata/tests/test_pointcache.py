@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+from readgeodata.pointcache import POINT_CACHE_ENTRY_OVERHEAD, PointCache
+from readgeodata.pool import DatasetPool
+from readgeodata.rasterioreader import RasterIOReader
+
+
+class CountingReader(RasterIOReader):
+    """RasterIOReader counting the calls to sample_data_points"""
+
+    def __init__(self):
+        super().__init__(pool=DatasetPool())
+        self.calls = 0
+
+    def sample_data_points(self, *args, **kwargs):
+        self.calls += 1
+        return super().sample_data_points(*args, **kwargs)
+
+
+@pytest.fixture()
+def reader():
+    yield CountingReader()
+
+
+class TestPointCache:
+    def test_same_pixel_is_a_hit(self, reader, tiled_geotiff):
+        cache = PointCache()
+        # Both points fall in the pixel at row 0, col 0
+        for coordinates in [(4511821, 2072219), (4511849, 2072191)]:
+            got = cache.sample_data_points(
+                geodatareader=reader,
+                filename=tiled_geotiff,
+                coordinates=[coordinates],
+                coordinates_crs=3035,
+                bands=["band1", "band3"],
+                metadata=["Average_Residential_AAL"],
+            )
+
+        assert reader.calls == 1
+        assert got["band1"].tolist() == [10000]
+        assert got["band3"].tolist() == [30000]
+        assert got["metadata"] == {"Average_Residential_AAL": 0.0021}
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_other_pixel_or_bands_is_a_miss(self, reader, tiled_geotiff):
+        cache = PointCache()
+        requests = [
+            ((4511821, 2072219), ["band1"]),
+            ((4511851, 2072219), ["band1"]),
+            ((4511821, 2072219), ["band2"]),
+        ]
+
+        for coordinates, bands in requests:
+            cache.sample_data_points(
+                geodatareader=reader,
+                filename=tiled_geotiff,
+                coordinates=[coordinates],
+                coordinates_crs=3035,
+                bands=bands,
+            )
+
+        assert reader.calls == 3
+        assert cache.stats()["misses"] == 3
+
+    def test_same_as_reader(self, reader, tiled_geotiff):
+        cache = PointCache()
+        # Lon/lat of a point inside the raster
+        kwargs = {"filename": tiled_geotiff, "coordinates": [(12.2851, 41.7301)]}
+
+        want = reader.sample_data_points(**kwargs)
+        for _ in range(2):
+            got = cache.sample_data_points(geodatareader=reader, **kwargs)
+            assert got.keys() == want.keys()
+            for band in want:
+                np.testing.assert_array_equal(got[band], want[band])
+
+    def test_cached_values_are_read_only(self, reader, tiled_geotiff):
+        cache = PointCache()
+        kwargs = {
+            "geodatareader": reader,
+            "filename": tiled_geotiff,
+            "coordinates": [(4511821, 2072219)],
+            "coordinates_crs": 3035,
+        }
+
+        got = cache.sample_data_points(**kwargs)
+        with pytest.raises(ValueError):
+            got["band1"][0] = 0
+
+        assert cache.sample_data_points(**kwargs)["band1"].tolist() == [10000]
+
+    def test_lru_eviction_within_budget(self, reader, tiled_geotiff):
+        # Room for 2 entries of 3 float32 values
+        entry_size = POINT_CACHE_ENTRY_OVERHEAD + 3 * 4
+        cache = PointCache(max_bytes=2 * entry_size)
+
+        for col in range(3):
+            cache.sample_data_points(
+                geodatareader=reader,
+                filename=tiled_geotiff,
+                coordinates=[(4511821 + col * 30, 2072219)],
+                coordinates_crs=3035,
+            )
+
+        assert cache.stats() == {
+            "hits": 0,
+            "misses": 3,
+            "evictions": 1,
+            "size": 2 * entry_size,
+            "entries": 2,
+        }
+
+    def test_many_points_are_passed_through(self, reader, tiled_geotiff):
+        cache = PointCache()
+
+        for _ in range(2):
+            cache.sample_data_points(
+                geodatareader=reader,
+                filename=tiled_geotiff,
+                coordinates=[(4511821, 2072219), (4511851, 2072219)],
+                coordinates_crs=3035,
+            )
+
+        assert reader.calls == 2
+        assert cache.stats()["entries"] == 0
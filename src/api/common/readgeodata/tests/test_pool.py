@@ -0,0 +1,78 @@
+import threading
+
+from readgeodata.pool import DatasetPool
+from readgeodata.rasterioreader import RasterIOReader
+
+FIXTURE_1B = "tests/fixtures/ostia_near_sea_fixture_1b.tiff"
+FIXTURE_3B = "tests/fixtures/ostia_near_sea_fixture_3bands.tiff"
+
+
+class TestDatasetPool:
+    def test_hit_after_miss(self):
+        pool = DatasetPool(max_size=2)
+
+        first = pool.open(FIXTURE_1B)
+        second = pool.open(FIXTURE_1B)
+
+        assert first is second
+        assert pool.stats() == {"hits": 1, "misses": 1, "evictions": 0, "open": 1}
+
+    def test_lru_eviction(self):
+        pool = DatasetPool(max_size=1)
+
+        first = pool.open(FIXTURE_1B)
+        pool.open(FIXTURE_3B)
+
+        # The least recently used dataset has been closed
+        assert first.closed
+        assert pool.stats()["evictions"] == 1
+        assert pool.stats()["open"] == 1
+
+        # And it is reopened on the next request
+        assert not pool.open(FIXTURE_1B).closed
+        assert pool.stats()["misses"] == 3
+
+    def test_closed_dataset_is_reopened(self):
+        pool = DatasetPool()
+
+        pool.open(FIXTURE_1B).close()
+        ds = pool.open(FIXTURE_1B)
+
+        assert not ds.closed
+        assert pool.stats()["misses"] == 2
+
+    def test_thread_local_handles(self):
+        pool = DatasetPool()
+        main_ds = pool.open(FIXTURE_1B)
+        got = []
+
+        thread = threading.Thread(target=lambda: got.append(pool.open(FIXTURE_1B)))
+        thread.start()
+        thread.join()
+
+        assert got[0] is not main_ds
+        assert pool.stats()["misses"] == 2
+
+    def test_close(self):
+        pool = DatasetPool()
+        ds = pool.open(FIXTURE_1B)
+
+        pool.close()
+
+        assert ds.closed
+        assert pool.stats()["open"] == 0
+
+    def test_reader_reuses_pool(self):
+        pool = DatasetPool()
+        rio = RasterIOReader(pool=pool)
+
+        for _ in range(3):
+            rio.sample_data_points(
+                filename=FIXTURE_1B,
+                coordinates=[(4511823, 2072213)],
+                coordinates_crs=3035,
+            )
+
+        # The file is opened once, then always served by the pool
+        assert pool.stats()["misses"] == 1
+        assert pool.stats()["open"] == 1
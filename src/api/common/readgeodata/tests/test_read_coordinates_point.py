@@ -1,6 +1,6 @@
 import numpy as np
 import pytest
-from readgeodata.interfaces import BandsNameNotFoundError
+from readgeodata.interfaces import BandNotFoundError, BandsNameNotFoundError
 from readgeodata.rasterioreader import RasterIOReader
 
 
@@ -194,3 +194,49 @@ class TestReadCoordinatesPoint:
         )
 
         self.compare_outputs(want=want, got=got)
+
+    @pytest.mark.parametrize(
+        "bands,want",
+        [
+            (["band2"], {"band2": [-2, 0.0422363], "metadata": {}}),
+            (
+                [3, 1],
+                {
+                    "band3": [-2, 0.06335499],
+                    "band1": [-2.0, 0.02111816],
+                    "metadata": {},
+                },
+            ),
+            (
+                ["band1", 3],
+                {
+                    "band1": [-2.0, 0.02111816],
+                    "band3": [-2, 0.06335499],
+                    "metadata": {},
+                },
+            ),
+        ],
+    )
+    def test_read_band_subset(self, bands, want):
+        rio = RasterIOReader()
+        got = rio.sample_data_points(
+            filename="tests/fixtures/ostia_near_sea_fixture_3bands.tiff",
+            coordinates=[(4511823, 2072095), (4511823, 2072213)],
+            coordinates_crs=3035,
+            bands=bands,
+        )
+
+        self.compare_outputs(want=want, got=got)
+        assert list(got.keys()) == list(want.keys())
+
+    @pytest.mark.parametrize("bands", [["band4"], [0], [4]])
+    def test_read_missing_band(self, bands):
+        rio = RasterIOReader()
+
+        with pytest.raises(BandNotFoundError):
+            rio.sample_data_points(
+                filename="tests/fixtures/ostia_near_sea_fixture_3bands.tiff",
+                coordinates=[(4511823, 2072095)],
+                coordinates_crs=3035,
+                bands=bands,
+            )
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+import rasterio.warp
+from rasterio.crs import CRS
+from readgeodata.transform import get_transformer, transform_coordinates
+
+
+class TestTransformCoordinates:
+    def test_same_crs_is_noop(self):
+        xs, ys = [4511823.0, 4511823.0], [2072095.0, 2072213.0]
+
+        got_xs, got_ys = transform_coordinates(xs, ys, 3035, CRS.from_epsg(3035))
+
+        np.testing.assert_array_equal(got_xs, xs)
+        np.testing.assert_array_equal(got_ys, ys)
+
+    @pytest.mark.parametrize(
+        "xs,ys",
+        [
+            ([12.286326], [41.725469]),
+            ([12.286326, 12.285276], [41.725469, 41.726315]),
+        ],
+    )
+    def test_matches_rasterio_warp(self, xs, ys):
+        want_xs, want_ys = rasterio.warp.transform(
+            CRS.from_epsg(4326), CRS.from_epsg(3035), xs, ys
+        )
+
+        got_xs, got_ys = transform_coordinates(xs, ys, 4326, "EPSG:3035")
+
+        np.testing.assert_allclose(got_xs, want_xs, atol=1e-3)
+        np.testing.assert_allclose(got_ys, want_ys, atol=1e-3)
+
+    def test_transformer_is_cached(self):
+        get_transformer.cache_clear()
+
+        for _ in range(3):
+            transform_coordinates([12.28], [41.72], 4326, CRS.from_epsg(3035))
+
+        info = get_transformer.cache_info()
+        assert info.misses == 1
+        assert info.hits == 2
+
+    def test_vectorized_batch(self):
+        n = 100_000
+        xs = np.random.default_rng(0).uniform(7, 18, n)
+        ys = np.random.default_rng(1).uniform(37, 47, n)
+
+        got_xs, got_ys = transform_coordinates(xs, ys, 4326, 3035)
+
+        assert got_xs.shape == got_ys.shape == (n,)
+        assert np.isfinite(got_xs).all() and np.isfinite(got_ys).all()
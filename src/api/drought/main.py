@@ -3,6 +3,7 @@ from common.schema import NOT_IMPLEMENTED_PLACEHOLDER
 from geocoder.geocoder import Geocoder
 from geocoder.gmaps_geocoder import GMapsGeocoder
 from readgeodata.interfaces import GeoDataReader
+from readgeodata.pointcache import point_cache
 from readgeodata.rasterioreader import RasterIOReader
 
 logger = Logger()
@@ -22,6 +23,17 @@ class DroughtKeys:
     SEVERITY_RP200 = "severity_rp200y"
 
 
+# Bands read from the geotiff for each request
+DROUGHT_BANDS = [
+    DroughtKeys.DURATION_RP20,
+    DroughtKeys.DURATION_RP100,
+    DroughtKeys.DURATION_RP200,
+    DroughtKeys.SEVERITY_RP20,
+    DroughtKeys.SEVERITY_RP100,
+    DroughtKeys.SEVERITY_RP200,
+]
+
+
 @tracer.capture_method
 def main(
     filename: str,
@@ -67,9 +79,14 @@ def main(
     logger.info(
         f"Starting drought risk assessment with filename: '{filename}', address: '{address}', lat: '{lat}', lon: '{lon}'"
     )
-    values = geodatareader.sample_data_points(
-        filename=filename, coordinates=[(lon, lat)]
+    # Values are cached per raster pixel, repeated lookups skip the reader
+    values = point_cache.sample_data_points(
+        geodatareader=geodatareader,
+        filename=filename,
+        coordinates=[(lon, lat)],
+        bands=DROUGHT_BANDS,
     )
+    logger.debug(f"Point cache stats: {point_cache.stats()}")
 
     output = {
         "address": address,
@@ -25,6 +25,7 @@ class MockGeoDataReaderDrought(GeoDataReader):
         coordinates: list[tuple],
         metadata: list[str] | None = None,
         coordinates_crs: int = 4326,
+        bands: list[int | str] | None = None,
     ):
         return {
             DroughtKeys.DURATION_RP20: [0.0],
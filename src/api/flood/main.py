@@ -4,6 +4,7 @@ from geocoder.geocoder import Geocoder
 from geocoder.gmaps_geocoder import GMapsGeocoder
 from land_use.util_CLC_conversion import CLC_MAPPING
 from readgeodata.interfaces import GeoDataReader
+from readgeodata.pointcache import point_cache
 from readgeodata.rasterioreader import RasterIOReader
 
 logger = Logger()
@@ -37,6 +38,20 @@ class FloodKeys:
     NONE_AAL = "Average_None_AAL"
 
 
+# Bands read from the geotiff for each request
+FLOOD_BANDS = [
+    FloodKeys.LAND_USE,
+    FloodKeys.WH_20,
+    FloodKeys.WH_100,
+    FloodKeys.WH_200,
+    FloodKeys.VULN_20,
+    FloodKeys.VULN_100,
+    FloodKeys.VULN_200,
+    FloodKeys.AAL,
+    FloodKeys.RISK_INDEX,
+]
+
+
 @tracer.capture_method
 def main(
     filename: str,
@@ -82,9 +97,12 @@ def main(
     logger.info(
         f"Starting flood risk assessment with filename: '{filename}', address: '{address}', lat: '{lat}', lon: '{lon}'"
     )
-    values = geodatareader.sample_data_points(
+    # Values are cached per raster pixel, repeated lookups skip the reader
+    values = point_cache.sample_data_points(
+        geodatareader=geodatareader,
         filename=filename,
         coordinates=[(lon, lat)],
+        bands=FLOOD_BANDS,
         metadata=[
             FloodKeys.AGRICULTURE_AAL,
             FloodKeys.COMMERCIAL_AAL,
@@ -94,6 +112,8 @@ def main(
             FloodKeys.NONE_AAL,
         ],
     )
+    logger.debug(f"Point cache stats: {point_cache.stats()}")
+
     land_use = CLC_MAPPING[values[FloodKeys.LAND_USE][0]]
 
     output = {
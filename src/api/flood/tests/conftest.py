@@ -115,6 +115,7 @@ class MockGeoDataReaderFlood(GeoDataReader):
         coordinates: list[tuple],
         metadata: list[str],
         coordinates_crs: int = 4326,
+        bands: list[int | str] | None = None,
     ):
         return {
             FloodKeys.LAND_USE: [112],
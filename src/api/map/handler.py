@@ -1,3 +1,4 @@
+import os
 from typing import Dict, Tuple
 
 from aws_lambda_powertools import Logger, Tracer
@@ -8,10 +9,12 @@ from common.parse_env import EnvParser
 from main import main
 from map_converter import GeoJSONConverter
 from map_reader import BreamMapReader
+from readgeodata.gdalenv import apply_reader_config
 from schema import MapBaselineInputSchema, MapRCPInputSchema
 
 logger = Logger()
 tracer = Tracer()
+reader_config = apply_reader_config(os.environ)
 
 EDGE_LENGTH_M = 600
 
@@ -28,6 +31,8 @@ def handler(
         event=event, env_parser=env_parser, model=model
     )
 
+    reader_config.annotate()
+
     global cache
     map_reader = BreamMapReader(cache=cache)
     map_converter = GeoJSONConverter()
@@ -56,11 +56,11 @@ def main(
         except ValueError:
             raise BandNotFoundError() from None
 
-    # Read data
-    raster, profile = map_reader.read(filename=filename, box_3035=box_3035)
-
-    # Select only the requested layer
-    layer_data = raster[:, :, layer_index]
+    # Read only the requested layer (rasterio band indexes are 1-based)
+    raster, profile = map_reader.read(
+        filename=filename, box_3035=box_3035, bands=[layer_index + 1]
+    )
+    layer_data = raster[:, :, 0]
 
     # Convert data to geojson
     return map_converter.convert(
@@ -1,9 +1,15 @@
 import abc
-from typing import Iterable, Tuple
+import math
+from typing import Iterable, List, Tuple
 
 import bream.image.raster2 as brast
+import numpy as np
 from bream.core import Box
 from cache import Cache
+from rasterio.windows import Window
+from readgeodata.blockcache import block_cache, read_window
+from readgeodata.header import header_cache
+from readgeodata.pool import dataset_pool
 
 
 class MapReader(metaclass=abc.ABCMeta):
@@ -25,10 +31,13 @@ class BreamMapReader(MapReader):
         self,
         filename: str,
         box_3035: Box,
+        bands: List[int] = None,
     ) -> Tuple[Iterable, dict]:
         """Read file in specified box and return data associated with it.
 
-        The bream.raster2.read_portion function is used to read from the box.
+        When all the bands are requested, the bream.raster2.read_portion function
+        is used to read from the box. Otherwise only the requested bands are read,
+        with a windowed rasterio read.
         A cache is used to retrieve recently-accessed data.
 
         Parameters
@@ -37,22 +46,77 @@ class BreamMapReader(MapReader):
             Path of the file to read
         box_3035 : Box
             Box specifying the requested area
+        bands : List[int], optional
+            1-based indexes of the bands to read, by default all of them
 
         Returns
         -------
         Tuple[Iterable, dict]
-            Raster and profile of requested data
+            Raster, shaped (rows, cols, bands), and profile of requested data
         """
-        # An entry is cached if it shares filename and location boxes with a previous entry
-        key = (filename, tuple(box_3035.total_bounds))
+        # An entry is cached if it shares filename, location boxes and bands with a previous entry
+        key = (filename, tuple(box_3035.total_bounds), tuple(bands or ()))
         # Search the cache
         try:
             raster, profile = self.cache.get(key)
         except KeyError:
-            # TODO: Investigate why it takes up to 16 seconds to read_portion from wildfire lookup
-            raster, profile = brast.read_portion(
-                path=filename, location_boxes=box_3035
-            )[0]
+            if bands is None:
+                # TODO: Investigate why it takes up to 16 seconds to read_portion from wildfire lookup
+                raster, profile = brast.read_portion(
+                    path=filename, location_boxes=box_3035
+                )[0]
+            else:
+                raster, profile = self.read_bands(filename, box_3035, bands)
             self.cache.set(key=key, value=(raster, profile))
 
         return raster, profile
+
+    def read_bands(
+        self, filename: str, box_3035: Box, bands: List[int]
+    ) -> Tuple[np.ndarray, dict]:
+        """Read only some bands of a file in the specified box.
+
+        The file is expected to be in EPSG:3035, like the box. Blocks of
+        remote files are read through the local block cache of readgeodata,
+        so that requests for nearby boxes do not fetch them again.
+
+        Parameters
+        ----------
+        filename : str
+            Path of the file to read
+        box_3035 : Box
+            Box specifying the requested area
+        bands : List[int]
+            1-based indexes of the bands to read
+
+        Returns
+        -------
+        Tuple[np.ndarray, dict]
+            Raster, shaped (rows, cols, bands), and profile of requested data
+        """
+        left, bottom, right, top = box_3035.total_bounds
+        header = header_cache.get(filename)
+        ds = dataset_pool.open(filename)
+
+        # Smallest pixel-aligned window containing the box
+        col_start, row_start = ~header.transform * (left, top)
+        col_stop, row_stop = ~header.transform * (right, bottom)
+        window = Window.from_slices(
+            (math.floor(row_start), math.ceil(row_stop)),
+            (math.floor(col_start), math.ceil(col_stop)),
+            boundless=True,
+        )
+        if header.local:
+            data = ds.read(bands, window=window, boundless=True, fill_value=ds.nodata)
+        else:
+            data = read_window(ds, bands, window, block_cache, version=header.version)
+        profile = {
+            **header.profile,
+            "count": len(bands),
+            "height": data.shape[1],
+            "width": data.shape[2],
+            "transform": ds.window_transform(window),
+        }
+
+        # Bands last, like bream rasters
+        return np.moveaxis(data, 0, -1), profile
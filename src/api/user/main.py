@@ -2,11 +2,11 @@ import json
 import os
 from typing import Callable, Tuple
 
-import boto3
 import requests
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.middleware_factory import lambda_handler_decorator
 from aws_lambda_powertools.utilities.typing import LambdaContext
+from awscommon.parameters import parameter_provider
 from common.http_headers import response_headers
 from interface import UserDB
 from pydantic import ValidationError
@@ -16,6 +16,12 @@ from userdb_paramstore import ParamStoreDB
 logger = Logger()
 tracer = Tracer()
 
+# Fetch the user db during the Lambda init, off the first request
+if os.environ.get("USER_DB_PARAMETER_NAME"):
+    parameter_provider(
+        os.environ.get("SSM_PARAMETER_STORE_REGION", "eu-central-1")
+    ).prefetch(parameters=[os.environ["USER_DB_PARAMETER_NAME"]], transform=json.loads)
+
 
 @lambda_handler_decorator
 def validate_env(
@@ -61,8 +67,9 @@ def lambda_handler(event: dict, context: dict = None) -> dict:
     region_name = os.environ.get("SSM_PARAMETER_STORE_REGION", "eu-central-1")
 
     # SSM Parameter Store
-    client_parameter_store = boto3.client("ssm", region_name=region_name)
-    db = ParamStoreDB(client=client_parameter_store, parameter_name=user_db_param)
+    db = ParamStoreDB(
+        parameters=parameter_provider(region_name), parameter_name=user_db_param
+    )
     access_token = event["headers"]["Authorization"]
 
     status_code, body = get_userinfo_from_db(
@@ -3,10 +3,18 @@ import json
 import boto3
 import pytest
 import responses
+from awscommon.parameters import parameter_provider
 from main import get_user_email, get_userinfo_from_db, lambda_handler
 from moto import mock_aws
 
 
+@pytest.fixture(autouse=True)
+def clear_parameters():
+    # The user db parameter is cached by the container-wide provider
+    yield
+    parameter_provider("eu-central-1").clear()
+
+
 @pytest.mark.unit
 class TestGetUserUnit:
     @responses.activate
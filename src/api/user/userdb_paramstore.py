@@ -1,27 +1,27 @@
 import json
 
+from awscommon.parameters import ParameterProvider
 from interface import UserDB
 
 
 class ParamStoreDB(UserDB):
-    def __init__(self, client: object, parameter_name: str):
+    def __init__(self, parameters: ParameterProvider, parameter_name: str):
         """Initialize a Parameter Store DB
 
         Parameters
         ----------
-        client : object
-            SSM client
+        parameters : ParameterProvider
+            Provider caching the SSM parameters
         parameter_name : str
             Parameter to fetch, containing the user db
         """
-        self.client = client
+        self.parameters = parameters
         self.parameter_name = parameter_name
 
     @property
-    def parameter_value(self) -> str:
-        return json.loads(
-            self.client.get_parameter(Name=self.parameter_name)["Parameter"]["Value"]
-        )
+    def parameter_value(self) -> list:
+        # Parsed once per refresh of the cached parameter
+        return self.parameters.get_parameter(self.parameter_name, transform=json.loads)
 
     def query_user(self, id: str) -> dict:
         """Get user information from a parameter in AWS SSM Parameter Store
@@ -5,15 +5,15 @@ from common.event_parser import parse_aws_event
 from common.input_schema import RiskInputSchema
 from common.parse_env import BaselineEnvParser
 from common.response import handle_response
-from geocoder.gmaps_geocoder import GMapsGeocoder
+from geocoder.factory import geocoder_from_env
 from main import main
-from readgeodata.rasterioreader import RasterIOReader
+from readgeodata.factory import geodatareader_from_env
 from schema import OutputSchema
 
 logger = Logger()
 tracer = Tracer()
-gmapsgeocoder = GMapsGeocoder()
-riogeoreader = RasterIOReader()
+gmapsgeocoder = geocoder_from_env(os.environ)
+riogeoreader = geodatareader_from_env(os.environ)
 
 
 @handle_response(validate_schema=OutputSchema)
@@ -4,6 +4,7 @@ from geocoder.geocoder import Geocoder
 from geocoder.gmaps_geocoder import GMapsGeocoder
 from land_use.util_CLC_conversion import CLC_MAPPING
 from readgeodata.interfaces import GeoDataReader
+from readgeodata.pointcache import point_cache
 from readgeodata.rasterioreader import RasterIOReader
 
 logger = Logger()
@@ -34,6 +35,20 @@ class WildfireKeys:
     NONE_AAL = "Average_None_AAL"
 
 
+# Bands read from the geotiff for each request
+WILDFIRE_BANDS = [
+    WildfireKeys.FWI_2,
+    WildfireKeys.FWI_10,
+    WildfireKeys.FWI_30,
+    WildfireKeys.VULN_2,
+    WildfireKeys.VULN_10,
+    WildfireKeys.VULN_30,
+    WildfireKeys.AAL,
+    WildfireKeys.LAND_USE,
+    WildfireKeys.RISK_INDEX,
+]
+
+
 @tracer.capture_method
 def main(
     filename: str,
@@ -79,9 +94,12 @@ def main(
     logger.info(
         f"Starting wildfire risk assessment with filename: '{filename}', address: '{address}', lat: '{lat}', lon: '{lon}'"
     )
-    values = geodatareader.sample_data_points(
+    # Values are cached per raster pixel, repeated lookups skip the reader
+    values = point_cache.sample_data_points(
+        geodatareader=geodatareader,
         filename=filename,
         coordinates=[(lon, lat)],
+        bands=WILDFIRE_BANDS,
         metadata=[
             WildfireKeys.AGRICULTURE_AAL,
             WildfireKeys.COMMERCIAL_AAL,
@@ -91,6 +109,7 @@ def main(
             WildfireKeys.NONE_AAL,
         ],
     )
+    logger.debug(f"Point cache stats: {point_cache.stats()}")
 
     land_use = CLC_MAPPING[values[WildfireKeys.LAND_USE][0]]
 
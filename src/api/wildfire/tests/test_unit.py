@@ -25,6 +25,7 @@ class MockGeoDataReaderWildfire(GeoDataReader):
         coordinates: list[tuple],
         metadata: list[str] | None = None,
         coordinates_crs: int = 4326,
+        bands: list[int | str] | None = None,
     ):
         return {
             WildfireKeys.FWI_2: [0.0],
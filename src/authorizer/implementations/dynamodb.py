@@ -1,4 +1,4 @@
-import boto3
+from awscommon.clients import aws_client
 from botocore.exceptions import ClientError
 from interfaces import KeyDB
 
@@ -6,7 +6,8 @@ from interfaces import KeyDB
 class DynamoKeyDB(KeyDB):
     def __init__(self, table_name: str) -> None:
         self.table_name = table_name
-        self.dynamodb_client = boto3.client("dynamodb")
+        # Shared by the requests of the container, instead of one per request
+        self.dynamodb_client = aws_client("dynamodb")
         self.error_help_strings = {
             # Operation specific errors
             "ConditionalCheckFailedException": "Condition check specified in the operation failed, review and update the condition check before retrying",
@@ -2,7 +2,7 @@ import abc
 import json
 
 import argon2
-import boto3
+from awscommon.parameters import parameter_provider
 
 
 # Domain interface
@@ -23,9 +23,9 @@ class KeyRepository(metaclass=abc.ABCMeta):
 class Key:
     def __init__(self):
         # Read configurations from SSM Parameter store
-        client = boto3.client("ssm")
-        response = client.get_parameter(Name="authorizer_hasher_config")
-        hasher_config = json.loads(response["Parameter"]["Value"])
+        hasher_config = parameter_provider().get_parameter(
+            "authorizer_hasher_config", transform=json.loads
+        )
         time_cost = hasher_config["time_cost"]
         memory_cost = hasher_config["memory_cost"]
         parallelism = hasher_config["parallelism"]